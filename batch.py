@@ -0,0 +1,217 @@
+"""
+Headless batch conversion: apply an effect chain to many audio files in parallel.
+
+Example usage:
+    python batch.py -e "Male Voice" -e "Echoed Voice" -o converted/ recordings/ "clips/*.mp3"
+    python batch.py --list-effects
+
+Files found in a directory keep their path relative to it under the output
+directory, so in/a/x.wav and in/b/x.wav become converted/a/x.wav and
+converted/b/x.wav. Inputs that would still share an output file (x.wav next
+to x.mp3) are reported before anything is converted, with exit status 2.
+
+Rendered files are cached by content, effect chain and settings, so running the
+same batch again only converts the files (or effects) that changed.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from voice_morph_wizard import pipeline, registry
+from voice_morph_wizard.cache import RenderCache
+from voice_morph_wizard.chain import PER_CHANNEL
+from voice_morph_wizard.wavfile import AudioInfo
+
+# File extensions picked up when a directory is given
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+
+# Directory shared with the GUI for cached renders
+RENDER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice_morph_wizard", "rendered")
+
+
+def find_audio_files(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Expand directories and glob patterns into a list of audio files.
+
+    Parameters:
+        paths (Iterable[str]): Files, directories (searched recursively) or glob patterns.
+
+    Returns:
+        List[Tuple[str, str]]: WAV and MP3 files, without duplicates, in the order they were found,
+        each with its path relative to the directory it was found in (its name, for files and globs).
+
+    Example usage:
+        files = find_audio_files(["recordings/", "clips/*.mp3"])
+    """
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        file_path = os.path.join(directory, name)
+                        files.setdefault(file_path, os.path.relpath(file_path, path))
+        else:
+            # Shells on Windows do not expand globs, so expand them here
+            for match in sorted(glob.glob(path)):
+                if match.lower().endswith(AUDIO_EXTENSIONS):
+                    files.setdefault(match, os.path.basename(match))
+
+    return list(files.items())
+
+
+def convert_one(input_path: str, output_path: str, filter_names: Sequence[str],
+                internal_rate: Optional[int] = None, chunk_frames: int = pipeline.CHUNK_FRAMES,
+                cache_dir: Optional[str] = None, dither: bool = False) -> Tuple[float, float, bool]:
+    """
+    Convert a single file; runs in a worker process.
+
+    Parameters:
+        input_path (str): WAV or MP3 file to convert.
+        output_path (str): WAV file to write.
+        filter_names (Sequence[str]): Effect names, applied in order.
+        internal_rate (Optional[int]): Sample rate the effects run at (default: the file's rate).
+        chunk_frames (int): Number of frames processed at a time.
+        cache_dir (Optional[str]): Directory of cached renders, or None to always convert.
+        dither (bool): Whether to add TPDF dither when converting the output to int16.
+
+    Returns:
+        Tuple[float, float, bool]: Duration of the audio and time spent converting it, in seconds,
+        and whether the output was taken from the cache.
+    """
+    start = time.perf_counter()
+
+    def render(path: str) -> AudioInfo:
+        return pipeline.convert_file(
+            input_path, path,
+            lambda info: registry.create_chain(filter_names, sample_rate=info.rate, channels=info.channels,
+                                               internal_rate=internal_rate, block_size=chunk_frames),
+            chunk_frames, dither=dither
+        )[1]
+
+    if cache_dir is None:
+        output_info, cached = render(output_path), False
+    else:
+        # Every file is converted once per run, so only the shared on-disk tier is useful here
+        render_cache = RenderCache(max_bytes=0, disk_dir=cache_dir)
+        render_key = render_cache.key(input_path, filter_names, internal_rate=internal_rate, policy=PER_CHANNEL, dither=dither)
+        output_info, cached = render_cache.render(render_key, output_path, render)
+
+    return output_info.frames / output_info.rate, time.perf_counter() - start, cached
+
+
+def output_path_for(relative_path: str, output_dir: str) -> str:
+    """
+    Path of the converted WAV file for an input file, mirroring its path relative to its input directory.
+    """
+    name = os.path.splitext(relative_path)[0]
+    return os.path.join(output_dir, name + ".wav")
+
+
+def find_output_conflicts(outputs: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Find output files that more than one input would be converted to (such as x.wav next to x.mp3).
+
+    Parameters:
+        outputs (Dict[str, str]): Output path of every input file.
+
+    Returns:
+        Dict[str, List[str]]: The inputs of every output path shared by several of them.
+    """
+    inputs_by_output: Dict[str, List[str]] = {}
+    for input_path, output_path in outputs.items():
+        inputs_by_output.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(input_path)
+    return {output: inputs for output, inputs in inputs_by_output.items() if len(inputs) > 1}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the batch converter.
+
+    Parameters:
+        argv (Optional[Sequence[str]]): Command line arguments (default: sys.argv[1:]).
+
+    Returns:
+        int: Exit status, 1 if any file failed to convert, 2 if two files would be converted to the same output.
+    """
+    parser = argparse.ArgumentParser(description="Apply an effect chain to WAV and MP3 files in parallel.")
+    parser.add_argument("inputs", nargs="*", help="audio files, directories or glob patterns")
+    parser.add_argument("-e", "--effect", action="append", default=[], dest="effects",
+                        help="effect to apply, as named in the GUI; repeat to chain effects")
+    parser.add_argument("-o", "--output-dir", default="converted", help="directory for the converted WAV files")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes (default: one per core)")
+    parser.add_argument("--internal-rate", type=int, default=None, help="sample rate the effects run at (default: each file's rate)")
+    parser.add_argument("--chunk-frames", type=int, default=pipeline.CHUNK_FRAMES, help="frames processed at a time")
+    parser.add_argument("--dither", action="store_true", help="add TPDF dither when converting the output to 16-bit")
+    parser.add_argument("--cache-dir", default=RENDER_CACHE_DIR, help="directory of cached renders (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="convert every file, without reading or filling the cache")
+    parser.add_argument("--list-effects", action="store_true", help="list the available effects and exit")
+    args = parser.parse_args(argv)
+
+    if args.list_effects:
+        print("\n".join(registry.names()))
+        return 0
+
+    unknown = [name for name in args.effects if registry.get_factory(name) is None]
+    if unknown:
+        parser.error(f"unknown effect(s): {', '.join(unknown)} (see --list-effects)")
+    if not args.effects:
+        parser.error("no effect given (use -e, see --list-effects)")
+
+    files = find_audio_files(args.inputs)
+    if not files:
+        parser.error("no WAV or MP3 files found")
+
+    # Every file keeps its path relative to the directory it was found in, so files of the same name do not
+    # overwrite each other; files that still share an output (x.wav next to x.mp3) are refused before converting
+    outputs = {path: output_path_for(relative_path, args.output_dir) for path, relative_path in files}
+    conflicts = find_output_conflicts(outputs)
+    if conflicts:
+        for output, inputs in conflicts.items():
+            print(f"{output}: would be written by {' and '.join(inputs)}", file=sys.stderr)
+        print("error: several input files map to the same output file; rename them or convert them separately",
+              file=sys.stderr)
+        return 2
+
+    for output_path in outputs.values():
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    failed = 0
+    cached_files = 0
+    total_audio = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(convert_one, path, outputs[path], args.effects,
+                            args.internal_rate, args.chunk_frames, cache_dir, args.dither): path
+            for path in outputs
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                audio_seconds, elapsed, cached = future.result()
+            except Exception as error:
+                failed += 1
+                print(f"{path}: failed: {type(error).__name__}: {error}", file=sys.stderr)
+                continue
+
+            total_audio += audio_seconds
+            if cached:
+                cached_files += 1
+                print(f"{path}: {audio_seconds:.1f} s of audio, unchanged (cached)")
+            else:
+                print(f"{path}: {audio_seconds:.1f} s of audio in {elapsed:.2f} s ({audio_seconds / max(elapsed, 1e-9):.0f}x realtime)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Converted {len(files) - failed}/{len(files)} files ({cached_files} from the cache), {total_audio:.1f} s of audio "
+          f"in {elapsed:.2f} s ({total_audio / max(elapsed, 1e-9):.0f}x realtime)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
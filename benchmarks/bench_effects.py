@@ -0,0 +1,300 @@
+"""
+Throughput and per-block latency benchmark for every effect.
+
+Each effect is run block by block, the way the realtime loop and file conversion
+run it, for every combination of block size and sample rate. For each one the
+report gives the real-time factor, the cost per sample, the median and 99th
+percentile time per block, how many blocks missed their realtime deadline (the
+duration of the block's audio), and how much memory a block allocates.
+
+Input is either synthetic (a seeded voice-like harmonic tone with noise) or the
+bundled audio_clips/*.wav mixed to mono; either is looped to the length needed,
+and its samples are used as-is at every rate. The Drunk effect, which the GUI does
+not offer, is benchmarked along with the registered effects.
+
+Results can be written to JSON and compared with a previous run, failing when an
+effect got slower, so a build that would miss the realtime deadline is caught.
+
+Example usage:
+    python benchmarks/bench_effects.py
+    python benchmarks/bench_effects.py --input all --seconds 2 --json effects.json
+    python benchmarks/bench_effects.py -e "Male Voice" --rates 48000 --block-sizes 64 128 --compare effects.json
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Repository root, so the benchmark imports the working tree
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from voice_morph_wizard import registry  # noqa: E402
+from voice_morph_wizard.filters import DTYPE, DrunkEffect, Effect  # noqa: E402
+from voice_morph_wizard.wavfile import read_wav  # noqa: E402
+
+BLOCK_SIZES = [64, 128, 256, 512, 1024, 2048, 4096, 8192]
+RATES = [8000, 16000, 44100, 48000]
+INPUTS = ["synthetic", "clips"]
+
+# Effects that exist in the package but are not registered for the GUI
+EXTRA_EFFECTS: Dict[str, Callable[..., Effect]] = {"Drunk Effect": DrunkEffect}
+
+# Blocks processed before timing starts, to fill delay lines and warm caches
+WARMUP_BLOCKS = 4
+
+# Minimum number of timed blocks, whatever the block size and duration
+MIN_BLOCKS = 32
+
+# Blocks traced when measuring allocations (tracing is slow)
+ALLOCATION_BLOCKS = 16
+
+
+def effect_factories(names: Optional[Sequence[str]] = None) -> Dict[str, Callable[..., Effect]]:
+    """
+    Look up the effects to benchmark.
+
+    Parameters:
+        names (Optional[Sequence[str]]): Effect names, or None for every registered effect and the extras.
+
+    Returns:
+        Dict[str, Callable[..., Effect]]: Factory of every effect, by name.
+    """
+    available = {name: registry.get_factory(name) for name in registry.names()}
+    available.update(EXTRA_EFFECTS)
+    if names is None:
+        return available
+
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"unknown effect(s): {', '.join(unknown)}")
+    return {name: available[name] for name in names}
+
+
+def synthetic_input(rate: int, num_samples: int) -> np.ndarray:
+    """
+    Voice-like test signal: a 150 Hz harmonic tone with vibrato, plus noise, in the int16 range.
+    """
+    t = np.arange(num_samples) / rate
+    phase = 2 * np.pi * (150 * t + 2 * np.sin(2 * np.pi * 5 * t))
+    tone = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 8))
+    noise = np.random.default_rng(0).standard_normal(num_samples)
+    return 6000 * tone + 300 * noise
+
+
+def clips_input(num_samples: int) -> np.ndarray:
+    """
+    The bundled audio clips mixed to mono and concatenated, looped to num_samples.
+    """
+    clips = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "audio_clips", "*.wav"))):
+        try:
+            info, samples = read_wav(path)
+        except ValueError:
+            continue
+        clips.append(samples.reshape(-1, info.channels).mean(axis=1))
+    if not clips:
+        raise FileNotFoundError("no 16-bit WAV files in audio_clips/")
+
+    signal = np.concatenate(clips)
+    return np.resize(signal, num_samples)
+
+
+def split_blocks(signal: np.ndarray, block_size: int) -> List[np.ndarray]:
+    # Effects may overwrite their input, so every block is a separate copy, in the sample type a Chain hands them
+    return [signal[start:start + block_size].astype(DTYPE) for start in range(0, len(signal) - block_size + 1, block_size)]
+
+
+def time_blocks(effect: Effect, blocks: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Process blocks in order and return the time each one took, in nanoseconds.
+    """
+    times = np.empty(len(blocks), dtype=np.int64)
+    clock = time.perf_counter_ns
+    process = effect.process
+    for index, block in enumerate(blocks):
+        start = clock()
+        process(block)
+        times[index] = clock() - start
+    return times
+
+
+def measure_allocations(effect: Effect, blocks: Sequence[np.ndarray]) -> Tuple[float, float]:
+    """
+    Trace the memory allocated while processing blocks.
+
+    Returns:
+        Tuple[float, float]: Median bytes allocated on top of what was live before a block
+        (its temporaries and output), and bytes still held after each block on average.
+
+    CPython has no hook counting individual allocations made by NumPy, so the
+    allocations are measured in bytes through tracemalloc, which sees NumPy's buffers.
+    An effect that allocates nothing in steady state reports close to zero.
+    """
+    tracemalloc.start()
+    try:
+        transient = []
+        start_memory = tracemalloc.get_traced_memory()[0]
+        for block in blocks:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            output = effect.process(block)
+            transient.append(tracemalloc.get_traced_memory()[1] - before)
+            del output
+        retained = (tracemalloc.get_traced_memory()[0] - start_memory) / len(blocks)
+    finally:
+        tracemalloc.stop()
+
+    return float(np.median(transient)), retained
+
+
+def benchmark(factory: Callable[..., Effect], signal: np.ndarray, rate: int, block_size: int) -> dict:
+    """
+    Benchmark one effect at one sample rate and block size.
+
+    Parameters:
+        factory (Callable[..., Effect]): Creates the effect for a sample rate.
+        signal (numpy.ndarray): Input samples (float in the int16 range).
+        rate (int): Sample rate the effect is set up for.
+        block_size (int): Number of samples per block.
+
+    Returns:
+        dict: The measurements, see the module docstring.
+    """
+    blocks = split_blocks(signal, block_size)
+
+    effect = factory(sample_rate=rate)
+    times = time_blocks(effect, blocks)[WARMUP_BLOCKS:]
+
+    # Allocations are measured on a separate run, so tracing does not skew the timings
+    effect = factory(sample_rate=rate)
+    time_blocks(effect, split_blocks(signal[:WARMUP_BLOCKS * block_size], block_size))
+    alloc_bytes, retained_bytes = measure_allocations(effect, blocks[WARMUP_BLOCKS:WARMUP_BLOCKS + ALLOCATION_BLOCKS])
+
+    deadline_ns = block_size / rate * 1e9
+    processed_samples = len(times) * block_size
+    return {
+        "realtime_factor": processed_samples / rate / (times.sum() / 1e9),
+        "ns_per_sample": times.sum() / processed_samples,
+        "p50_block_us": float(np.percentile(times, 50)) / 1000,
+        "p99_block_us": float(np.percentile(times, 99)) / 1000,
+        "max_block_us": float(times.max()) / 1000,
+        "deadline_us": deadline_ns / 1000,
+        "deadline_misses": int((times > deadline_ns).sum()),
+        "blocks": len(times),
+        "alloc_bytes_per_block": alloc_bytes,
+        "retained_bytes_per_block": retained_bytes,
+    }
+
+
+def run(effects: Dict[str, Callable[..., Effect]], inputs: Sequence[str], rates: Sequence[int],
+        block_sizes: Sequence[int], seconds: float, progress: bool = True) -> List[dict]:
+    """
+    Benchmark every combination of effect, input, sample rate and block size.
+
+    Returns:
+        List[dict]: One result per combination, with the combination included.
+    """
+    results = []
+    for input_name in inputs:
+        for rate in rates:
+            for block_size in block_sizes:
+                num_blocks = max(math.ceil(seconds * rate / block_size), MIN_BLOCKS) + WARMUP_BLOCKS
+                num_samples = num_blocks * block_size
+                signal = synthetic_input(rate, num_samples) if input_name == "synthetic" else clips_input(num_samples)
+
+                for name, factory in effects.items():
+                    result = {"effect": name, "input": input_name, "rate": rate, "block_size": block_size}
+                    result.update(benchmark(factory, signal, rate, block_size))
+                    results.append(result)
+                    if progress:
+                        print(format_result(result), flush=True)
+
+    return results
+
+
+def format_result(result: dict) -> str:
+    misses = f"  {result['deadline_misses']} late" if result["deadline_misses"] else ""
+    return (f"{result['effect']:26} {result['input']:9} {result['rate']:6} Hz {result['block_size']:5} "
+            f"{result['realtime_factor']:8.1f}x {result['ns_per_sample']:8.1f} ns/sample "
+            f"p50 {result['p50_block_us']:8.1f} us  p99 {result['p99_block_us']:8.1f} us / {result['deadline_us']:8.1f} us "
+            f"{result['alloc_bytes_per_block']:9.0f} B/block{misses}")
+
+
+def compare(results: Sequence[dict], baseline: Sequence[dict], tolerance: float) -> List[str]:
+    """
+    Find the combinations that got slower than in a previous run.
+
+    Parameters:
+        results (Sequence[dict]): Results of this run.
+        baseline (Sequence[dict]): Results of the previous run.
+        tolerance (float): Allowed relative increase of ns/sample and of the p99 block time.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    def combination(result: dict) -> Tuple:
+        return result["effect"], result["input"], result["rate"], result["block_size"]
+
+    previous = {combination(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(combination(result))
+        if old is None:
+            continue
+        for metric in ("ns_per_sample", "p99_block_us"):
+            if result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{' / '.join(map(str, combination(result)))}: {metric} "
+                                   f"{old[metric]:.1f} -> {result[metric]:.1f}")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cost of every effect per block size and sample rate.")
+    parser.add_argument("-e", "--effect", action="append", dest="effects", help="effect to benchmark (default: all); repeatable")
+    parser.add_argument("--input", choices=INPUTS + ["all"], default="synthetic", help="input signal")
+    parser.add_argument("--rates", type=int, nargs="+", default=RATES, help="sample rates")
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=BLOCK_SIZES, help="block sizes in samples")
+    parser.add_argument("--seconds", type=float, default=1.0, help="audio processed per combination")
+    parser.add_argument("--json", dest="json_path", help="write the results to this JSON file")
+    parser.add_argument("--compare", dest="baseline_path", help="fail if slower than the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown for --compare (default: 20%%)")
+    parser.add_argument("--quiet", action="store_true", help="only print regressions")
+    args = parser.parse_args(argv)
+
+    try:
+        effects = effect_factories(args.effects)
+    except ValueError as error:
+        parser.error(str(error))
+    inputs = INPUTS if args.input == "all" else [args.input]
+
+    results = run(effects, inputs, args.rates, args.block_sizes, args.seconds, progress=not args.quiet)
+
+    if args.json_path:
+        with open(args.json_path, "w") as json_file:
+            json.dump({
+                "python": sys.version,
+                "numpy": np.__version__,
+                "machine": platform.platform(),
+                "results": results,
+            }, json_file, indent=2)
+
+    if args.baseline_path:
+        with open(args.baseline_path) as json_file:
+            regressions = compare(results, json.load(json_file)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Startup-time benchmark for the DSP core and the batch CLI.
+
+Every target is imported in a fresh interpreter with `python -X importtime`, a
+number of times, and the median cumulative import time is reported. The run
+fails if a target pulls in a GUI or audio-device module (tkinter, PyAudio,
+pydub, simpleaudio) or SciPy, or takes longer than its budget.
+
+Example usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 20 --budget-ms 400 --json import_times.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Repository root, so the targets import the working tree
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported by worker processes and other headless users
+TARGETS = [
+    "voice_morph_wizard",
+    "voice_morph_wizard.filters",
+    "voice_morph_wizard.registry",
+    "voice_morph_wizard.pipeline",
+    "batch",
+]
+
+# Top-level modules none of the targets may import
+FORBIDDEN = ("tkinter", "_tkinter", "pyaudio", "pydub", "simpleaudio", "scipy")
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """
+    Import a module in a new interpreter with -X importtime.
+
+    Parameters:
+        module (str): Module to import.
+
+    Returns:
+        Tuple[float, List[str]]: Cumulative import time of the module in milliseconds,
+        and every module the import loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = 0.0
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        loaded.append(name.strip())
+        if name.strip() == module:
+            cumulative = int(total) / 1000
+
+    return cumulative, loaded
+
+
+def run(targets: Sequence[str], repeat: int, budget_ms: Optional[float]) -> Tuple[Dict[str, dict], bool]:
+    """
+    Benchmark every target.
+
+    Parameters:
+        targets (Sequence[str]): Modules to import.
+        repeat (int): Number of fresh interpreters per target.
+        budget_ms (Optional[float]): Maximum median import time, or None for no limit.
+
+    Returns:
+        Tuple[Dict[str, dict], bool]: Results per target, and whether all targets passed.
+    """
+    results = {}
+    passed = True
+    for module in targets:
+        times = []
+        for _ in range(repeat):
+            cumulative, loaded = measure_import(module)
+            times.append(cumulative)
+
+        forbidden = sorted({name for name in loaded if name.split(".")[0] in FORBIDDEN})
+        median = statistics.median(times)
+        ok = not forbidden and (budget_ms is None or median <= budget_ms)
+        passed = passed and ok
+
+        results[module] = {
+            "median_ms": median,
+            "min_ms": min(times),
+            "max_ms": max(times),
+            "modules_loaded": len(loaded),
+            "forbidden_imports": forbidden,
+            "passed": ok,
+        }
+
+    return results, passed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of the DSP core.")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per target")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if a median import time exceeds this")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this JSON file")
+    parser.add_argument("targets", nargs="*", default=TARGETS, help="modules to import")
+    args = parser.parse_args(argv)
+
+    results, passed = run(args.targets, args.repeat, args.budget_ms)
+
+    for module, result in results.items():
+        status = "ok" if result["passed"] else "FAIL"
+        print(f"{module:32} {result['median_ms']:8.1f} ms median ({result['min_ms']:.1f}-{result['max_ms']:.1f}), "
+              f"{result['modules_loaded']} modules  {status}")
+        if result["forbidden_imports"]:
+            print(f"    imports {', '.join(result['forbidden_imports'])}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as json_file:
+            json.dump({"python": sys.version, "results": results}, json_file, indent=2)
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
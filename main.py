@@ -1,20 +1,30 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
+import logging
 import os
-import wave
+import shutil
+import tempfile
 import pyaudio
-from pydub import AudioSegment
 import simpleaudio as sa
 import threading
 import time
 import numpy as np
+from typing import Optional
 from utils import Utils
 from ui import UI
-from filters import Filters
+from voice_morph_wizard.chain import Chain, PER_CHANNEL, DOWNMIX
+from voice_morph_wizard.engine import CallbackEngine, WavePlayer
+from voice_morph_wizard.cache import DecodedAudioCache, RenderCache
+from voice_morph_wizard.telemetry import BlockTelemetry
+from voice_morph_wizard.wavfile import Quantizer
+from voice_morph_wizard import pipeline, registry
 
 # Initialize PyAudio
 p = pyaudio.PyAudio()
 
+# Print log lines (such as the realtime telemetry) on the console
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+
 # Global Variables for Audio Playback
 selected_file_path = None        # Path to the currently selected audio file
 play_obj = None                  # Represents the currently playing audio object
@@ -24,17 +34,33 @@ paused_position = 0              # The position where playback was paused (in mi
 update_bar_thread_running = False # Flag to control the thread updating the play bar
 last_played_button = None        # Represents the last played audio button for audio_clips
 
+# Global Variables for the Decoded Audio Cache
+AUDIO_CACHE_BYTES = 256 * 2**20  # Memory budget for decoded audio, in bytes
+AUDIO_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice_morph_wizard", "decoded")  # On-disk tier, or None
+audio_cache = DecodedAudioCache(AUDIO_CACHE_BYTES, AUDIO_CACHE_DIR)  # Audio decoded for playback, reused by conversion
+RENDER_CACHE_BYTES = 256 * 2**20  # Memory budget for converted audio, in bytes
+RENDER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice_morph_wizard", "rendered")  # On-disk tier, or None
+render_cache = RenderCache(RENDER_CACHE_BYTES, RENDER_CACHE_DIR)  # Converted audio by source, filter and settings
+
 # Global Variables for Microphone and Real-time Audio Processing
 MIC_RATE = 16000            # Microphone sampling rate in frames per second
 MIC_CHANNELS = 2            # Number of channels for the microphone
-BLOCKLEN = 2048             # Number of frames per block for real-time audio processing
+MIC_CHANNEL_POLICY = DOWNMIX  # The microphone channels carry the same voice, so process them once
+BLOCKLEN = 2048             # Number of frames per block processed by the effects
+FRAMES_PER_BUFFER = 2048    # Number of frames per PortAudio buffer, independent of BLOCKLEN
+BLOCK_SIZES = [64, 128, 256, 512, 1024, 2048, 4096]  # Selectable values for BLOCKLEN and FRAMES_PER_BUFFER
+FRAME_SEC = None            # Frame length in seconds of the pitch shifters (and other frame-based effects), or None for theirs
+LATENCY_MODES = {"Normal": (2048, 2048, None), "Low Latency": (128, 128, 0.02)}  # Mode -> (BLOCKLEN, FRAMES_PER_BUFFER, FRAME_SEC)
+REALTIME_ENGINE = "callback"  # "callback" (PyAudio callback mode with ring buffers) or "blocking" (read/write loop)
+INTERNAL_RATE = None        # Sample rate the effects run at (resampled in and out), or None for the stream's own rate
+DITHER = False              # Add TPDF dither when converting the processed audio to int16
 
 # Global Variables for Modulated Audio Playback
-modulated_audio_data = None                  # Modulated audio data
+modulated_audio_path = None                  # Temporary WAV file holding the modulated audio
 modulated_is_playing = False                 # Indicates whether the modulated audio is currently playing
 modulated_paused_position = 0                # The position where modulated playback was paused (in milliseconds)
 modulated_update_bar_thread_running = False  # Flag to control the thread updating the modulated play bar
-modulated_play_obj = None                    # Represents the currently playing modulated audio object
+modulated_play_obj = None                    # WavePlayer playing the modulated audio
 modulated_audio_length = 0                   # Length of the modulated audio in seconds
 
 # Global Variables for Audio Properties
@@ -49,7 +75,7 @@ audio_thread = None             # Thread for audio playback
 current_active_button = None    # Currently active button for audio playback control
 is_audio_playing = False         # Indicates whether any audio is currently playing
 current_filter = ""              # Currently selected audio filter
-filter_options = ["Normal", "Alien Voice", "Robotic Voice", "Male Voice", "Female Voice", "Baby Voice", "Echoed Voice", "Ping Pong Voice", "Alternate Channel Effect", "Mutation Effect", "Flanger Effect"]
+filter_options = ["Normal"] + registry.names()  # Built-in and plugin effects from the registry
 
 # Global Variables for UI Styling
 button_off_color = "#3498DB"    # Color when buttons are off or not pressed
@@ -58,6 +84,11 @@ button_on_color = "#2ECC71"     # Color when buttons are on or pressed
 # Global Variables for Real-time Audio Streaming
 stream = None                   # Represents the audio stream from the microphone
 mic_active = False               # Indicates whether the microphone is active
+realtime_chain = None           # Effect chain applied to the microphone stream
+realtime_engine = None          # CallbackEngine running the microphone stream in callback mode
+REALTIME_TELEMETRY = True       # Time every block of the microphone stream and count deadline misses
+TELEMETRY_LOG_INTERVAL = 10.0   # Seconds between telemetry log lines, or None for none
+realtime_telemetry = None       # BlockTelemetry of the running microphone stream, or None
 
 
 def play_raw_audio() -> None:
@@ -71,7 +102,7 @@ def play_raw_audio() -> None:
         paused_position (int): The position where playback was paused (in milliseconds).
         update_bar_thread_running (bool): Indicates whether the update bar thread is running.
         raw_play_bar (tk.Scale): Represents the play bar widget.
-        AudioSegment (class): Represents an audio segment from the pydub library.
+        audio_cache (DecodedAudioCache): Cache of decoded audio files.
         sa (pydub.AudioSegment): Represents the play buffer function from pydub.
         threading.Thread (class): Represents a thread for parallel execution.
         update_play_bar() (function): Function to update the play bar.
@@ -85,7 +116,7 @@ def play_raw_audio() -> None:
         play_raw_audio()
     """
     # Access global variables that will be modified in this function
-    global selected_file_path, play_obj, is_playing, paused_position, update_bar_thread_running, raw_play_bar, AudioSegment, sa, threading, update_play_bar
+    global selected_file_path, play_obj, is_playing, paused_position, update_bar_thread_running, raw_play_bar, sa, threading, update_play_bar
 
     # Check if a file path has been selected
     if selected_file_path:
@@ -101,9 +132,9 @@ def play_raw_audio() -> None:
         # Wait briefly to ensure the thread stops before starting new playback
         time.sleep(0.1)
 
-        # Load the audio file and prepare it for playback from the beginning
-        audio = AudioSegment.from_file(selected_file_path)
-        play_obj = sa.play_buffer(audio.raw_data, num_channels=audio.channels, bytes_per_sample=audio.sample_width, sample_rate=audio.frame_rate)
+        # Get the decoded audio (decoding the file only the first time) and play it from the beginning
+        info, samples = audio_cache.get(selected_file_path)
+        play_obj = sa.play_buffer(samples, num_channels=info.channels, bytes_per_sample=info.width, sample_rate=info.rate)
 
         # Set flags to indicate audio is now playing and update the paused position
         is_playing = True
@@ -127,7 +158,7 @@ def toggle_pause_continue() -> None:
         update_bar_thread_running (bool): Indicates whether the update bar thread is running.
         raw_play_bar (tk.Scale): Represents the play bar widget.
         selected_file_path (str): Path to the selected audio file.
-        AudioSegment (class): Represents an audio segment from the pydub library.
+        audio_cache (DecodedAudioCache): Cache of decoded audio files.
         sa (pydub.AudioSegment): Represents the play buffer function from pydub.
         threading.Thread (class): Represents a thread for parallel execution.
 
@@ -140,7 +171,7 @@ def toggle_pause_continue() -> None:
         toggle_pause_continue()
     """
     # Access global variables that will be modified in this function
-    global play_obj, is_playing, paused_position, update_bar_thread_running, raw_play_bar, selected_file_path, AudioSegment, sa, threading
+    global play_obj, is_playing, paused_position, update_bar_thread_running, raw_play_bar, selected_file_path, sa, threading
 
     # Check if the audio is currently playing
     if is_playing:
@@ -155,13 +186,13 @@ def toggle_pause_continue() -> None:
     else:
         # Resume playing audio from the current slider position
         if selected_file_path:
-            # Load the selected audio file
-            audio = AudioSegment.from_file(selected_file_path)
+            # Get the decoded audio of the selected file from the cache
+            info, samples = audio_cache.get(selected_file_path)
             # Start playing from the slider's position
             start_position = int(raw_play_bar.get() * 1000)  # Convert slider position to milliseconds
-            audio = audio[start_position:]  # Resume from this position
+            samples = samples[start_position * info.rate // 1000 * info.channels:]  # Resume from this position
             # Play the audio buffer
-            play_obj = sa.play_buffer(audio.raw_data, num_channels=audio.channels, bytes_per_sample=audio.sample_width, sample_rate=audio.frame_rate)
+            play_obj = sa.play_buffer(samples, num_channels=info.channels, bytes_per_sample=info.width, sample_rate=info.rate)
             is_playing = True
             paused_position = start_position  # Update paused_position
             threading.Thread(target=update_play_bar, daemon=True).start()
@@ -231,12 +262,15 @@ def on_microphone_click() -> None:
 
     # Check if the microphone is not active
     if not mic_active:
-        # Start the audio stream
-        start_stream()
+        # Start every microphone session with a fresh chain for the selected filter
+        set_realtime_chain(current_filter)
         # Set the microphone state to active
         mic_active = True
-        # Start a separate thread for real-time audio processing
-        threading.Thread(target=process_realtime_audio, daemon=True).start()
+        # Start the audio stream
+        start_stream()
+        # The blocking engine processes audio in a separate thread; the callback engine runs its own
+        if REALTIME_ENGINE == "blocking":
+            threading.Thread(target=process_realtime_audio, daemon=True).start()
         # Toggle button colors for the microphone and output buttons
         UI.toggle_button_color(microphone_button, canvas, microphone_button, filter_button, output_button)
         UI.toggle_button_color(output_button, canvas, microphone_button, filter_button, output_button)
@@ -256,6 +290,8 @@ def stop_stream() -> None:
 
     Global Variables:
         stream (pyaudio.Stream): Represents the audio stream for real-time input and output.
+        realtime_engine (CallbackEngine): Engine running the stream in callback mode.
+        realtime_telemetry (BlockTelemetry): Per-block timings of the stream, or None.
 
     Returns:
         None
@@ -265,8 +301,18 @@ def stop_stream() -> None:
     Example usage:
         stop_stream()
     """
-    # Use global variable
-    global stream
+    # Use global variables
+    global stream, realtime_engine, realtime_telemetry
+
+    # Stop the callback engine and report how well it kept up
+    if realtime_engine is not None:
+        realtime_engine.stop()
+        print(f"Realtime engine stats: {realtime_engine.stats()}")
+        realtime_engine = None
+
+    # Report the block timings of the stream that just stopped
+    if realtime_telemetry is not None:
+        print(f"Realtime telemetry: {realtime_telemetry.summary()}")
 
     # Check if the stream is not None
     if stream is not None:
@@ -282,59 +328,182 @@ def process_realtime_audio() -> None:
 
     Global Variables:
         mic_active (bool): Indicates whether the microphone is active.
-        current_filter (str): Current audio filter selected.
+        realtime_chain (Chain): Effect chain for the selected filter.
         stream (pyaudio.Stream): Represents the audio stream for real-time input and output.
-        BLOCKLEN (int): Number of frames per buffer.
+        BLOCKLEN (int): Number of frames per block processed by the effects.
+        DITHER (bool): Whether to add TPDF dither when converting the output to int16.
+        realtime_telemetry (BlockTelemetry): Per-block timings of the stream, or None.
 
     Returns:
         None
 
     This function continuously reads audio from the microphone, applies modulation effects based
-    on the selected filter, and writes the processed audio to the output stream.
+    on the selected filter, and writes the processed audio to the output stream, converted to
+    int16 once with saturation (and optional dither) instead of wrapping around. With telemetry,
+    the read, process and write stages of every block are timed, and input overflows and output
+    underflows reported by PortAudio are counted instead of stopping the loop. The read waits
+    for a whole block to arrive, so it takes about a block by design and has no deadline; the
+    deadline applies to the work stage, processing plus writing a block once its input is in.
 
     Example usage:
         process_realtime_audio()
     """
     # Use global variables
-    global mic_active, current_filter, stream, BLOCKLEN
+    global mic_active, realtime_chain, stream, BLOCKLEN, realtime_telemetry
+
+    telemetry = realtime_telemetry
+    clock = BlockTelemetry.clock
+
+    # int16 block handed to the output stream, reused for every block (it only grows
+    # if a resampling chain returns a frame more than it was given)
+    output_block = np.zeros(BLOCKLEN * MIC_CHANNELS, dtype=np.int16)
+    quantizer = Quantizer(DITHER)
 
     # Continue processing audio while the microphone is active
     while mic_active:
-        # Read audio from the microphone
-        input_audio = stream.read(BLOCKLEN)
+        read_start = clock()
+
+        # Read audio from the microphone; an overflow means input was lost while the loop was busy
+        try:
+            input_audio = stream.read(BLOCKLEN)
+        except OSError as error:
+            if error.errno != pyaudio.paInputOverflowed:
+                raise
+            if telemetry is not None:
+                telemetry.count_flag("input_overflow")
+            continue
         input_array = np.frombuffer(input_audio, dtype=np.int16)
-        output_array = np.empty(1)
+        process_start = clock()
 
-        # Check if the filter is turned on
-        if filter_button.data["is_on"] == True:
-            # Apply modulation based on the selected filter
-            if current_filter == "Alien Voice":
-                output_array = Filters.alien_effect(input_array)
-            elif current_filter == "Robotic Voice":
-                output_array = Filters.robotize_effect(input_array)
-            elif current_filter == "Male Voice":
-                output_array = Filters.male_effect(input_array)
-            elif current_filter == "Female Voice":
-                output_array = Filters.female_effect(input_array)
-            elif current_filter == "Baby Voice":
-                output_array = Filters.baby_effect(input_array)
-            elif current_filter == "Echoed Voice":
-                output_array = Filters.echo_effect(input_array)
-            elif current_filter == "Ping Pong Voice":
-                output_array = Filters.ping_pong_effect(input_array)
-            elif current_filter == "Alternate Channel Effect":
-                output_array = Filters.alternate_channels(input_array)
-            elif current_filter == "Mutation Effect":
-                output_array = Filters.mutation_effect(input_array)
-            elif current_filter == "Flanger Effect":
-                output_array = Filters.flanger_effect(input_array)
-            else:
-                output_array = input_array  # No modulation if no button is selected
-        else:
-            output_array = input_array  # No modulation if no button is selected
+        # Apply the selected filter
+        output_array = process_block(input_array)
+        write_start = clock()
+
+        # Convert to int16 into the reused block, rounding and saturating instead of wrapping around
+        if len(output_array) > len(output_block):
+            output_block = np.zeros(len(output_array), dtype=np.int16)
+        output_int16 = quantizer(output_array, output_block[:len(output_array)])
+
+        # Write the processed audio to the output stream; an underflow means the speakers ran dry
+        # before this block arrived (the block is still written). PyAudio reads the array's
+        # memory directly, so no bytes object is made
+        try:
+            stream.write(output_int16, num_frames=len(output_int16) // MIC_CHANNELS, exception_on_underflow=True)
+        except OSError as error:
+            if error.errno != pyaudio.paOutputUnderflowed:
+                raise
+            if telemetry is not None:
+                telemetry.count_flag("output_underflow")
+
+        if telemetry is not None:
+            write_end = clock()
+            telemetry.record("read", process_start - read_start)
+            telemetry.record("process", write_start - process_start)
+            telemetry.record("write", write_end - write_start)
+            telemetry.record("work", write_end - process_start)
+            telemetry.maybe_log()
+
+def process_block(input_array: np.ndarray) -> np.ndarray:
+    """
+    Apply the selected filter to one block of microphone audio.
+
+    Parameters:
+        input_array (np.ndarray): Block of int16 samples from the microphone.
+
+    Global Variables:
+        realtime_chain (Chain): Effect chain for the selected filter.
+
+    Returns:
+        np.ndarray: Processed block, or the input block if the filter is off.
+
+    This function is shared by the blocking loop and the callback engine.
+
+    Example usage:
+        output_array = process_block(input_array)
+    """
+    # Check if the filter is turned on
+    if filter_button.data["is_on"] == True:
+        # Apply modulation based on the selected filter
+        return realtime_chain.process(input_array)
+    return input_array  # No modulation if no button is selected
+
+def create_chain(*filter_names: str, sample_rate: int = MIC_RATE, channels: int = 1, output_channels: Optional[int] = None,
+                 policy: str = PER_CHANNEL, frame_sec: Optional[float] = None) -> Chain:
+    """
+    Create a new effect chain that applies the given filter options in order.
 
-        # Write the processed audio to the output stream
-        stream.write(output_array.astype(np.int16).tobytes())
+    Parameters:
+        *filter_names (str): Names of the filters as shown in the filter combobox.
+        sample_rate (int): Sample rate of the audio the chain processes.
+        channels (int): Number of interleaved channels in the input.
+        output_channels (int): Number of interleaved channels in the output (default: what the effects produce).
+        policy (str): PER_CHANNEL to process every channel, DOWNMIX to mix to mono first.
+        frame_sec (Optional[float]): Frame length of the pitch shifters and other frame-based effects,
+            in seconds (default: their own, meant for file conversion).
+
+    Global Variables:
+        INTERNAL_RATE (int): Sample rate the effects run at, or None for sample_rate.
+
+    Returns:
+        Chain: A chain with a fresh effect per name; "Normal" adds no stage.
+
+    The chain converts each block to float once and hands it from stage to stage,
+    so stacking effects does not add int16 round-trips. When INTERNAL_RATE differs
+    from sample_rate, the chain resamples around the effects.
+
+    Example usage:
+        chain = create_chain("Male Voice", "Echoed Voice", "Flanger Effect", sample_rate=44100)
+    """
+    # Create the effects from the registry, skipping names without one (such as "Normal")
+    return registry.create_chain(filter_names, sample_rate=sample_rate, channels=channels, output_channels=output_channels,
+                                 policy=policy, internal_rate=INTERNAL_RATE, block_size=BLOCKLEN, frame_sec=frame_sec)
+
+def set_realtime_chain(filter_name: str) -> None:
+    """
+    Replace the effect chain used by the microphone stream.
+
+    Parameters:
+        filter_name (str): Name of the selected filter.
+
+    Global Variables:
+        realtime_chain (Chain): Effect chain applied to the microphone stream.
+        FRAME_SEC (Optional[float]): Frame length of the pitch shifters, set by the latency mode.
+
+    Returns:
+        None
+
+    The chain is built here, outside the audio loop, which only swaps to the new
+    object on its next block instead of comparing filter names on every block.
+    Its frame-based effects use FRAME_SEC, so they add less latency in Low Latency mode.
+
+    Example usage:
+        set_realtime_chain("Echoed Voice")
+    """
+    global realtime_chain
+
+    # The output stream has as many channels as the microphone
+    realtime_chain = create_chain(filter_name, sample_rate=MIC_RATE, channels=MIC_CHANNELS, output_channels=MIC_CHANNELS,
+                                  policy=MIC_CHANNEL_POLICY, frame_sec=FRAME_SEC)
+
+def get_realtime_telemetry() -> Optional[dict]:
+    """
+    Return the per-block timings of the microphone stream.
+
+    Global Variables:
+        realtime_telemetry (BlockTelemetry): Per-block timings of the stream, or None.
+
+    Returns:
+        Optional[dict]: For every stage ("read"/"process"/"write"/"work" in blocking mode,
+        "callback"/"process" in callback mode), the number of blocks, the mean, median,
+        99th percentile and maximum time per block and the deadline misses (only "work"
+        has a deadline in blocking mode, the others are for information), plus the
+        PortAudio flag counts (see BlockTelemetry.snapshot); None if telemetry is off
+        or the stream was never started.
+
+    Example usage:
+        p99 = get_realtime_telemetry()["stages"]["process"]["p99"]
+    """
+    return realtime_telemetry.snapshot() if realtime_telemetry is not None else None
 
 def on_filter_click() -> None:
     """
@@ -357,36 +526,126 @@ def on_filter_click() -> None:
     # Access the global variable that tracks the currently selected audio button
     UI.toggle_button_color(filter_button, canvas, microphone_button, filter_button, output_button)
 
-def start_stream() -> None:
+def start_stream() -> float:
     """
     Start the audio stream for real-time input and output.
 
     Global Variables:
         stream (pyaudio.Stream): Represents the audio stream for real-time input and output.
+        realtime_engine (CallbackEngine): Engine running the stream in callback mode.
+        REALTIME_ENGINE (str): "callback" or "blocking".
         MIC_RATE (int): Sample rate for the microphone input.
         MIC_CHANNELS (int): Number of channels for the microphone input.
-        BLOCKLEN (int): Number of frames per buffer.
+        BLOCKLEN (int): Number of frames per block processed by the effects.
+        FRAMES_PER_BUFFER (int): Number of frames per PortAudio buffer.
+        REALTIME_TELEMETRY (bool): Whether to time every block of the stream.
+        DITHER (bool): Whether to add TPDF dither when converting the output to int16.
+        realtime_telemetry (BlockTelemetry): Per-block timings of the stream, or None.
+        realtime_chain (Chain): Effect chain applied to the microphone stream.
 
     Returns:
-        None
+        float: Round-trip latency from microphone to speakers, in seconds, including the effect chain.
 
     This function initializes and starts the audio stream for real-time input and output using PyAudio.
+    In callback mode the stream is owned by a CallbackEngine, which processes audio on its own and
+    measures the latency from the stream's timestamps and the audio queued in its ring buffers.
+    In blocking mode the latency is estimated from the device latencies and the block size.
+    Either way the delay of the effect chain is added: the latency of its effects (such as
+    a pitch shifter's frame) and the samples its resamplers hold back.
+    With REALTIME_TELEMETRY, realtime_telemetry collects the time every stage takes per block
+    (see get_realtime_telemetry) and a summary is logged every TELEMETRY_LOG_INTERVAL seconds.
 
     Example usage:
-        start_stream()
+        latency = start_stream()
     """
     # Use global variables
-    global stream, MIC_RATE, MIC_CHANNELS, BLOCKLEN
-
-    # Open the audio stream for real-time input and output
-    stream = p.open(
-        format=pyaudio.paInt16,     # Set the audio format to 16-bit PCM
-        channels=MIC_CHANNELS,      # Set the number of channels for the microphone input
-        rate=MIC_RATE,              # Set the sample rate for the microphone input
-        input=True,                 # Enable input (microphone)
-        output=True,                # Enable output (speakers)
-        frames_per_buffer=BLOCKLEN  # Set the number of frames per buffer
-    )
+    global stream, realtime_engine, realtime_telemetry, MIC_RATE, MIC_CHANNELS, BLOCKLEN, FRAMES_PER_BUFFER
+
+    if REALTIME_ENGINE == "callback":
+        # Let PortAudio pull audio through ring buffers fed by a worker thread
+        realtime_engine = CallbackEngine(p, process_block, rate=MIC_RATE, channels=MIC_CHANNELS,
+                                         frames_per_buffer=FRAMES_PER_BUFFER, block_size=BLOCKLEN,
+                                         telemetry=REALTIME_TELEMETRY, telemetry_log_interval=TELEMETRY_LOG_INTERVAL,
+                                         dither=DITHER)
+        realtime_telemetry = realtime_engine.telemetry
+        realtime_engine.start()
+        latency = realtime_engine.measure_latency()
+        if latency is None:
+            # The stream did not deliver audio in time; fall back to the nominal latencies
+            latency = realtime_engine.prime_frames / MIC_RATE
+    else:
+        # Open the audio stream for real-time input and output
+        stream = p.open(
+            format=pyaudio.paInt16,     # Set the audio format to 16-bit PCM
+            channels=MIC_CHANNELS,      # Set the number of channels for the microphone input
+            rate=MIC_RATE,              # Set the sample rate for the microphone input
+            input=True,                 # Enable input (microphone)
+            output=True,                # Enable output (speakers)
+            frames_per_buffer=FRAMES_PER_BUFFER  # Set the number of frames per buffer
+        )
+        # A block is only processed once it has been fully read
+        latency = stream.get_input_latency() + stream.get_output_latency() + BLOCKLEN / MIC_RATE
+
+        # Once a block has been read, processing and writing it must take less than a block.
+        # The read itself waits for the block to arrive, so it is timed without a deadline
+        realtime_telemetry = None
+        if REALTIME_TELEMETRY:
+            realtime_telemetry = BlockTelemetry(["read", "process", "write", "work"], deadline=BLOCKLEN / MIC_RATE,
+                                                log_interval=TELEMETRY_LOG_INTERVAL, deadline_stages=["work"])
+
+    # The effects delay the audio on top of the stream
+    effects_latency = (realtime_chain.latency + realtime_chain.hold_back) / MIC_RATE if realtime_chain is not None else 0.0
+    latency += effects_latency
+
+    print(f"Round-trip latency: {latency * 1000:.1f} ms, of which {effects_latency * 1000:.1f} ms in the effects "
+          f"(block {BLOCKLEN}, buffer {FRAMES_PER_BUFFER} frames)")
+    return latency
+
+def set_latency(block_size: int, frames_per_buffer: int, frame_sec: Optional[float] = None) -> None:
+    """
+    Change the effect block size and the PortAudio buffer size of the microphone stream.
+
+    Parameters:
+        block_size (int): Frames per block processed by the effects (64 to 4096).
+        frames_per_buffer (int): Frames per PortAudio buffer (64 to 4096).
+        frame_sec (Optional[float]): Frame length of the pitch shifters in seconds, or None for their own.
+
+    Global Variables:
+        BLOCKLEN (int): Number of frames per block processed by the effects.
+        FRAMES_PER_BUFFER (int): Number of frames per PortAudio buffer.
+        FRAME_SEC (Optional[float]): Frame length of the pitch shifters on the microphone stream.
+        mic_active (bool): Indicates whether the microphone is active.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If a size is outside the supported range.
+
+    If the microphone is running, the stream is restarted with the new sizes. Effects
+    carry their state across any block boundary, so the block size does not change the
+    sound; a shorter pitch-shifter frame lowers its latency, at the cost of smearing low
+    voices.
+
+    Example usage:
+        set_latency(*LATENCY_MODES["Low Latency"])
+    """
+    global BLOCKLEN, FRAMES_PER_BUFFER, FRAME_SEC
+
+    for size in (block_size, frames_per_buffer):
+        if not BLOCK_SIZES[0] <= size <= BLOCK_SIZES[-1]:
+            raise ValueError(f"Block and buffer sizes must be between {BLOCK_SIZES[0]} and {BLOCK_SIZES[-1]} frames, got {size}")
+
+    BLOCKLEN = block_size
+    FRAMES_PER_BUFFER = frames_per_buffer
+    FRAME_SEC = frame_sec
+    block_size_var.set(BLOCKLEN)
+    buffer_size_var.set(FRAMES_PER_BUFFER)
+
+    # Restart a running microphone stream with the new sizes
+    if mic_active:
+        on_microphone_click()
+        on_microphone_click()
 
 def on_output_click():
     pass
@@ -401,8 +660,8 @@ def on_upload_audio() -> None:
         paused_position (float): Stores the position where audio playback was paused.
         is_playing (bool): Indicates whether audio is currently playing.
         play_obj (SimpleAudioObject): Represents the audio playback object for the original audio.
-        modulated_audio_data (bytes): Represents the modulated audio data.
-        modulated_play_obj (SimpleAudioObject): Represents the modulated audio playback object.
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
+        modulated_play_obj (WavePlayer): Represents the modulated audio playback object.
         modulated_is_playing (bool): Indicates whether modulated audio is currently playing.
         modulated_paused_position (int): Stores the position where modulated audio was paused.
         modulated_play_bar (tk.Scale): Progress bar for modulated audio playback.
@@ -418,7 +677,7 @@ def on_upload_audio() -> None:
     """
     # Use global variables
     global selected_file_path, audio_length, paused_position, is_playing, play_obj
-    global modulated_audio_data, modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_play_bar
+    global modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_play_bar
 
     # Open a file dialog for the user to select an audio file
     file_path = filedialog.askopenfilename(title="Upload Audio File", filetypes=[("Audio Files", "*.mp3;*.wav")])
@@ -442,9 +701,9 @@ def on_upload_audio() -> None:
         # Update the global variable for the selected file path
         selected_file_path = file_path
 
-        # Load the audio file to determine its length
-        audio = AudioSegment.from_file(file_path)
-        audio_length = len(audio) / 1000  # Length of audio in seconds
+        # Read the length of the audio from the file's header; it is only decoded when played
+        info = pipeline.probe(file_path)
+        audio_length = info.frames / info.rate  # Length of audio in seconds
 
         # Configure the play bar's range to match the length of the audio
         raw_play_bar.config(to=audio_length)
@@ -466,7 +725,7 @@ def on_upload_audio() -> None:
         download_modulated_button.grid_remove()
 
         # Reset modulated audio-related variables
-        modulated_audio_data = None
+        remove_modulated_audio()
         modulated_play_obj = None
         modulated_is_playing = False
         modulated_paused_position = 0
@@ -477,7 +736,7 @@ def on_convert() -> None:
 
     Global Variables:
         selected_file_path (str): Represents the path of the selected audio file.
-        modulated_audio_data (bytes): Represents the modulated audio data.
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
         modulated_audio_length (float): Length of the modulated audio in seconds.
         modulated_play_button (tk.Button): Button for playing modulated audio.
         modulated_pause_continue_button (tk.Button): Button for pausing/continuing modulated audio playback.
@@ -485,24 +744,30 @@ def on_convert() -> None:
         modulated_is_playing (bool): Indicates whether modulated audio is currently playing.
         modulated_paused_position (int): Stores the position where modulated audio was paused.
         modulated_update_bar_thread_running (bool): Indicates whether the update bar thread is running.
-        modulated_play_obj (SimpleAudioObject): Represents the modulated audio playback object.
+        modulated_play_obj (WavePlayer): Represents the modulated audio playback object.
         current_filter (str): Current audio filter selected.
         CHANNELS (int): Number of audio channels.
         RATE (int): Sample rate in Hertz.
         WIDTH (int): Sample width (in bytes) for audio data.
         LENGTH (int): Number of frames in the audio.
+        render_cache (RenderCache): Cache of converted audio.
+        DITHER (bool): Whether to add TPDF dither when converting the output to int16.
 
     Returns:
         None
 
     This function converts the selected audio file, applies modulation effects based on the
-    selected filter, and sets up the modulated audio controls for playback.
+    selected filter, and sets up the modulated audio controls for playback. The file is read,
+    filtered and written to a temporary WAV file chunk by chunk, so memory use does not
+    depend on its length. A file that was already converted with the same filter and
+    settings is taken from the render cache instead of being filtered again, so switching
+    back and forth between filters is instant.
 
     Example usage:
         on_convert()
     """
     # Use global variables
-    global selected_file_path, modulated_audio_data, modulated_audio_length, modulated_play_button, modulated_pause_continue_button
+    global selected_file_path, modulated_audio_path, modulated_audio_length, modulated_play_button, modulated_pause_continue_button
     global modulated_play_bar, modulated_is_playing, modulated_paused_position, modulated_update_bar_thread_running, modulated_play_obj, current_filter
     global CHANNELS, RATE, WIDTH, LENGTH
 
@@ -510,62 +775,44 @@ def on_convert() -> None:
     if selected_file_path:
         # Check the file extension
         file_extension = selected_file_path.split('.')[-1].lower()
-        if file_extension == 'wav':
-            # Read the WAV file
-            wf = wave.open(selected_file_path, 'rb')
-            CHANNELS = wf.getnchannels()
-            RATE = wf.getframerate()
-            WIDTH = wf.getsampwidth()
-            LENGTH = wf.getnframes()
-            input_bytes = wf.readframes(LENGTH)
-            wf.close()
-        elif file_extension == 'mp3':
-            # Read the MP3 file and convert it to WAV
-            audio = AudioSegment.from_mp3(selected_file_path)
-            CHANNELS = audio.channels
-            RATE = audio.frame_rate
-            WIDTH = audio.sample_width
-            LENGTH = len(audio.raw_data) // (WIDTH * CHANNELS)
-            input_bytes = np.array(audio.get_array_of_samples()).astype('int16').tobytes()
-        else:
+        if file_extension not in ('wav', 'mp3'):
             # Unsupported file format
             Utils.show_select_audio_dialog()
             return
 
-        # Convert the input bytes to a numpy array
-        input_array = np.frombuffer(input_bytes, dtype='int16')
-
         # Check if the filter is turned on
         if filter_button.data["is_on"] == True:
-            # Apply modulation based on the selected filter
-            if current_filter == "Alien Voice":
-                modulated_array = Filters.alien_effect(input_array)
-            elif current_filter == "Robotic Voice":
-                modulated_array = Filters.robotize_effect(input_array)
-            elif current_filter == "Male Voice":
-                modulated_array = Filters.male_effect(input_array)
-            elif current_filter == "Female Voice":
-                modulated_array = Filters.female_effect(input_array)
-            elif current_filter == "Baby Voice":
-                modulated_array = Filters.baby_effect(input_array)
-            elif current_filter == "Echoed Voice":
-                modulated_array = Filters.echo_effect(input_array)
-            elif current_filter == "Ping Pong Voice":
-                modulated_array = Filters.ping_pong_effect(input_array)
-            elif current_filter == "Alternate Channel Effect":
-                modulated_array = Filters.alternate_channels(input_array)
-            elif current_filter == "Mutation Effect":
-                modulated_array = Filters.mutation_effect(input_array)
-            elif current_filter == "Flanger Effect":
-                modulated_array = Filters.flanger_effect(input_array)
+            # Stop playing and drop the previous conversion
+            if modulated_play_obj:
+                modulated_play_obj.stop()
+            remove_modulated_audio()
+
+            # Render into a new temporary WAV file
+            file_descriptor, modulated_audio_path = tempfile.mkstemp(suffix=".wav")
+            os.close(file_descriptor)
+
+            # Apply modulation with a fresh chain so the live microphone state is untouched;
+            # every channel of the file is processed separately, with effects set up for the file's rate.
+            # The key covers everything the output depends on besides the file and the filter.
+            # Audio already decoded for playback is reused; otherwise the file is streamed, not decoded into memory.
+            render_key = render_cache.key(selected_file_path, [current_filter], internal_rate=INTERNAL_RATE, policy=PER_CHANNEL,
+                                          dither=DITHER)
+            output_info, _ = render_cache.render(
+                render_key, modulated_audio_path,
+                lambda output_path: pipeline.convert_file(
+                    selected_file_path, output_path,
+                    lambda info: create_chain(current_filter, sample_rate=info.rate, channels=info.channels),
+                    cache=audio_cache, dither=DITHER
+                )[1]
+            )
+
+            # Effects such as Ping Pong turn mono input into stereo output
+            CHANNELS, RATE, WIDTH, LENGTH = output_info
         else:
             # Show a dialog if the filter is not turned on
             Utils.show_select_audio_dialog()
             return
 
-        # Convert the modulated array back to bytes
-        modulated_audio_data = modulated_array.astype('int16').tobytes()
-
         # Set the length of the modulated audio (in seconds)
         modulated_audio_length = LENGTH / RATE
 
@@ -589,14 +836,11 @@ def play_modulated_audio() -> None:
     Play modulated audio from the beginning.
 
     Global Variables:
-        modulated_audio_data (bytes): Represents the modulated audio data.
-        modulated_play_obj (SimpleAudioObject): Represents the modulated audio playback object.
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
+        modulated_play_obj (WavePlayer): Represents the modulated audio playback object.
         modulated_is_playing (bool): Indicates whether modulated audio is currently playing.
         modulated_paused_position (int): Stores the position where modulated audio was paused.
         modulated_update_bar_thread_running (bool): Indicates whether the update bar thread is running.
-        CHANNELS (int): Number of audio channels.
-        WIDTH (int): Sample width (in bytes) for audio data.
-        RATE (int): Sample rate in Hertz.
 
     Returns:
         None
@@ -604,13 +848,13 @@ def play_modulated_audio() -> None:
     This function plays modulated audio from the beginning, stopping any existing playback
     and updating thread. It resets the modulated play bar and paused position, starts playing
     the modulated audio, and launches a thread to update the play bar during playback.
+    The audio is streamed from the temporary WAV file instead of being loaded into memory.
 
     Example usage:
         play_modulated_audio()
     """
     # Use global variables
-    global modulated_audio_data, modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_update_bar_thread_running
-    global CHANNELS, WIDTH, RATE
+    global modulated_audio_path, modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_update_bar_thread_running
 
     # Stop any existing playback and updating thread
     if modulated_play_obj:
@@ -624,28 +868,12 @@ def play_modulated_audio() -> None:
     modulated_play_bar.set(0)
     modulated_paused_position = 0
 
-    # Ensure the modulated audio data is not None
-    if modulated_audio_data is None:
+    # Ensure there is modulated audio to play
+    if modulated_audio_path is None:
         return
-    
-    # Ensure that the length is a multiple of '(WIDTH * CHANNELS)'
-    remainder = len(modulated_audio_data) % (WIDTH * CHANNELS)
-    if remainder != 0:
-        modulated_audio_data += b'\x00' * (WIDTH * CHANNELS - remainder)
-    
+
     # Start playing the modulated audio from the beginning
-    modulated_audio_segment = AudioSegment(
-        data=modulated_audio_data,
-        sample_width=WIDTH,
-        frame_rate=RATE,
-        channels=CHANNELS
-    )
-    modulated_play_obj = sa.play_buffer(
-        modulated_audio_segment.raw_data,
-        num_channels=CHANNELS,
-        bytes_per_sample=WIDTH,
-        sample_rate=RATE
-    )
+    modulated_play_obj = WavePlayer(p, modulated_audio_path)
     modulated_is_playing = True
     modulated_update_bar_thread_running = True
 
@@ -661,7 +889,7 @@ def update_modulated_play_bar() -> None:
 
     Global Variables:
         modulated_is_playing (bool): Indicates whether modulated audio is currently playing.
-        modulated_play_obj (SimpleAudioObject): Represents the modulated audio playback object.
+        modulated_play_obj (WavePlayer): Represents the modulated audio playback object.
         modulated_audio_length (float): Length of the modulated audio in seconds.
         modulated_paused_position (int): Stores the position where modulated audio was paused.
         modulated_update_bar_thread_running (bool): Indicates whether the update bar thread is running.
@@ -703,13 +931,11 @@ def toggle_modulated_pause_continue() -> None:
     Toggle between pausing and continuing playback of modulated audio.
 
     Global Variables:
-        modulated_play_obj (SimpleAudioObject): Represents the modulated audio playback object.
+        modulated_play_obj (WavePlayer): Represents the modulated audio playback object.
         modulated_is_playing (bool): Indicates whether modulated audio is currently playing.
         modulated_paused_position (int): Stores the position where modulated audio was paused.
         modulated_update_bar_thread_running (bool): Indicates whether the update bar thread is running.
-        modulated_audio_data (bytes): Represents the modulated audio data.
-        CHANNELS (int): Number of audio channels.
-        WIDTH (int): Sample width (in bytes) for audio data.
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
         RATE (int): Sample rate in Hertz.
 
     Returns:
@@ -723,7 +949,7 @@ def toggle_modulated_pause_continue() -> None:
         toggle_modulated_pause_continue()
     """
     # Use global variables
-    global modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_update_bar_thread_running, modulated_audio_data, CHANNELS, WIDTH, RATE
+    global modulated_play_obj, modulated_is_playing, modulated_paused_position, modulated_update_bar_thread_running, modulated_audio_path, RATE
 
     # Check if the audio is currently playing
     if modulated_is_playing:
@@ -744,20 +970,9 @@ def toggle_modulated_pause_continue() -> None:
     else:
         # Resume playing modulated audio from the current slider position
         start_position = int(modulated_play_bar.get() * 1000)  # Convert slider position to milliseconds
-        modulated_audio_segment = AudioSegment(
-            data=modulated_audio_data,
-            sample_width=WIDTH,
-            frame_rate=RATE,
-            channels=CHANNELS
-        )[start_position:]
 
         # Play the modulated audio from the specified start position
-        modulated_play_obj = sa.play_buffer(
-            modulated_audio_segment.raw_data,
-            num_channels=CHANNELS,
-            bytes_per_sample=WIDTH,
-            sample_rate=RATE
-        )
+        modulated_play_obj = WavePlayer(p, modulated_audio_path, start_frame=start_position * RATE // 1000)
 
         # Set flags to indicate audio is now playing
         modulated_is_playing = True
@@ -775,27 +990,25 @@ def download_modulated_audio() -> None:
     Download the modulated audio data to a WAV file.
 
     Global Variables:
-        modulated_audio_data (bytes): Represents the modulated audio data.
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
         selected_file_path (str): Represents the path of the selected audio file.
-        CHANNELS (int): Number of audio channels.
-        WIDTH (int): Sample width (in bytes) for audio data.
-        RATE (int): Sample rate in Hertz.
 
     Returns:
         None
 
     This function prompts the user to choose a file name and location to save the modulated
     audio data as a WAV file. If modulated audio data is not available, it prints a message
-    indicating that there is no modulated audio to save.
+    indicating that there is no modulated audio to save. The temporary WAV file already
+    holds the result, so it is copied without being loaded into memory.
 
     Example usage:
         download_modulated_audio()
     """
     # Use global variables
-    global modulated_audio_data, selected_file_path, CHANNELS, WIDTH, RATE
+    global modulated_audio_path, selected_file_path
 
     # Check if modulated audio data is available
-    if modulated_audio_data is None:
+    if modulated_audio_path is None:
         return
 
     # Extract the original filename without extension
@@ -815,12 +1028,31 @@ def download_modulated_audio() -> None:
     if not file_path:
         return
 
-    # Write the modulated audio data to the WAV file
-    with wave.open(file_path, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(WIDTH)
-        wf.setframerate(RATE)
-        wf.writeframes(modulated_audio_data)
+    # Copy the modulated audio to the chosen WAV file
+    shutil.copyfile(modulated_audio_path, file_path)
+
+def remove_modulated_audio() -> None:
+    """
+    Delete the temporary WAV file holding the modulated audio, if there is one.
+
+    Global Variables:
+        modulated_audio_path (str): Path of the temporary WAV file holding the modulated audio.
+
+    Returns:
+        None
+
+    Example usage:
+        remove_modulated_audio()
+    """
+    global modulated_audio_path
+
+    if modulated_audio_path is not None:
+        # The file may still be open for playback on some platforms
+        try:
+            os.remove(modulated_audio_path)
+        except OSError:
+            pass
+        modulated_audio_path = None
 
 def on_closing() -> None:
     """
@@ -843,6 +1075,11 @@ def on_closing() -> None:
     if play_obj:
         play_obj.stop()
 
+    # Stop the modulated playback and delete its temporary file
+    if modulated_play_obj:
+        modulated_play_obj.stop()
+    remove_modulated_audio()
+
     # Set the flag to stop the update thread
     update_bar_thread_running = False
 
@@ -1021,6 +1258,9 @@ def on_filter_option_change(event: tk.Event) -> None:
     # Update the global variable current_filter with the selected option
     current_filter = selected_option
 
+    # Hand the microphone stream a new effect chain for the selected option
+    set_realtime_chain(current_filter)
+
     # Change the text of the filter button to the selected option
     filter_button.config(text=selected_option)
 
@@ -1116,6 +1356,23 @@ menu_bar.add_cascade(label="File", menu=file_menu)
 file_menu.add_command(label="Upload Audio", command=on_upload_audio)
 file_menu.add_command(label="Upload Effects", command=Utils.on_upload_effects)
 
+# Create a "Latency" menu for the microphone block and buffer sizes
+block_size_var = tk.IntVar(value=BLOCKLEN)
+buffer_size_var = tk.IntVar(value=FRAMES_PER_BUFFER)
+latency_menu = tk.Menu(menu_bar, tearoff=0)
+menu_bar.add_cascade(label="Latency", menu=latency_menu)
+for mode, mode_sizes in LATENCY_MODES.items():
+    latency_menu.add_command(label=mode, command=lambda sizes=mode_sizes: set_latency(*sizes))
+block_size_menu = tk.Menu(latency_menu, tearoff=0)
+buffer_size_menu = tk.Menu(latency_menu, tearoff=0)
+latency_menu.add_cascade(label="Block Size", menu=block_size_menu)
+latency_menu.add_cascade(label="Buffer Size", menu=buffer_size_menu)
+for size in BLOCK_SIZES:
+    block_size_menu.add_radiobutton(label=str(size), variable=block_size_var, value=size,
+                                    command=lambda s=size: set_latency(s, FRAMES_PER_BUFFER, FRAME_SEC))
+    buffer_size_menu.add_radiobutton(label=str(size), variable=buffer_size_var, value=size,
+                                     command=lambda s=size: set_latency(BLOCKLEN, s, FRAME_SEC))
+
 # Create an "Audio Clips" menu item
 # audio_clips_menu_item = tk.Menu(menu_bar, tearoff=0)
 # Add "Audio Clips" directly to the menu bar
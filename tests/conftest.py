@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Repository root, so the tests import the working tree (and benchmarks/) without installing anything
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
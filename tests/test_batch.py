@@ -0,0 +1,43 @@
+"""
+Output paths of the batch converter: inputs of the same name must not overwrite each other.
+"""
+import os
+import batch
+
+
+def touch(path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return path
+
+
+def test_directory_inputs_keep_their_relative_path(tmp_path) -> None:
+    root = str(tmp_path / "in")
+    first = touch(os.path.join(root, "a", "x.wav"))
+    second = touch(os.path.join(root, "b", "x.wav"))
+
+    files = dict(batch.find_audio_files([root]))
+    output_dir = str(tmp_path / "out")
+    outputs = {path: batch.output_path_for(relative_path, output_dir) for path, relative_path in files.items()}
+
+    assert outputs == {first: os.path.join(output_dir, "a", "x.wav"), second: os.path.join(output_dir, "b", "x.wav")}
+    assert batch.find_output_conflicts(outputs) == {}
+
+
+def test_files_and_globs_use_their_name(tmp_path) -> None:
+    path = touch(str(tmp_path / "clips" / "y.mp3"))
+
+    assert batch.find_audio_files([path, str(tmp_path / "clips" / "*.mp3")]) == [(path, "y.mp3")]
+
+
+def test_shared_output_fails_before_converting(tmp_path, capsys) -> None:
+    root = str(tmp_path / "in")
+    touch(os.path.join(root, "x.wav"))
+    touch(os.path.join(root, "x.mp3"))
+    output_dir = str(tmp_path / "out")
+
+    status = batch.main(["-e", "Male Voice", "-o", output_dir, "--no-cache", root])
+
+    assert status == 2
+    assert "x.mp3 and" in capsys.readouterr().err
+    assert not os.path.exists(output_dir)
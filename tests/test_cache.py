@@ -0,0 +1,183 @@
+"""
+DecodedAudioCache and RenderCache: only audio held in memory is kept and counted against
+the budget, and render keys follow everything the output depends on.
+"""
+import numpy as np
+
+from voice_morph_wizard import cache, pipeline, registry
+from voice_morph_wizard.filters import Effect
+from voice_morph_wizard.wavfile import AudioInfo, read_wav, write_wav
+
+
+def make_wav(path: str, num_frames: int) -> str:
+    write_wav(path, (np.arange(num_frames) % 1000).astype(np.int16), 1, 16000)
+    return path
+
+
+def fake_decode(path: str):
+    # Stands in for pydub: audio decoded into a plain array in memory
+    samples = np.full(1000, 7, dtype=np.int16)
+    return AudioInfo(1, 16000, 2, len(samples)), samples
+
+
+def test_memory_mapped_wav_is_not_kept(tmp_path) -> None:
+    audio_cache = cache.DecodedAudioCache(max_bytes=10**6)
+    path = make_wav(str(tmp_path / "large.wav"), 10**6)
+
+    info, samples = audio_cache.get(path)
+
+    assert isinstance(samples, np.memmap) and info.frames == 10**6
+    assert audio_cache.stats()["entries"] == 0 and audio_cache.stats()["bytes"] == 0
+    assert audio_cache.peek(path) is None
+
+
+def test_wav_does_not_evict_decoded_audio(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "_decode", fake_decode)
+    audio_cache = cache.DecodedAudioCache(max_bytes=4000)
+    mp3_path = str(tmp_path / "voice.mp3")
+    open(mp3_path, "wb").close()
+    audio_cache.get(mp3_path)
+
+    # A WAV file far larger than the budget is mapped, and the decoded audio stays cached
+    monkeypatch.undo()
+    audio_cache.get(make_wav(str(tmp_path / "large.wav"), 10**5))
+
+    assert audio_cache.stats()["evictions"] == 0
+    assert audio_cache.peek(mp3_path) is not None
+
+
+def test_read_chunks_uses_only_audio_already_in_the_cache(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "_decode", fake_decode)
+    audio_cache = cache.DecodedAudioCache()
+    wav_path = make_wav(str(tmp_path / "voice.wav"), 2500)
+
+    # Not in the cache: the WAV file is streamed through its memory map, and the cache stays empty
+    info, chunks = pipeline.read_chunks(wav_path, 1000, cache=audio_cache)
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert audio_cache.stats()["entries"] == 0
+
+    # Decoded for playback: the chunks come from the cached samples
+    mp3_path = str(tmp_path / "voice.mp3")
+    open(mp3_path, "wb").close()
+    audio_cache.get(mp3_path)
+    info, chunks = pipeline.read_chunks(mp3_path, 600, cache=audio_cache)
+    assert info.frames == 1000
+    assert np.array_equal(np.concatenate(list(chunks)), np.full(1000, 7, dtype=np.int16))
+
+
+def test_probe_reads_the_wav_header(tmp_path) -> None:
+    path = make_wav(str(tmp_path / "voice.wav"), 12345)
+
+    assert pipeline.probe(path) == AudioInfo(1, 16000, 2, 12345)
+
+
+class GainEffect(Effect):
+    """
+    Effect registered for the render key tests.
+    """
+    __slots__ = ("gain",)
+
+    def __init__(self, gain: float = 2.0, sample_rate: int = 16000) -> None:
+        self.gain = gain
+
+
+def renderer(num_frames: int, value: int = 1):
+    # Stands in for convert_file: writes the render and returns its format
+    def render(path: str) -> AudioInfo:
+        write_wav(path, np.full(num_frames, value, dtype=np.int16), 1, 16000)
+        return AudioInfo(1, 16000, 2, num_frames)
+    return render
+
+
+def test_render_key_follows_everything_the_output_depends_on(tmp_path, monkeypatch) -> None:
+    monkeypatch.setitem(registry._factories, "Gain", GainEffect)
+    renders = cache.RenderCache()
+    path = make_wav(str(tmp_path / "voice.wav"), 1000)
+    base = renders.key(path, ["Gain"], internal_rate=None, policy="per_channel", dither=False)
+
+    # Same content under another name: same key
+    copy = str(tmp_path / "copy.wav")
+    with open(path, "rb") as source, open(copy, "wb") as target:
+        target.write(source.read())
+    assert renders.key(copy, ["Gain"], internal_rate=None, policy="per_channel", dither=False) == base
+
+    keys = {
+        renders.key(path, ["Gain"], internal_rate=8000, policy="per_channel", dither=False),
+        renders.key(path, ["Gain"], internal_rate=None, policy="downmix", dither=False),
+        renders.key(path, ["Gain"], internal_rate=None, policy="per_channel", dither=True),
+        renders.key(path, ["Gain", "Gain"], internal_rate=None, policy="per_channel", dither=False),
+    }
+
+    # A new version of the effect, or new defaults
+    with monkeypatch.context() as patch:
+        patch.setattr(GainEffect, "version", 7)
+        keys.add(renders.key(path, ["Gain"], internal_rate=None, policy="per_channel", dither=False))
+    with monkeypatch.context() as patch:
+        patch.setattr(GainEffect.__init__, "__defaults__", (3.0, 16000))
+        keys.add(renders.key(path, ["Gain"], internal_rate=None, policy="per_channel", dither=False))
+
+    assert len(keys) == 6 and base not in keys
+
+
+def test_render_hits_from_memory(tmp_path) -> None:
+    renders = cache.RenderCache()
+    path = make_wav(str(tmp_path / "voice.wav"), 1000)
+    key = renders.key(path, ["Male Voice"])
+
+    assert renders.render(key, str(tmp_path / "first.wav"), renderer(500)) == (AudioInfo(1, 16000, 2, 500), False)
+    info, hit = renders.render(key, str(tmp_path / "second.wav"), renderer(500, value=9))
+
+    assert hit and info.frames == 500
+    assert np.array_equal(read_wav(str(tmp_path / "second.wav"))[1], np.ones(500, dtype=np.int16))
+    assert renders.stats()["hits"] == 1 and renders.stats()["misses"] == 1
+    assert renders.stats()["bytes"] == 1000
+
+
+def test_render_spills_to_disk_and_survives_a_restart(tmp_path) -> None:
+    disk_dir = str(tmp_path / "rendered")
+    renders = cache.RenderCache(max_bytes=10**6, disk_dir=disk_dir)
+    path = make_wav(str(tmp_path / "voice.wav"), 1000)
+    key = renders.key(path, ["Male Voice"])
+    renders.render(key, str(tmp_path / "first.wav"), renderer(500))
+
+    # The mapped render is served from the disk tier, without being held in memory
+    assert renders.render(key, str(tmp_path / "second.wav"), renderer(500, value=9))[1]
+    assert renders.stats()["disk_hits"] == 1 and renders.stats()["entries"] == 0 and renders.stats()["bytes"] == 0
+
+    restarted = cache.RenderCache(disk_dir=disk_dir)
+    assert restarted.render(key, str(tmp_path / "third.wav"), renderer(500, value=9))[1]
+    assert np.array_equal(read_wav(str(tmp_path / "third.wav"))[1], np.ones(500, dtype=np.int16))
+
+
+def test_render_eviction_by_budget(tmp_path) -> None:
+    renders = cache.RenderCache(max_bytes=2500)
+    path = make_wav(str(tmp_path / "voice.wav"), 1000)
+    keys = [renders.key(path, ["Male Voice"], internal_rate=rate) for rate in (8000, 16000, 22050)]
+
+    # 1000 bytes each: the third evicts the least recently used, which is the second
+    renders.render(keys[0], str(tmp_path / "a.wav"), renderer(500))
+    renders.render(keys[1], str(tmp_path / "b.wav"), renderer(500))
+    renders.get(keys[0])
+    renders.render(keys[2], str(tmp_path / "c.wav"), renderer(500))
+
+    assert renders.stats()["evictions"] == 1 and renders.stats()["bytes"] == 2000
+    assert renders.get(keys[1]) is None
+    assert renders.get(keys[0]) is not None and renders.get(keys[2]) is not None
+
+
+def test_mapped_renders_do_not_evict_renders_in_memory(tmp_path, monkeypatch) -> None:
+    renders = cache.RenderCache(max_bytes=1500, disk_dir=str(tmp_path / "rendered"))
+    path = make_wav(str(tmp_path / "voice.wav"), 1000)
+    keys = [renders.key(path, ["Male Voice"], internal_rate=rate) for rate in (8000, 16000, 22050)]
+
+    # The disk tier fails once (a full disk, say), so the first render is kept in memory
+    def fail(*args) -> None:
+        raise OSError("no space left on device")
+    with monkeypatch.context() as patch:
+        patch.setattr(cache.shutil, "copyfile", fail)
+        renders.render(keys[0], str(tmp_path / "a.wav"), renderer(500))
+    renders.render(keys[1], str(tmp_path / "b.wav"), renderer(500))
+    renders.render(keys[2], str(tmp_path / "c.wav"), renderer(500))
+
+    assert renders.stats()["evictions"] == 0 and renders.stats()["bytes"] == 1000
+    assert renders.get(keys[0]) is not None
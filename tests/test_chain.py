@@ -0,0 +1,98 @@
+"""
+Multi-channel Chain processing: per-channel instances, downmixing, and mono-to-stereo stages.
+"""
+from typing import Callable, List
+import numpy as np
+import pytest
+
+from voice_morph_wizard.chain import DOWNMIX, PER_CHANNEL, Chain
+from voice_morph_wizard.filters import (AlternateChannelsEffect, EchoEffect, Effect, FlangerEffect, PingPongEffect,
+                                        RobotizeEffect)
+
+BLOCK_SIZES = [1000, 1, 333, 4096, 2570]
+
+
+def process_blocks(chain: Chain, input_array: np.ndarray) -> np.ndarray:
+    # Blocks of uneven sizes, copied because the output may share memory with the chain
+    blocks = []
+    start = 0
+    for num_frames in BLOCK_SIZES:
+        stop = start + num_frames * chain.channels
+        blocks.append(chain.process(input_array[start:stop]).copy())
+        start = stop
+    return np.concatenate(blocks)
+
+
+def stereo_noise(channels: int = 2) -> np.ndarray:
+    # Different audio in every channel, interleaved
+    num_samples = sum(BLOCK_SIZES) * channels
+    return (np.random.default_rng(channels).standard_normal(num_samples) * 4000).astype(np.int16)
+
+
+def effects() -> List[Effect]:
+    return [EchoEffect(delay_sec=0.01, taps=[(0.02, 0.4)]), FlangerEffect(), RobotizeEffect()]
+
+
+@pytest.mark.parametrize("channels", [2, 3])
+def test_per_channel_equals_mono_processing_of_every_channel(channels: int) -> None:
+    input_array = stereo_noise(channels)
+    chain = Chain(effects(), channels=channels, policy=PER_CHANNEL)
+
+    output = process_blocks(chain, input_array).reshape(-1, channels)
+
+    assert chain.output_channels == channels
+    for channel in range(channels):
+        mono = process_blocks(Chain(effects()), np.ascontiguousarray(input_array[channel::channels]))
+        np.testing.assert_array_equal(output[:, channel], mono)
+
+
+def test_downmix_averages_before_the_first_stage() -> None:
+    input_array = stereo_noise()
+    mean = input_array.reshape(-1, 2).astype(np.float32).mean(axis=1)
+
+    downmixed = process_blocks(Chain(effects(), channels=2, policy=DOWNMIX), input_array)
+    expected = process_blocks(Chain(effects()), mean)
+    np.testing.assert_array_equal(downmixed, expected)
+
+    # Asked for stereo, the mono result is copied to both channels
+    stereo = process_blocks(Chain(effects(), channels=2, output_channels=2, policy=DOWNMIX), input_array)
+    np.testing.assert_array_equal(stereo.reshape(-1, 2), np.repeat(expected.reshape(-1, 1), 2, axis=1))
+
+
+def mono_to_stereo(effect_type: Callable[[], Effect], input_array: np.ndarray) -> np.ndarray:
+    effect = effect_type()
+    return np.concatenate([effect.process(block.copy()).copy() for block in
+                           np.split(input_array, np.cumsum(BLOCK_SIZES)[:-1])])
+
+
+@pytest.mark.parametrize("effect_type", [lambda: PingPongEffect(0.05), lambda: AlternateChannelsEffect(0.02)])
+@pytest.mark.parametrize("policy", [PER_CHANNEL, DOWNMIX])
+def test_mono_to_stereo_stages_are_reinterleaved(effect_type: Callable[[], Effect], policy: str) -> None:
+    input_array = stereo_noise()
+    mean = input_array.reshape(-1, 2).astype(np.float32).mean(axis=1)
+    expected = mono_to_stereo(effect_type, mean)
+
+    # Stereo input is mixed down once for the mono-only stage, whatever the policy
+    chain = Chain([effect_type()], channels=2, policy=policy)
+    assert chain.output_channels == 2
+    np.testing.assert_array_equal(process_blocks(chain, input_array).reshape(-1, 2), expected)
+
+    # Mono input, and fewer or more output channels than the stage produces
+    mono = process_blocks(Chain([effect_type()], output_channels=1), mean)
+    np.testing.assert_allclose(mono, expected.mean(axis=1), rtol=1e-6)
+    surround = process_blocks(Chain([effect_type()], channels=2, output_channels=4, policy=policy), input_array)
+    np.testing.assert_array_equal(surround.reshape(-1, 4), np.tile(expected, 2))
+
+
+def test_stages_after_a_stereo_stage_run_per_channel() -> None:
+    input_array = stereo_noise()[::2].copy()
+    stereo = mono_to_stereo(lambda: PingPongEffect(0.05), input_array.astype(np.float32))
+
+    chain = Chain([PingPongEffect(0.05), EchoEffect(delay_sec=0.01)])
+    output = process_blocks(chain, input_array).reshape(-1, 2)
+
+    # The echo after the ping pong gets an instance per channel
+    assert [len(instances) for instances in chain.stages] == [1, 2]
+    for channel in range(2):
+        expected = process_blocks(Chain([EchoEffect(delay_sec=0.01)]), stereo[:, channel].copy())
+        np.testing.assert_array_equal(output[:, channel], expected)
@@ -0,0 +1,87 @@
+"""
+ConvolutionReverbEffect: partitioned convolution against scipy.signal.fftconvolve.
+"""
+import numpy as np
+import pytest
+from scipy import signal
+
+from voice_morph_wizard.filters import ConvolutionReverbEffect, Filters
+from voice_morph_wizard.wavfile import write_wav
+
+RATE = 16000
+
+# Largest difference allowed, in int16 steps (the complex64 spectra stay below 0.001 for a +-10000 input)
+TOLERANCE = 0.002
+
+
+@pytest.fixture(scope="module")
+def noise() -> np.ndarray:
+    return np.random.default_rng(0).uniform(-10000, 10000, 2 * RATE).astype(np.float32)
+
+
+def process_mixed_blocks(effect: ConvolutionReverbEffect, input_array: np.ndarray, seed: int) -> np.ndarray:
+    # Blocks shorter, as long as and longer than a partition
+    rng = np.random.default_rng(seed)
+    blocks = []
+    start = 0
+    while start < len(input_array):
+        size = int(rng.choice([0, 1, 7, 100, effect.partition_size, 1000, 3000]))
+        blocks.append(effect.process(input_array[start:start + size].copy()).copy())
+        start += size
+    return np.concatenate(blocks)
+
+
+def reverb_reference(input_array: np.ndarray, impulse_response: np.ndarray, mix: float) -> np.ndarray:
+    impulse_response = impulse_response / np.sqrt(np.sum(impulse_response ** 2))
+    wet = signal.fftconvolve(input_array.astype(np.float64), impulse_response)[:len(input_array)]
+    return (1 - mix) * input_array + mix * wet
+
+
+def assert_delayed(output: np.ndarray, expected: np.ndarray, latency: int) -> None:
+    np.testing.assert_array_equal(output[:latency], 0)
+    np.testing.assert_allclose(output[latency:], expected[:-latency], rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("partition_size", [64, 128, 512])
+def test_matches_fftconvolve(noise: np.ndarray, partition_size: int) -> None:
+    effect = ConvolutionReverbEffect(decay_sec=0.5, mix=0.3, partition_size=partition_size)
+
+    output = process_mixed_blocks(effect, noise, partition_size)
+
+    # The same noise the effect generates: decaying by 60 dB over decay_sec
+    t = np.arange(round(0.5 * RATE)) / RATE
+    impulse_response = np.random.default_rng(0).standard_normal(len(t)) * np.exp(-6.91 * t / 0.5)
+    assert effect.latency == partition_size - 1
+    assert_delayed(output, reverb_reference(noise, impulse_response, 0.3), partition_size - 1)
+
+
+def test_wav_impulse_response_is_resampled_and_mixed_to_mono(noise: np.ndarray, tmp_path) -> None:
+    # A stereo impulse response at 8 kHz, with different channels
+    rng = np.random.default_rng(4)
+    decay = np.exp(-np.arange(2000) / 400)
+    stereo = np.stack((rng.standard_normal(2000) * decay, rng.standard_normal(2000) * decay), axis=1) * 8000
+    stereo = np.rint(stereo).astype(np.int16)
+    ir_path = str(tmp_path / "hall.wav")
+    write_wav(ir_path, stereo.reshape(-1), 2, 8000)
+
+    effect = ConvolutionReverbEffect(ir_path, mix=0.5, partition_size=256, sample_rate=RATE)
+    output = process_mixed_blocks(effect, noise, 1)
+
+    impulse_response = signal.resample_poly(stereo.mean(axis=1) / 32768, 2, 1)
+    assert_delayed(output, reverb_reference(noise, impulse_response, 0.5), 255)
+
+
+def test_filters_wrapper_lines_the_output_up(noise: np.ndarray) -> None:
+    output = Filters.convolution_reverb(noise, sr=RATE, mix=0.3)
+
+    t = np.arange(round(1.5 * RATE)) / RATE
+    impulse_response = np.random.default_rng(0).standard_normal(len(t)) * np.exp(-6.91 * t / 1.5)
+    np.testing.assert_allclose(output, reverb_reference(noise, impulse_response, 0.3), rtol=0, atol=TOLERANCE)
+
+
+def test_reset_restarts_the_stream(noise: np.ndarray) -> None:
+    effect = ConvolutionReverbEffect(decay_sec=0.2, partition_size=128)
+    first = process_mixed_blocks(effect, noise[:8000], 2)
+    effect.reset()
+
+    np.testing.assert_allclose(process_mixed_blocks(effect, noise[:8000], 3), first, rtol=0, atol=TOLERANCE)
@@ -0,0 +1,158 @@
+"""
+DelayLine: fractional reads against analytically delayed sines, the delay range, and
+the block-size independence of the effects built on it.
+"""
+from typing import List, Sequence, Tuple
+import numpy as np
+import pytest
+from scipy import signal
+
+from voice_morph_wizard.filters import (RATE, DelayLine, DrunkEffect, EchoEffect, Effect, FlangerEffect, MutationEffect,
+                                        PingPongEffect)
+
+FREQUENCY = 200
+
+# Samples skipped before comparing: the line starts silent, and the allpass filter needs to settle
+SETTLE = 200
+
+# Largest error against the delayed sine of amplitude 1 (linear interpolation is the least flat)
+TOLERANCES = {"linear": 2e-3, "cubic": 2e-4, "allpass": 1e-3}
+
+
+def sine(positions: np.ndarray) -> np.ndarray:
+    return np.sin(2 * np.pi * FREQUENCY * positions / RATE)
+
+
+def read_blocks(line: DelayLine, input_array: np.ndarray, delays: np.ndarray, block_size: int) -> np.ndarray:
+    output = np.zeros(len(input_array), dtype=np.float32)
+    for start in range(0, len(input_array), block_size):
+        line.write(input_array[start:start + block_size])
+        line.read(delays[start:start + block_size], output[start:start + block_size])
+    return output
+
+
+@pytest.mark.parametrize("interpolation", DelayLine.INTERPOLATIONS)
+@pytest.mark.parametrize("delay", [2.0, 2.25, 10.5, 100.75, 511.9])
+def test_constant_fractional_delay(interpolation: str, delay: float) -> None:
+    n = np.arange(4096)
+    line = DelayLine(512, interpolation)
+
+    output = read_blocks(line, sine(n).astype(np.float32), np.full(len(n), delay), 256)
+
+    settle = SETTLE + int(delay)
+    np.testing.assert_allclose(output[settle:], sine(n - delay)[settle:], rtol=0, atol=TOLERANCES[interpolation])
+
+
+@pytest.mark.parametrize("interpolation", ["linear", "cubic"])
+def test_modulated_delay(interpolation: str) -> None:
+    # A sweep like the flanger's, within one block and across block boundaries
+    n = np.arange(4096)
+    delays = 50 + 40 * np.sin(2 * np.pi * 3 * n / RATE)
+    line = DelayLine(100, interpolation)
+
+    output = read_blocks(line, sine(n).astype(np.float32), delays, 300)
+
+    np.testing.assert_allclose(output[SETTLE:], sine(n - delays)[SETTLE:], rtol=0, atol=TOLERANCES[interpolation])
+
+
+def test_linear_delay_shorter_than_a_sample() -> None:
+    # Between the sample just written and the one before it
+    n = np.arange(1024)
+    line = DelayLine(16, "linear")
+
+    output = read_blocks(line, sine(n).astype(np.float32), np.full(len(n), 0.5), 128)
+
+    np.testing.assert_allclose(output[1:], sine(n - 0.5)[1:], rtol=0, atol=TOLERANCES["linear"])
+
+
+@pytest.mark.parametrize("interpolation, delay", [("linear", -0.5), ("cubic", 1.5), ("allpass", 1.0),
+                                                  ("linear", 64.5), ("cubic", 65.0)])
+def test_delay_out_of_range(interpolation: str, delay: float) -> None:
+    line = DelayLine(64, interpolation)
+    line.write(np.ones(8, dtype=np.float32))
+    delays = np.full(8, 10.0)
+    delays[3] = delay
+
+    with pytest.raises(ValueError):
+        line.read(delays, np.zeros(8, dtype=np.float32))
+
+
+def test_flanger_depth_must_be_smaller_than_the_delay() -> None:
+    with pytest.raises(ValueError):
+        FlangerEffect(delay=0.01, depth=0.01)
+    with pytest.raises(ValueError):
+        FlangerEffect(delay=0.001, depth=-0.002)
+    FlangerEffect(delay=0.01, depth=0.009)
+
+
+def test_mutation_swing_must_fit_the_buffer() -> None:
+    with pytest.raises(ValueError):
+        MutationEffect(f0=7, depth=2)
+    MutationEffect(f0=7, depth=0.2)
+
+
+def process_blocks(effect: Effect, input_array: np.ndarray, block_sizes: List[int]) -> np.ndarray:
+    blocks = []
+    start = 0
+    for size in block_sizes:
+        # The effect may overwrite its block and reuse its output array, so both are copies
+        blocks.append(effect.process(input_array[start:start + size].copy()).copy())
+        start += size
+    return np.concatenate(blocks)
+
+
+@pytest.mark.parametrize("create", [
+    lambda: FlangerEffect(),
+    lambda: FlangerEffect(interpolation="linear"),
+    lambda: MutationEffect(),
+    lambda: MutationEffect(interpolation="cubic"),
+    lambda: EchoEffect(),
+    lambda: EchoEffect(taps=[(0.01, 0.5), (0.03, 0.4), (0.05, 0.3)]),
+    lambda: EchoEffect(taps=[(1 / RATE, 0.5), (40 / RATE, -0.3)]),
+    lambda: PingPongEffect(delay_sec=0.1),
+    lambda: DrunkEffect(),
+], ids=["flanger", "flanger-linear", "mutation", "mutation-cubic", "echo", "echo-taps", "echo-short", "ping-pong",
+        "drunk"])
+def test_block_size_independence(create) -> None:
+    num_samples = RATE // 2
+    input_array = np.random.default_rng(1).uniform(-10000, 10000, num_samples).astype(np.float32)
+    whole = process_blocks(create(), input_array, [num_samples])
+
+    rng = np.random.default_rng(2)
+    for block_sizes in ([1] * 3000 + [num_samples - 3000],
+                        [128] * (num_samples // 128) + [num_samples % 128],
+                        list(np.diff([0, *np.sort(rng.integers(0, num_samples, 40)), num_samples]))):
+        np.testing.assert_allclose(process_blocks(create(), input_array, block_sizes), whole, rtol=0, atol=0.05)
+
+
+@pytest.mark.parametrize("taps", [
+    [(1024, 0.7)],
+    [(160, 0.5), (480, -0.4), (800, 0.3)],
+    [(1, 0.7)],
+    [(3, 0.4), (64, -0.5)],
+    [(64, 0.5), (65, 0.3)],
+], ids=["default", "taps", "one-sample", "short", "threshold"])
+def test_echo_matches_lfilter(taps: Sequence[Tuple[int, float]]) -> None:
+    # Runs of the shortest delay above SHORT_DELAY samples, lfilter itself up to it
+    input_array = np.random.default_rng(3).uniform(-10000, 10000, RATE // 2).astype(np.float32)
+    effect = EchoEffect(taps=[(delay / RATE, decay) for delay, decay in taps])
+    assert (effect.line is None) == (max(delay for delay, _ in taps) <= EchoEffect.SHORT_DELAY)
+
+    block_sizes = list(np.diff([0, *np.sort(np.random.default_rng(4).integers(0, RATE // 2, 60)), RATE // 2]))
+    output = process_blocks(effect, input_array, block_sizes)
+
+    # H = sum(z^-D) / (1 - sum(decay * z^-D))
+    b = np.zeros(max(delay for delay, _ in taps) + 1)
+    a = np.zeros_like(b)
+    a[0] = 1
+    for delay, decay in taps:
+        b[delay] += 1
+        a[delay] -= decay
+    np.testing.assert_allclose(output, signal.lfilter(b, a, input_array.astype(np.float64)), rtol=0, atol=0.01)
+
+
+def test_echo_rejects_short_taps_among_long_ones() -> None:
+    # Runs of 16 samples would iterate in Python every 16 samples, and lfilter would need 1024 samples of state
+    with pytest.raises(ValueError):
+        EchoEffect(taps=[(16 / RATE, 0.3), (1024 / RATE, 0.3)])
+    EchoEffect(taps=[(64 / RATE, 0.3), (1024 / RATE, 0.3)])
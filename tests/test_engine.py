@@ -0,0 +1,140 @@
+"""
+RingBuffer and CallbackEngine: wrap-around, full and empty rings, underruns and re-blocking.
+
+The engine runs against a fake PyAudio module whose stream never calls back on its
+own: the tests call the engine's callback themselves, as PortAudio would, and wait
+for the worker thread to fill the output ring in between.
+"""
+import sys
+import time
+import types
+from typing import List
+import numpy as np
+import pytest
+
+from voice_morph_wizard.engine import CallbackEngine, RingBuffer
+
+
+class FakeStream:
+    def __init__(self, **kwargs) -> None:
+        self.kwargs = kwargs
+
+    def start_stream(self) -> None:
+        pass
+
+    def stop_stream(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_input_latency(self) -> float:
+        return 0.0
+
+    def get_output_latency(self) -> float:
+        return 0.0
+
+
+class FakePyAudio:
+    def open(self, **kwargs) -> FakeStream:
+        return FakeStream(**kwargs)
+
+
+@pytest.fixture
+def fake_pyaudio(monkeypatch) -> FakePyAudio:
+    module = types.ModuleType("pyaudio")
+    module.paInt16 = 8
+    module.paContinue = 0
+    module.paInputOverflow = 2
+    module.paOutputUnderflow = 4
+    monkeypatch.setitem(sys.modules, "pyaudio", module)
+    return FakePyAudio()
+
+
+def test_ring_wraps_around() -> None:
+    ring = RingBuffer(8)
+    out = np.zeros(6, dtype=np.int16)
+
+    # Every block but the first crosses the end of the buffer
+    for start in range(0, 60, 6):
+        samples = np.arange(start, start + 6, dtype=np.int16)
+        assert ring.write(samples)
+        assert ring.available() == 6 and ring.space() == 2
+        assert ring.read_into(out)
+        assert np.array_equal(out, samples)
+        assert ring.available() == 0
+
+
+def test_full_ring_refuses_and_empty_ring_leaves_out_untouched() -> None:
+    ring = RingBuffer(8)
+    assert ring.write(np.arange(6, dtype=np.int16))
+
+    # Not enough space: nothing is written
+    assert not ring.write(np.arange(3, dtype=np.int16))
+    assert ring.available() == 6
+
+    # Not enough samples: nothing is read
+    out = np.full(7, -1, dtype=np.int16)
+    assert not ring.read_into(out)
+    assert np.all(out == -1) and ring.available() == 6
+
+    # Float samples are converted in the copy
+    ring.read_into(out[:6])
+    assert ring.write(np.array([1.0, 2.0]))
+    assert ring.read_into(out[:2]) and list(out[:2]) == [1, 2]
+
+
+def test_overrun_drops_the_block(fake_pyaudio: FakePyAudio) -> None:
+    engine = CallbackEngine(fake_pyaudio, lambda block: block, rate=16000, channels=1, frames_per_buffer=4,
+                            ring_buffers=2)
+    data = np.arange(4, dtype=np.int16).tobytes()
+
+    # Without a worker nothing drains the input ring, which holds two buffers
+    for _ in range(3):
+        engine._callback(data, 4, {}, 0)
+
+    assert engine.overruns == 1
+    assert engine.input_ring.available() == 8
+
+
+def test_empty_output_ring_plays_silence(fake_pyaudio: FakePyAudio) -> None:
+    engine = CallbackEngine(fake_pyaudio, lambda block: block, rate=16000, channels=2, frames_per_buffer=4)
+    engine.callback_block[:] = 123
+
+    out, flag = engine._callback(np.ones(8, dtype=np.int16).tobytes(), 4, {}, 2)
+
+    assert flag == 0
+    assert np.all(out == 0) and len(out) == 8
+    assert engine.underruns == 1 and engine.input_overflows == 1
+    assert engine.played_frames == 0
+
+
+@pytest.mark.parametrize("frames_per_buffer, block_size", [(128, 200), (200, 128), (64, 64)])
+def test_reblocks_between_buffers_and_blocks(fake_pyaudio: FakePyAudio, frames_per_buffer: int,
+                                             block_size: int) -> None:
+    channels = 2
+    engine = CallbackEngine(fake_pyaudio, lambda block: block.astype(np.float32), rate=16000, channels=channels,
+                            frames_per_buffer=frames_per_buffer, block_size=block_size)
+    input_array = (np.arange(40 * frames_per_buffer * channels) % 30000).astype(np.int16)
+    buffer_samples = frames_per_buffer * channels
+    played: List[np.ndarray] = []
+
+    engine.start()
+    try:
+        for start in range(0, len(input_array), buffer_samples):
+            out, _ = engine._callback(input_array[start:start + buffer_samples].tobytes(), frames_per_buffer, {}, 0)
+            played.append(out.copy())
+
+            # Let the worker write every complete block to the output ring before the next callback
+            written = (engine.prime_frames + (start + buffer_samples) // (block_size * channels) * block_size) * channels
+            deadline = time.monotonic() + 5
+            while engine.output_ring.write_index < written and time.monotonic() < deadline:
+                time.sleep(0.001)
+    finally:
+        engine.stop()
+
+    # The priming silence, then the input unchanged, and never an underrun
+    output = np.concatenate(played)
+    expected = np.concatenate((np.zeros(engine.prime_frames * channels, dtype=np.int16), input_array))[:len(output)]
+    assert engine.underruns == 0 and engine.overruns == 0
+    assert np.array_equal(output, expected)
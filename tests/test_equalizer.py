@@ -0,0 +1,95 @@
+"""
+EqualizerEffect and its presets: block-size independence, shelf gains and band edges.
+"""
+from typing import List
+import numpy as np
+import pytest
+from scipy import signal
+
+from voice_morph_wizard.filters import (EqualizerEffect, HighShelfEffect, LowShelfEffect, MegaphoneEffect, RadioEffect,
+                                        TelephoneEffect, _sos_sections)
+
+PRESETS = [TelephoneEffect, RadioEffect, MegaphoneEffect, LowShelfEffect, HighShelfEffect]
+
+
+def response_db(sos: np.ndarray, frequencies: List[float], sample_rate: int) -> np.ndarray:
+    _, response = signal.sosfreqz(sos, worN=frequencies, fs=sample_rate)
+    return 20 * np.log10(np.abs(response))
+
+
+def process_blocks(effect: EqualizerEffect, input_array: np.ndarray, block_sizes: List[int]) -> np.ndarray:
+    blocks = []
+    start = 0
+    for size in block_sizes:
+        blocks.append(effect.process(input_array[start:start + size].copy()).copy())
+        start += size
+    return np.concatenate(blocks)
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 16000, 44100])
+@pytest.mark.parametrize("preset", PRESETS)
+def test_block_size_independence(preset, sample_rate: int) -> None:
+    input_array = np.random.default_rng(0).uniform(-20000, 20000, sample_rate).astype(np.float32)
+    whole = process_blocks(preset(sample_rate=sample_rate), input_array, [len(input_array)])
+
+    cuts = np.sort(np.random.default_rng(1).integers(0, len(input_array), 50))
+    for block_sizes in ([1] * 500 + [len(input_array) - 500], list(np.diff([0, *cuts, len(input_array)]))):
+        np.testing.assert_allclose(process_blocks(preset(sample_rate=sample_rate), input_array, block_sizes), whole,
+                                   rtol=0, atol=0.05)
+
+    effect = preset(sample_rate=sample_rate)
+    process_blocks(effect, input_array, [1000])
+    effect.reset()
+    np.testing.assert_allclose(process_blocks(effect, input_array, [len(input_array)]), whole, rtol=0, atol=0.05)
+
+
+@pytest.mark.parametrize("gain_db", [6.0, -9.0])
+def test_shelf_gain(gain_db: float) -> None:
+    # Far below and above the corner the shelves reach gain_db and 0 dB
+    low = response_db(LowShelfEffect(250, gain_db).sos, [5, 7500], 16000)
+    high = response_db(HighShelfEffect(3000, gain_db).sos, [5, 7990], 16000)
+
+    np.testing.assert_allclose(low, [gain_db, 0], atol=0.05)
+    np.testing.assert_allclose(high, [0, gain_db], atol=0.05)
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 16000, 48000])
+@pytest.mark.parametrize("preset", [TelephoneEffect, RadioEffect, MegaphoneEffect])
+def test_preset_band_edges(preset, sample_rate: int) -> None:
+    effect = preset(sample_rate=sample_rate)
+
+    # Every Butterworth section of the preset is 3 dB down at its (clamped) edges
+    highest = 0.45 * sample_rate
+    for section in effect.sections:
+        kind, *arguments = section
+        if kind in ("highpass", "lowpass"):
+            edges = [arguments[0]]
+        elif kind == "bandpass":
+            edges = arguments[:2]
+        else:
+            continue
+        edges = [min(edge, highest) for edge in edges]
+        np.testing.assert_allclose(response_db(_sos_sections((section,), sample_rate), edges, sample_rate), -3.01,
+                                   atol=0.05)
+
+    # Every section is stable
+    assert all(np.all(np.abs(np.roots(row[3:])) < 1) for row in effect.sos)
+
+
+def test_presets_clamp_band_edges_at_8_khz() -> None:
+    # The radio's 4.5 kHz low-pass lies above 8 kHz audio's Nyquist frequency and is lowered to 3.6 kHz
+    sos = _sos_sections((("lowpass", 4500, 4),), 8000)
+
+    assert np.array_equal(sos, _sos_sections((("lowpass", 3600, 4),), 8000))
+    tone = np.sin(2 * np.pi * 1000 * np.arange(8000) / 8000).astype(np.float32) * 10000
+    output = RadioEffect(sample_rate=8000).process(tone.copy())
+    assert np.all(np.isfinite(output)) and np.max(np.abs(output)) < 20000
+
+
+def test_soft_clipper_stays_below_the_ceiling() -> None:
+    loud = np.full(1000, 30000, dtype=np.float32)
+    output = EqualizerEffect(gain=4.0, ceiling=12000).process(loud)
+
+    # tanh of a 10x overdrive rounds to 1 in float32, so the ceiling is reached but never passed
+    assert np.max(np.abs(output)) <= 12000
+    np.testing.assert_allclose(output[-1], 12000 * np.tanh(4.0 * 30000 / 12000), rtol=1e-5)
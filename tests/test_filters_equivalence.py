@@ -0,0 +1,271 @@
+"""
+Equivalence of the vectorized effects with the scalar loops they replaced.
+
+Every reference below is the per-sample Python loop the effect used to be,
+with its module globals turned into local state. Where a later change altered
+the output on purpose, the loop follows that change, noted in its docstring:
+samples stay float instead of being truncated to int, and phases and periods
+continue across blocks instead of restarting with every block. The references
+run over the whole signal at once, the effects over random block sizes
+(including empty and single-sample blocks), so the carried state is exercised
+at every kind of block boundary.
+"""
+import math
+from typing import Callable, Dict, List
+import numpy as np
+import pytest
+
+from voice_morph_wizard.filters import (RATE, AlienEffect, AlternateChannelsEffect, DrunkEffect, EchoEffect, Effect,
+                                        Filters, FlangerEffect, MutationEffect, PingPongEffect, PitchShifter,
+                                        RobotizeEffect)
+
+AMPLITUDES = [3000, 32000]
+
+# Samples processed per test, more than the longest delay (the ping-pong period of RATE samples)
+NUM_SAMPLES = 2 * RATE + 3000
+
+# Largest difference allowed, in int16 steps: float32 rounding, far below what quantizing to int16 changes
+TOLERANCE = 0.05
+
+
+def alien_reference(input_array: np.ndarray) -> np.ndarray:
+    """
+    Ring modulation by a 700 Hz cosine, the phase advanced before every sample.
+    """
+    theta = 0.0
+    modulation_angular_frequency = 2 * math.pi * 700 / (RATE * 2)
+    output = np.zeros(len(input_array))
+    for n in range(len(input_array)):
+        theta += modulation_angular_frequency
+        output[n] = input_array[n] * math.cos(theta)
+        while theta > math.pi:
+            theta -= 2 * math.pi
+    return output
+
+
+def echo_reference(input_array: np.ndarray, delay_samples: int = 1024, decay_factor: float = 0.7) -> np.ndarray:
+    """
+    Delayed input plus the decayed output one delay earlier. The delayed input comes from
+    a ring buffer of its own (it used to be zero-padded within every block).
+    """
+    input_buffer = np.zeros(delay_samples)
+    echo_buffer = np.zeros(delay_samples)
+    pointer = 0
+    output = np.zeros(len(input_array))
+    for i, x in enumerate(input_array):
+        output[i] = input_buffer[pointer] + echo_buffer[pointer] * decay_factor
+        input_buffer[pointer] = x
+        echo_buffer[pointer] = output[i]
+        pointer = (pointer + 1) % delay_samples
+    return output
+
+
+def robotize_reference(input_array: np.ndarray, mod_freq: int = 100, pitch_shift_steps: int = -2) -> np.ndarray:
+    """
+    Amplitude modulation by a raised cosine over the sample index of the stream, then the
+    pitch shift (the phase vocoder that replaced np.interp) run over the whole signal at once.
+    """
+    output = np.zeros(len(input_array))
+    for n, x in enumerate(input_array):
+        output[n] = x * (1 + math.cos(2 * math.pi * mod_freq * n / RATE)) / 2
+    return PitchShifter(pitch_shift_steps, RATE).process(output.astype(np.float32)).astype(np.float64)
+
+
+def ping_pong_reference(input_array: np.ndarray) -> np.ndarray:
+    """
+    Direct and one-period delayed audio on alternate channels, by position in the stream.
+    """
+    N = RATE
+    buffer = np.zeros(N)
+    pointer = 0
+    output = np.zeros((len(input_array), 2))
+    for i, x in enumerate(input_array):
+        delayed_sample = buffer[pointer]
+        buffer[pointer] = x
+        pointer = (pointer + 1) % N
+        if i % N < N // 2:
+            output[i, 0] = x
+            output[i, 1] = delayed_sample
+        else:
+            output[i, 0] = delayed_sample
+            output[i, 1] = x
+    return output
+
+
+def alternate_channels_reference(input_array: np.ndarray, samples_per_alternation: int = 1024) -> np.ndarray:
+    """
+    The input on the left channel for one period, then on the right channel for the next,
+    by position in the stream.
+    """
+    output = np.zeros((len(input_array), 2))
+    for i, x in enumerate(input_array):
+        if (i // samples_per_alternation) % 2 == 0:
+            output[i, 0] = x
+            output[i, 1] = 0
+        else:
+            output[i, 0] = 0
+            output[i, 1] = x
+    return output
+
+
+def mutation_reference(input_array: np.ndarray, f0: float = 7, depth: float = 0.2) -> np.ndarray:
+    """
+    Vibrato: a read pointer running 1 + modulation samples per sample, half the buffer behind the write pointer.
+    """
+    buffer = np.zeros(1024)
+    buffer_len = len(buffer)
+    kr, kw = 0.0, 512
+    output = np.zeros(len(input_array))
+    for n, x in enumerate(input_array):
+        buffer[kw] = x
+        kr_int = int(np.floor(kr))
+        frac = kr - kr_int
+        output[n] = (1 - frac) * buffer[kr_int] + frac * buffer[(kr_int + 1) % buffer_len]
+        kr = (kr + 1 + depth * math.sin(2 * math.pi * f0 * n / RATE)) % buffer_len
+        kw = (kw + 1) % buffer_len
+    return output
+
+
+def drunk_reference(input_array: np.ndarray, delay_sec: float = 0.2) -> np.ndarray:
+    """
+    The input times cos(i) + sin(i), plus the input delay_sec earlier. i is the sample index
+    in the stream (it used to restart with every block).
+    """
+    buffer_len = int(delay_sec * RATE)
+    buffer = [0.0] * buffer_len
+    k = 0
+    output = np.zeros(len(input_array))
+    for i, x_i in enumerate(input_array):
+        output[i] = x_i * math.cos(i) + x_i * math.sin(i) + buffer[k]
+        buffer[k] = x_i
+        k = (k + 1) % buffer_len
+    return output
+
+
+def flanger_reference(input_array: np.ndarray, delay: float = 0.03, depth: float = 0.02, rate: float = 0.55) -> np.ndarray:
+    """
+    Input plus the input delayed by the swept delay. The delay is fractional and read
+    with a Catmull-Rom spline (it used to be truncated to whole samples).
+    """
+    output = np.zeros(len(input_array))
+
+    def sample(index: int) -> float:
+        return float(input_array[index]) if index >= 0 else 0.0
+
+    for i in range(len(input_array)):
+        position = i - (delay * RATE + depth * RATE * math.sin(2 * math.pi * rate * i / RATE))
+        base = math.floor(position)
+        t = position - base
+        p0, p1, p2, p3 = (sample(base + offset) for offset in (-1, 0, 1, 2))
+        delayed = p1 + 0.5 * t * (p2 - p0 + t * (2 * p0 - 5 * p1 + 4 * p2 - p3 + t * (3 * (p1 - p2) + p3 - p0)))
+        output[i] = input_array[i] + delayed
+    return output
+
+
+REFERENCES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "alien": alien_reference,
+    "echo": echo_reference,
+    "robotize": robotize_reference,
+    "ping_pong": ping_pong_reference,
+    "alternate_channels": alternate_channels_reference,
+    "mutation": mutation_reference,
+    "drunk": drunk_reference,
+    "flanger": flanger_reference,
+}
+
+EFFECTS: Dict[str, Callable[[], Effect]] = {
+    "alien": AlienEffect,
+    "echo": EchoEffect,
+    "robotize": RobotizeEffect,
+    "ping_pong": PingPongEffect,
+    "alternate_channels": AlternateChannelsEffect,
+    "mutation": MutationEffect,
+    "drunk": DrunkEffect,
+    "flanger": FlangerEffect,
+}
+
+
+def random_block_sizes(rng: np.random.Generator, total: int) -> List[int]:
+    # Mostly realtime-sized blocks, with empty, single-sample and odd-sized ones mixed in
+    sizes = []
+    while sum(sizes) < total:
+        sizes.append(int(rng.choice([0, 1, 2, 7, 64, 127, 1024, 2048, int(rng.integers(1, 5000))])))
+    sizes[-1] -= sum(sizes) - total
+    return sizes
+
+
+def process_blocks(effect: Effect, input_array: np.ndarray, block_sizes: List[int]) -> np.ndarray:
+    blocks = []
+    start = 0
+    for size in block_sizes:
+        # The effect may overwrite its block and reuse its output array, so both are copies
+        blocks.append(np.array(effect.process(input_array[start:start + size].copy()), dtype=np.float64))
+        start += size
+    return np.concatenate(blocks)
+
+
+# The Filters functions that run the same effects over a whole signal
+WRAPPERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "alien": Filters.alien_effect,
+    "echo": Filters.echo_effect,
+    "ping_pong": Filters.ping_pong_effect,
+    "alternate_channels": Filters.alternate_channels,
+    "mutation": Filters.mutation_effect,
+    "drunk": Filters.drunk,
+    "flanger": Filters.flanger_effect,
+}
+
+
+@pytest.fixture(scope="module", params=AMPLITUDES)
+def signal(request) -> np.ndarray:
+    return np.random.default_rng(request.param).uniform(-request.param, request.param, NUM_SAMPLES).astype(np.float32)
+
+
+@pytest.mark.parametrize("name", list(EFFECTS))
+def test_matches_scalar_reference(name: str, signal: np.ndarray) -> None:
+    expected = REFERENCES[name](signal.astype(np.float64))
+    block_sizes = random_block_sizes(np.random.default_rng(len(name)), len(signal))
+    actual = process_blocks(EFFECTS[name](), signal, block_sizes)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("name", list(WRAPPERS))
+def test_filters_match_scalar_reference(name: str, signal: np.ndarray) -> None:
+    expected = REFERENCES[name](signal.astype(np.float64))
+
+    np.testing.assert_allclose(WRAPPERS[name](signal), expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("name", list(EFFECTS))
+def test_reset_restarts_the_stream(name: str, signal: np.ndarray) -> None:
+    effect = EFFECTS[name]()
+    first = process_blocks(effect, signal[:5000], [3000, 2000])
+    effect.process(signal[5000:9000].copy())
+    effect.reset()
+    again = process_blocks(effect, signal[:5000], [5000])
+
+    np.testing.assert_allclose(again, first, rtol=0, atol=TOLERANCE)
+
+
+def test_carried_state_matches(signal: np.ndarray) -> None:
+    block_sizes = random_block_sizes(np.random.default_rng(1), len(signal))
+    num_samples = len(signal)
+
+    # Alien: the reference advances 2 * pi * 350 / RATE radians per sample before using it
+    alien = AlienEffect()
+    process_blocks(alien, signal, block_sizes)
+    expected_phase = (0.25 + 350 / RATE * (num_samples + 1)) % 1.0
+    assert alien.carrier.phase == pytest.approx(expected_phase, abs=1e-9)
+
+    # Ping pong: the position within the period
+    ping_pong = PingPongEffect()
+    process_blocks(ping_pong, signal, block_sizes)
+    assert ping_pong.position == num_samples % RATE
+
+    # Mutation: the distance between the write and read pointers
+    mutation = MutationEffect()
+    process_blocks(mutation, signal, block_sizes)
+    modulation = 0.2 * np.sin(2 * np.pi * 7 * np.arange(num_samples) / RATE)
+    assert mutation.delay == pytest.approx(512 - modulation.sum(), abs=1e-6)
@@ -0,0 +1,26 @@
+"""
+Startup of the headless entry points: fast, and without GUI, audio-device or SciPy imports.
+
+Runs benchmarks/bench_import.py, which imports every target in fresh interpreters
+with `python -X importtime`. The budget is generous, so only a regression that
+pulls in a heavy dependency fails on a slow machine.
+"""
+import os
+import sys
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import bench_import  # noqa: E402
+
+# Median import time allowed per target, in milliseconds (NumPy alone takes about 100 ms)
+BUDGET_MS = 1000
+
+
+def test_targets_import_quickly_without_forbidden_modules() -> None:
+    results, passed = bench_import.run(bench_import.TARGETS, repeat=3, budget_ms=BUDGET_MS)
+
+    for module, result in results.items():
+        assert result["forbidden_imports"] == [], f"{module} imports {', '.join(result['forbidden_imports'])}"
+        assert result["median_ms"] <= BUDGET_MS, f"{module} takes {result['median_ms']:.0f} ms to import"
+    assert passed
@@ -0,0 +1,50 @@
+"""
+Chunked conversion through pipeline.process_chunks: the output lines up with the input and is exactly as long.
+"""
+from typing import List
+import numpy as np
+import pytest
+from scipy import signal
+
+from voice_morph_wizard import pipeline, registry
+from voice_morph_wizard.chain import Chain
+
+
+def convert(chain: Chain, samples: np.ndarray, chunk_frames: int) -> np.ndarray:
+    chunk_samples = chunk_frames * chain.channels
+    chunks = [samples[start:start + chunk_samples] for start in range(0, len(samples), chunk_samples)]
+    outputs: List[np.ndarray] = []
+    for output in pipeline.process_chunks(chain, iter(chunks)):
+        # Output chunks may share memory with the chain, so keep copies
+        outputs.append(output.copy())
+    return np.concatenate(outputs)
+
+
+@pytest.mark.parametrize("effect", ["Male Voice", "Echoed Voice", "Reverb Effect", "Ping Pong Voice"])
+@pytest.mark.parametrize("rate, internal_rate", [(22050, 16000), (16000, 8000), (8000, 44100), (48000, 44100), (16000, 16000)])
+@pytest.mark.parametrize("chunk_frames", [1000, 16384])
+def test_output_is_as_long_as_the_input(effect: str, rate: int, internal_rate: int, chunk_frames: int) -> None:
+    num_frames = 12345
+    samples = (np.random.default_rng(0).standard_normal(num_frames * 2) * 3000).astype(np.int16)
+    chain = registry.create_chain([effect], sample_rate=rate, channels=2, internal_rate=internal_rate,
+                                  block_size=chunk_frames)
+
+    output = convert(chain, samples, chunk_frames)
+
+    assert len(output) == num_frames * chain.output_channels
+
+
+@pytest.mark.parametrize("internal_rate", [8000, 11025, 44100])
+def test_resampling_keeps_the_end_of_the_stream(internal_rate: int) -> None:
+    # Resampling there and back matches scipy's resample_poly over the zero-padded input, up to the last sample
+    t = np.arange(16000) / 16000
+    samples = (np.sin(2 * np.pi * 300 * t) * 10000).astype(np.int16)
+    chain = Chain([], sample_rate=16000, internal_rate=internal_rate)
+
+    output = convert(chain, samples, 1000)
+
+    divisor = np.gcd(16000, internal_rate)
+    up, down = internal_rate // divisor, 16000 // divisor
+    padded = np.concatenate((samples, np.zeros(1000))).astype(np.float64)
+    expected = signal.resample_poly(signal.resample_poly(padded, up, down), down, up)[:len(samples)]
+    np.testing.assert_allclose(output, expected, rtol=0, atol=0.05)
@@ -0,0 +1,25 @@
+"""
+Creating effects and chains by name.
+"""
+import pytest
+
+from voice_morph_wizard import registry
+
+
+@pytest.mark.parametrize("name", ["Male Voice", "Female Voice", "Baby Voice", "Robotic Voice"])
+def test_frame_sec_sets_the_pitch_shifter_latency(name: str) -> None:
+    assert registry.create(name, sample_rate=16000).latency == 1024
+    assert registry.create(name, sample_rate=16000, frame_sec=0.02).latency == 256
+
+
+def test_frame_sec_is_only_passed_to_effects_that_take_it() -> None:
+    chain = registry.create_chain(["Echoed Voice", "Male Voice"], sample_rate=16000, frame_sec=0.02)
+
+    assert chain.latency == 256
+
+
+def test_chain_latency_and_hold_back_cover_the_resamplers() -> None:
+    chain = registry.create_chain(["Male Voice"], sample_rate=16000, internal_rate=8000, frame_sec=0.02)
+
+    assert chain.latency == 2 * 128
+    assert chain.hold_back > 0
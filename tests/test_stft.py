@@ -0,0 +1,76 @@
+"""
+STFTEffect: an identity transform gives back the input delayed by frame_size, and the
+spectral effects built on it do not depend on the block sizes.
+"""
+from typing import List
+import numpy as np
+import pytest
+
+from voice_morph_wizard.filters import RATE, DenoiseEffect, Effect, PitchShifter, STFTEffect
+
+
+def process_blocks(effect: Effect, input_array: np.ndarray, block_sizes: List[int]) -> np.ndarray:
+    blocks = []
+    start = 0
+    for size in block_sizes:
+        # The effect may overwrite its block and reuse its output array, so both are copies
+        blocks.append(effect.process(input_array[start:start + size].copy()).copy())
+        start += size
+    return np.concatenate(blocks)
+
+
+def random_block_sizes(seed: int, total: int) -> List[int]:
+    cuts = np.sort(np.random.default_rng(seed).integers(0, total, 60))
+    return [int(size) for size in np.diff([0, *cuts, total])]
+
+
+@pytest.fixture(scope="module")
+def noise() -> np.ndarray:
+    return np.random.default_rng(0).uniform(-10000, 10000, RATE).astype(np.float32)
+
+
+@pytest.mark.parametrize("window", ["hann", "hamming", "boxcar", "blackman"])
+@pytest.mark.parametrize("frame_size, hop_size, fft_size", [(256, 64, None), (256, 70, None), (256, 200, None),
+                                                            (512, 128, 1024), (512, 256, 2048)])
+def test_identity_reconstructs_the_delayed_input(noise: np.ndarray, window: str, frame_size: int, hop_size: int,
+                                                 fft_size: int) -> None:
+    effect = STFTEffect(frame_size, hop_size, fft_size, window)
+
+    output = process_blocks(effect, noise, random_block_sizes(1, len(noise)))
+
+    assert effect.latency == frame_size
+    np.testing.assert_allclose(output[:frame_size], 0, rtol=0, atol=0.05)
+    np.testing.assert_allclose(output[frame_size:], noise[:-frame_size], rtol=0, atol=0.05)
+
+
+def test_hop_must_be_covered_by_the_window(noise: np.ndarray) -> None:
+    # Without overlap, windows that fall to 0 at their ends leave samples that cannot be reconstructed
+    for window in ["hann", "blackman"]:
+        with pytest.raises(ValueError):
+            STFTEffect(256, 256, window=window)
+
+    effect = STFTEffect(256, 256, window="boxcar")
+    output = process_blocks(effect, noise, random_block_sizes(3, len(noise)))
+    np.testing.assert_allclose(output[256:], noise[:-256], rtol=0, atol=0.05)
+
+
+@pytest.mark.parametrize("create", [lambda: PitchShifter(12), lambda: PitchShifter(-5, frame_sec=0.02),
+                                    lambda: DenoiseEffect()], ids=["pitch-up", "pitch-down", "denoise"])
+def test_block_size_independence(noise: np.ndarray, create) -> None:
+    whole = process_blocks(create(), noise, [len(noise)])
+
+    for block_sizes in ([128] * (len(noise) // 128) + [len(noise) % 128], random_block_sizes(2, len(noise))):
+        np.testing.assert_allclose(process_blocks(create(), noise, block_sizes), whole, rtol=0, atol=0.05)
+
+
+@pytest.mark.parametrize("steps, expected_hz", [(12, 880), (-12, 220), (7, 440 * 2 ** (7 / 12))])
+def test_pitch_shifter_frequency(steps: int, expected_hz: float) -> None:
+    tone = (np.sin(2 * np.pi * 440 * np.arange(2 * RATE) / RATE) * 10000).astype(np.float32)
+    effect = PitchShifter(steps)
+
+    # The spectral peak of the output once it has settled, in 0.5 Hz bins
+    output = process_blocks(effect, tone, [1024] * (len(tone) // 1024) + [len(tone) % 1024])[RATE // 2:]
+    spectrum = np.abs(np.fft.rfft(output * np.hanning(len(output)), 4 * len(output)))
+    peak_hz = np.argmax(spectrum) * RATE / (4 * len(output))
+
+    assert abs(peak_hz - expected_hz) < 2
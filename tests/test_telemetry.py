@@ -0,0 +1,32 @@
+"""
+BlockTelemetry: deadline misses are only counted for the stages held to the deadline.
+"""
+from voice_morph_wizard.telemetry import BlockTelemetry
+
+
+def test_stages_without_deadline_never_miss() -> None:
+    telemetry = BlockTelemetry(["read", "process", "write", "work"], deadline=0.001, log_interval=None,
+                               deadline_stages=["work"])
+
+    # A blocking read waits about a block for its input, and a little longer half of the time
+    for read_ns in (900_000, 1_100_000, 950_000, 1_050_000):
+        telemetry.record("read", read_ns)
+        telemetry.record("process", 200_000)
+        telemetry.record("write", 10_000)
+        telemetry.record("work", 210_000)
+    telemetry.record("work", 1_500_000)
+
+    stages = telemetry.snapshot()["stages"]
+    assert stages["read"]["deadline"] is None and stages["read"]["deadline_misses"] == 0
+    assert stages["read"]["max"] == 0.0011
+    assert stages["work"]["deadline"] == 0.001 and stages["work"]["deadline_misses"] == 1
+    assert "late" not in telemetry.summary().split(" | ")[0]
+    assert "late 1/5" in telemetry.summary()
+
+
+def test_every_stage_has_the_deadline_by_default() -> None:
+    telemetry = BlockTelemetry(["callback", "process"], deadline=0.001, log_interval=None)
+    telemetry.record("callback", 2_000_000)
+    telemetry.record("process", 2_000_000)
+
+    assert all(stage["deadline_misses"] == 1 for stage in telemetry.snapshot()["stages"].values())
@@ -0,0 +1,150 @@
+"""
+The int16 boundary of the package: Quantizer saturation, rounding and dither, and
+the memory-mapped WAV reader and writer.
+"""
+import os
+import struct
+import wave
+import numpy as np
+import pytest
+
+from voice_morph_wizard.wavfile import (HEADER_SIZE, WAVE_FORMAT_EXTENSIBLE, WAVE_FORMAT_PCM, AudioInfo, Quantizer,
+                                        WavWriter, read_wav, write_wav)
+
+
+def quantize(samples, dither: bool = False, seed: int = 0) -> np.ndarray:
+    samples = np.asarray(samples, dtype=np.float32)
+    return Quantizer(dither, seed)(samples, np.zeros(len(samples), dtype=np.int16))
+
+
+def test_saturates_instead_of_wrapping() -> None:
+    output = quantize([40000, -40000, 32767.4, -32768.4, 1e9, -1e9])
+
+    # astype would wrap 40000 around to -25536
+    assert list(output) == [32767, -32768, 32767, -32768, 32767, -32768]
+
+
+def test_rounds_to_nearest() -> None:
+    output = quantize([0.4, 0.6, -0.4, -0.6, 1.5, 2.5, -1.5, 99.49, -99.51])
+
+    # Halves round to even, like numpy.rint (astype would truncate towards 0)
+    assert list(output) == [0, 1, 0, -1, 2, 2, -2, 99, -100]
+
+
+def test_int16_samples_are_copied_unchanged() -> None:
+    samples = np.array([-32768, -1, 0, 1, 32767], dtype=np.int16)
+
+    assert np.array_equal(Quantizer(dither=True)(samples, np.zeros(5, dtype=np.int16)), samples)
+
+
+def test_dither_is_bounded_reproducible_and_off_by_default() -> None:
+    samples = np.random.default_rng(5).uniform(-1000, 1000, 100000).astype(np.float32)
+
+    dithered = quantize(samples, dither=True).astype(np.float64)
+
+    # TPDF noise spans (-1, 1) LSB: whole-numbered samples move by at most 1 LSB, others by less than 1.5
+    whole = np.rint(samples)
+    assert np.max(np.abs(quantize(whole, dither=True) - whole)) == 1
+    error = dithered - samples
+    assert np.max(np.abs(error)) < 1.5
+    assert abs(np.mean(error)) < 0.01
+    assert np.std(error) > 0.5
+
+    # The same seed gives the same noise; another seed does not
+    assert np.array_equal(quantize(samples, dither=True), quantize(samples, dither=True))
+    assert not np.array_equal(quantize(samples, dither=True), quantize(samples, dither=True, seed=1))
+
+    # Off by default: plain rounding
+    default = Quantizer()(samples, np.zeros(len(samples), dtype=np.int16))
+    assert np.array_equal(default, np.rint(samples).astype(np.int16))
+
+
+def wav_bytes(samples: np.ndarray, channels: int, rate: int, format_tag: int = WAVE_FORMAT_PCM,
+              extra_chunks: bytes = b"", data_size=None) -> bytes:
+    # A WAV file built by hand, with an extensible fmt chunk and chunks before the data when asked
+    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+        fmt = struct.pack("<HHIIHHHHI16s", format_tag, channels, rate, rate * 2 * channels, 2 * channels, 16,
+                          22, 16, 0, b"\x01\x00\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71")
+    else:
+        fmt = struct.pack("<HHIIHH", format_tag, channels, rate, rate * 2 * channels, 2 * channels, 16)
+    data = samples.astype("<i2").tobytes()
+    body = (b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra_chunks
+            + b"data" + struct.pack("<I", len(data) if data_size is None else data_size) + data)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_round_trip_is_bit_exact(tmp_path) -> None:
+    path = str(tmp_path / "round_trip.wav")
+    # Every int16 value, including both extremes, then some noise
+    noise = np.random.default_rng(3).integers(-32768, 32768, 4464)
+    samples = np.concatenate((np.arange(-32768, 32768), noise)).astype(np.int16)
+
+    write_wav(path, samples, channels=2, rate=22050)
+    info, read = read_wav(path)
+
+    assert info == AudioInfo(2, 22050, 2, 35000)
+    assert np.array_equal(read, samples)
+
+    # The standard library reads the same file
+    with wave.open(path, "rb") as wav_file:
+        assert (wav_file.getnchannels(), wav_file.getframerate(), wav_file.getnframes()) == (2, 22050, 35000)
+        assert wav_file.readframes(35000) == samples.astype("<i2").tobytes()
+
+
+def test_reads_extensible_format_and_skips_odd_padded_chunks(tmp_path) -> None:
+    path = str(tmp_path / "extensible.wav")
+    samples = np.arange(-500, 500, dtype=np.int16)
+
+    # A LIST chunk of 5 bytes, padded to 6, and an empty one before the data
+    extra_chunks = b"LIST" + struct.pack("<I", 5) + b"abcde\x00" + b"junk" + struct.pack("<I", 0)
+    with open(path, "wb") as wav_file:
+        wav_file.write(wav_bytes(samples, 1, 48000, WAVE_FORMAT_EXTENSIBLE, extra_chunks))
+
+    info, read = read_wav(path)
+
+    assert info == AudioInfo(1, 48000, 2, 1000)
+    assert np.array_equal(read, samples)
+
+
+@pytest.mark.parametrize("data_size", [0, 0xFFFFFFFF])
+def test_streamed_data_size_uses_the_file_size(tmp_path, data_size: int) -> None:
+    path = str(tmp_path / "streamed.wav")
+    samples = np.arange(2000, dtype=np.int16)
+    with open(path, "wb") as wav_file:
+        wav_file.write(wav_bytes(samples, 2, 16000, data_size=data_size))
+
+    info, read = read_wav(path)
+
+    assert info.frames == 1000
+    assert np.array_equal(read, samples)
+
+
+def test_rejects_other_formats(tmp_path) -> None:
+    path = str(tmp_path / "float.wav")
+    with open(path, "wb") as wav_file:
+        wav_file.write(wav_bytes(np.zeros(10, dtype=np.int16), 1, 16000, format_tag=0x0003))
+
+    with pytest.raises(ValueError):
+        read_wav(path)
+
+
+def test_writer_grows_past_the_hint_and_trims_on_close(tmp_path) -> None:
+    path = str(tmp_path / "grown.wav")
+    chunks = [np.full(3000, value, dtype=np.float32) for value in (1.4, -2.6, 40000)]
+
+    with WavWriter(path, channels=2, rate=16000, frames_hint=100) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+        assert writer.frames == 4500
+        assert os.path.getsize(path) >= HEADER_SIZE + 9000 * 2
+
+    # Trimmed to the samples written, with the RIFF and data sizes fixed up
+    assert os.path.getsize(path) == HEADER_SIZE + 9000 * 2
+    with open(path, "rb") as wav_file:
+        header = wav_file.read(HEADER_SIZE)
+    assert struct.unpack_from("<I", header, 4)[0] == 36 + 9000 * 2
+    assert struct.unpack_from("<I", header, 40)[0] == 9000 * 2
+
+    info, read = read_wav(path)
+    assert info == AudioInfo(2, 16000, 2, 4500)
+    assert np.array_equal(read, np.repeat(np.array([1, -3, 32767], dtype=np.int16), 3000))
@@ -4,7 +4,6 @@ import tkinter as tk
 from tkinter import messagebox
 from ui import UI
 from tkinter import filedialog
-from pydub import AudioSegment
 
 class Utils:
     @staticmethod
@@ -79,9 +78,9 @@ class Utils:
             None
 
         This method opens a file dialog to allow the user to upload an audio file.
-        If a file is selected and its duration is less than or equal to 10 seconds,
-        a copy of the file is saved in the 'audio_clips' folder within the 'voice_changer' directory.
-        If the duration exceeds 10 seconds, an error message is displayed.
+        If a file is selected, a copy of the file is saved in the 'audio_clips' folder
+        within the 'voice_changer' directory. Files are converted chunk by chunk, so
+        there is no limit on their duration.
 
         Example usage:
             YourClass.on_upload_audio()
@@ -94,22 +93,14 @@ class Utils:
             # Get the filename from the selected audio file path
             audio_filename = os.path.basename(audio_path)
 
-            # Calculate the duration of the audio file
-            audio_duration = AudioSegment.from_file(audio_path).duration_seconds
+            # Get the 'audio_clips' folder within the 'voice_changer' directory
+            audio_clips_folder = os.path.join(os.path.dirname(__file__), 'audio_clips')
 
-            # Check if the duration is greater than 10 seconds
-            if audio_duration > 10:
-                # Show an error message box if the duration exceeds 10 seconds
-                messagebox.showerror("Error", "Selected audio file is larger than 10 seconds. Please choose a shorter file.")
-            else:
-                # Get the 'audio_clips' folder within the 'voice_changer' directory
-                audio_clips_folder = os.path.join(os.path.dirname(__file__), 'audio_clips')
+            # Generate the destination path for the copy in the 'audio_clips' folder
+            destination_path = os.path.join(audio_clips_folder, audio_filename)
 
-                # Generate the destination path for the copy in the 'audio_clips' folder
-                destination_path = os.path.join(audio_clips_folder, audio_filename)
+            # Copy the selected audio file to the 'audio_clips' folder
+            shutil.copy2(audio_path, destination_path)
 
-                # Copy the selected audio file to the 'audio_clips' folder
-                shutil.copy2(audio_path, destination_path)
-
-                # Show a success message box
-                messagebox.showinfo("Upload Successful", f"Audio file '{audio_filename}' has been uploaded and saved.")
\ No newline at end of file
+            # Show a success message box
+            messagebox.showinfo("Upload Successful", f"Audio file '{audio_filename}' has been uploaded and saved.")
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Voice Morph Wizard DSP core: effects, effect chains, the effect registry and file conversion.
+
+Importing the package has no side effects and loads nothing but the package itself:
+each name below imports its module on first use. Only NumPy is needed by the core;
+SciPy is loaded by the effects that use it, and PyAudio only by the realtime engine
+in voice_morph_wizard.engine. The Tk front-end (main.py) and the batch CLI (batch.py)
+live outside the package.
+
+Example usage:
+    from voice_morph_wizard import registry, pipeline
+    chain = registry.create_chain(["Male Voice"], sample_rate=44100)
+"""
+import importlib
+from typing import Any
+
+# Public name -> module of the package that defines it
+_EXPORTS = {
+    "Effect": "filters",
+    "Filters": "filters",
+    "PitchShifter": "filters",
+    "Resampler": "filters",
+    "DelayLine": "filters",
+    "Oscillator": "filters",
+    "STFTEffect": "filters",
+    "DenoiseEffect": "filters",
+    "EqualizerEffect": "filters",
+    "RATE": "filters",
+    "Chain": "chain",
+    "PER_CHANNEL": "chain",
+    "DOWNMIX": "chain",
+    "AudioInfo": "wavfile",
+    "Quantizer": "wavfile",
+    "convert_file": "pipeline",
+    "DecodedAudioCache": "cache",
+    "RenderCache": "cache",
+    "BlockTelemetry": "telemetry",
+}
+
+# Submodules that can be used as attributes of the package
+_SUBMODULES = ("filters", "chain", "registry", "pipeline", "wavfile", "cache", "telemetry", "engine")
+
+__all__ = list(_EXPORTS) + list(_SUBMODULES)
+
+
+def __getattr__(name: str) -> Any:
+    # Import the defining module on first access and cache the attribute
+    if name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    elif name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
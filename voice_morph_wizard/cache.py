@@ -0,0 +1,478 @@
+import glob
+import hashlib
+import inspect
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import numpy as np
+from . import registry
+from .wavfile import AudioInfo, read_wav, write_wav
+
+
+def _decode(path: str) -> Tuple[AudioInfo, np.ndarray]:
+    """
+    Decode an audio file to interleaved int16 samples.
+
+    16-bit WAV files are memory-mapped; anything else (MP3, other WAV sample widths)
+    is decoded with pydub, which is only imported here.
+    """
+    if path.lower().endswith(".wav"):
+        try:
+            return read_wav(path)
+        except ValueError:
+            pass
+
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(path).set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+    return AudioInfo(audio.channels, audio.frame_rate, 2, len(samples) // audio.channels), samples
+
+
+def _trim_directory(directory: str, pattern: str, max_bytes: int) -> None:
+    # Delete the least recently used files until the directory fits its budget;
+    # other processes may be trimming the same directory at the same time
+    files = []
+    for path in glob.glob(os.path.join(directory, pattern)):
+        try:
+            files.append((os.stat(path), path))
+        except OSError:
+            pass
+
+    total = sum(stat.st_size for stat, _ in files)
+    for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= stat.st_size
+
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    # Identity of a file's current contents: absolute path, modification time (ns) and size
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def effect_signature(name: str) -> Tuple[Any, ...]:
+    """
+    Describe the effect registered under a name, for keying rendered output.
+
+    Parameters:
+        name (str): Effect name.
+
+    Returns:
+        Tuple: The name, the factory's qualified name, its version attribute and the default
+        values of its parameters (other than sample_rate), or just the name for names without
+        an effect (such as "Normal").
+
+    Changing the defaults of an effect, or bumping its version after changing what it
+    computes, changes its signature and so invalidates everything rendered with it.
+    """
+    factory = registry.get_factory(name)
+    if factory is None:
+        return (name,)
+
+    try:
+        parameters = inspect.signature(factory).parameters.values()
+    except (TypeError, ValueError):
+        parameters = []
+    defaults = tuple((parameter.name, parameter.default) for parameter in parameters
+                     if parameter.default is not parameter.empty and parameter.name != "sample_rate")
+
+    qualified_name = f"{getattr(factory, '__module__', '')}.{getattr(factory, '__qualname__', repr(factory))}"
+    return name, qualified_name, getattr(factory, "version", 0), defaults
+
+
+class DecodedAudioCache:
+    """
+    LRU cache of decoded audio, keyed by a file's path, modification time and size.
+
+    Decoding an MP3 through pydub/ffmpeg is by far the slowest step of playing or
+    converting it, and the same clip is typically played and converted many times
+    in a row. Audio decoded into memory is kept up to max_bytes of samples, evicting
+    the least recently used entries. 16-bit WAV files, and entries of the on-disk
+    tier, come back as memory maps, which take no memory of their own and are
+    mapped again on every request instead of being kept. Editing or replacing a file
+    changes its key, so stale audio is never returned.
+
+    With a disk_dir, decoded (non-WAV) audio is also saved there as .npy files that
+    survive restarts and are memory-mapped when loaded back. The directory is kept
+    under disk_max_bytes by deleting the least recently used files.
+
+    Example usage:
+        cache = DecodedAudioCache(max_bytes=256 * 2**20, disk_dir="~/.cache/voice_morph_wizard")
+        info, samples = cache.get("voice.mp3")
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, disk_dir: Optional[str] = None, disk_max_bytes: int = 2 * 2**30) -> None:
+        """
+        Parameters:
+        - max_bytes (int): Memory budget for cached samples, in bytes.
+        - disk_dir (Optional[str]): Directory for the on-disk tier, or None to keep entries in memory only.
+        - disk_max_bytes (int): Size budget of the on-disk tier, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = os.path.expanduser(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self.entries: "OrderedDict[Tuple[str, int, int], Tuple[AudioInfo, np.ndarray]]" = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0         # Requests served from memory
+        self.disk_hits = 0    # Requests served from the on-disk tier
+        self.misses = 0       # Requests that decoded or mapped the file
+        self.evictions = 0    # Entries dropped to stay within max_bytes
+
+    @staticmethod
+    def key(path: str) -> Tuple[str, int, int]:
+        """
+        Cache key of a file: its absolute path, modification time (ns) and size.
+        """
+        return _file_key(path)
+
+    def get(self, path: str) -> Tuple[AudioInfo, np.ndarray]:
+        """
+        Return the decoded audio of a file, decoding it only if it is not cached.
+
+        Parameters:
+        - path (str): Path of a WAV or MP3 file.
+
+        Returns:
+        - Tuple[AudioInfo, numpy.ndarray]: The format of the audio and its interleaved int16
+          samples. The array is shared with the cache and must not be modified.
+        """
+        key = _file_key(path)
+        entry = self.peek(path, key)
+        if entry is not None:
+            return entry
+
+        entry = self._load_from_disk(key)
+        if entry is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            entry = _decode(path)
+            # WAV files are memory-mapped already; only keep decoded audio on disk
+            if not isinstance(entry[1], np.memmap):
+                self._save_to_disk(key, entry)
+
+        self._store(key, entry)
+        return entry
+
+    def peek(self, path: str, key: Optional[Tuple[str, int, int]] = None) -> Optional[Tuple[AudioInfo, np.ndarray]]:
+        """
+        Return the decoded audio of a file if it is held in memory, without decoding or mapping anything.
+
+        Parameters:
+        - path (str): Path of a WAV or MP3 file.
+        - key (Optional[Tuple[str, int, int]]): The file's key, if already known.
+
+        Returns:
+        - Optional[Tuple[AudioInfo, numpy.ndarray]]: The cached entry (see get), or None.
+        """
+        key = key or _file_key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def clear(self) -> None:
+        """
+        Drop every entry from memory (the on-disk tier is kept).
+        """
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit/miss counters and the memory in use.
+        """
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, key: Tuple[str, int, int], entry: Tuple[AudioInfo, np.ndarray]) -> None:
+        size = entry[1].nbytes
+        if size > self.max_bytes or isinstance(entry[1], np.memmap):
+            # Larger than the whole budget, or mapped from a file and so cheap to map again: return it without caching
+            return
+
+        with self.lock:
+            # Older versions of the same file can never be hit again
+            for stale_key in [other for other in self.entries if other[0] == key[0] and other != key]:
+                self.total_bytes -= self.entries.pop(stale_key)[1].nbytes
+
+            if key not in self.entries:
+                self.entries[key] = entry
+                self.total_bytes += size
+
+            # Evict the least recently used entries until the budget is met
+            while self.total_bytes > self.max_bytes:
+                _, (_, samples) = self.entries.popitem(last=False)
+                self.total_bytes -= samples.nbytes
+                self.evictions += 1
+
+    def _disk_prefix(self, key: Tuple[str, int, int]) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, digest)
+
+    def _load_from_disk(self, key: Tuple[str, int, int]) -> Optional[Tuple[AudioInfo, np.ndarray]]:
+        if self.disk_dir is None:
+            return None
+
+        # The format is part of the file name: <digest>_<channels>ch_<rate>hz.npy
+        for npy_path in glob.glob(self._disk_prefix(key) + "_*.npy"):
+            try:
+                channels, rate = (int(part[:-2]) for part in os.path.basename(npy_path)[:-4].split("_")[1:])
+                samples = np.load(npy_path, mmap_mode="r")
+            except (ValueError, OSError):
+                continue
+            # Mark the file as recently used for the disk budget
+            os.utime(npy_path)
+            return AudioInfo(channels, rate, 2, len(samples) // channels), samples
+
+        return None
+
+    def _save_to_disk(self, key: Tuple[str, int, int], entry: Tuple[AudioInfo, np.ndarray]) -> None:
+        if self.disk_dir is None:
+            return
+
+        info, samples = entry
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            npy_path = f"{self._disk_prefix(key)}_{info.channels}ch_{info.rate}hz.npy"
+
+            # Write to a temporary name first so a crash never leaves a truncated entry
+            temporary_path = npy_path + ".tmp"
+            with open(temporary_path, "wb") as npy_file:
+                np.save(npy_file, samples)
+            os.replace(temporary_path, npy_path)
+
+            _trim_directory(self.disk_dir, "*.npy", self.disk_max_bytes)
+        except OSError:
+            # The on-disk tier is only an optimization
+            pass
+
+
+class RenderCache:
+    """
+    Cache of rendered (converted) audio, keyed by the source content, the effect chain and its parameters.
+
+    Converting runs every effect over the whole file, yet the same file is typically
+    converted with the same few filters over and over: switching back and forth in
+    the filter combobox, or running a batch again after adding files. A key is a
+    digest of the source file's contents (not its name or date, so copies and touched
+    files still hit), the signature of every effect (see effect_signature) and any
+    other parameter the output depends on, such as the internal rate.
+
+    Rendered audio is kept in memory up to max_bytes, least recently used first out.
+    With a disk_dir, every render is saved there as a WAV file instead, which is memory
+    mapped when loaded back and can be shared by several processes; the directory is
+    kept under disk_max_bytes. Like in DecodedAudioCache, mapped renders are cheap to
+    map again, so they are neither kept in memory nor counted against max_bytes, and
+    never evict a render that only exists in memory.
+
+    Example usage:
+        renders = RenderCache(disk_dir="~/.cache/voice_morph_wizard/rendered")
+        key = renders.key("voice.mp3", ["Male Voice"], internal_rate=None)
+        output_info, hit = renders.render(key, "male.wav", lambda path: convert_file("voice.mp3", path, ...)[1])
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, disk_dir: Optional[str] = None, disk_max_bytes: int = 2 * 2**30) -> None:
+        """
+        Parameters:
+        - max_bytes (int): Memory budget for rendered samples, in bytes.
+        - disk_dir (Optional[str]): Directory for the on-disk tier, or None to keep renders in memory only.
+        - disk_max_bytes (int): Size budget of the on-disk tier, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = os.path.expanduser(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self.entries: "OrderedDict[str, Tuple[AudioInfo, np.ndarray]]" = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        # Content digest of every source file hashed so far, by file identity
+        self.digests: Dict[Tuple[str, int, int], str] = {}
+
+        # Counters
+        self.hits = 0         # Renders served from memory
+        self.disk_hits = 0    # Renders served (mapped) from the on-disk tier
+        self.misses = 0       # Renders that ran the effects
+        self.evictions = 0    # Entries dropped to stay within max_bytes
+
+    def content_digest(self, path: str) -> str:
+        """
+        SHA-1 of a file's contents, computed once per version of the file.
+        """
+        file_key = _file_key(path)
+        digest = self.digests.get(file_key)
+        if digest is None:
+            sha1 = hashlib.sha1()
+            with open(path, 'rb') as source_file:
+                for block in iter(lambda: source_file.read(2**20), b""):
+                    sha1.update(block)
+            digest = self.digests[file_key] = sha1.hexdigest()
+        return digest
+
+    def key(self, source_path: str, filter_names: Iterable[str], **params: Any) -> str:
+        """
+        Cache key of rendering a file through an effect chain.
+
+        Parameters:
+        - source_path (str): Path of the file to convert.
+        - filter_names (Iterable[str]): Effect names, in the order they are applied.
+        - **params: Any other setting the output depends on (internal rate, channel policy, ...).
+
+        Returns:
+        - str: Hex digest identifying the rendered output.
+        """
+        description = (self.content_digest(source_path),
+                       tuple(effect_signature(name) for name in filter_names),
+                       tuple(sorted(params.items())))
+        return hashlib.sha1(repr(description).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[AudioInfo, np.ndarray]]:
+        """
+        Return a cached render, or None if it was never rendered (or has been evicted).
+
+        Returns:
+        - Optional[Tuple[AudioInfo, numpy.ndarray]]: The format of the render and its interleaved
+          int16 samples. The array is shared with the cache and must not be modified.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        disk_path = self._disk_path(key)
+        if disk_path is None or not os.path.exists(disk_path):
+            return None
+        try:
+            entry = read_wav(disk_path)
+            # Mark the file as recently used for the disk budget
+            os.utime(disk_path)
+        except (ValueError, OSError):
+            return None
+
+        self.disk_hits += 1
+        self._store(key, entry)
+        return entry
+
+    def render(self, key: str, output_path: str, render: Callable[[str], AudioInfo]) -> Tuple[AudioInfo, bool]:
+        """
+        Write the output for a key to a WAV file, rendering it only if it is not cached.
+
+        Parameters:
+        - key (str): Cache key of the render (see key()).
+        - output_path (str): Path of the WAV file to write.
+        - render (Callable[[str], AudioInfo]): Renders to the given WAV path and returns the
+          format of what it wrote; only called on a miss.
+
+        Returns:
+        - Tuple[AudioInfo, bool]: The format of the output file, and whether it came from the cache.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            info, samples = entry
+            disk_path = self._disk_path(key)
+            if isinstance(samples, np.memmap) and disk_path is not None and os.path.exists(disk_path):
+                # Copying the cached file is cheaper than writing it from memory
+                shutil.copyfile(disk_path, output_path)
+            else:
+                write_wav(output_path, samples, info.channels, info.rate)
+            return info, True
+
+        self.misses += 1
+        info = render(output_path)
+        self.add(key, output_path)
+        return info, False
+
+    def add(self, key: str, wav_path: str) -> None:
+        """
+        Cache the rendered WAV file for a key.
+
+        Parameters:
+        - key (str): Cache key of the render.
+        - wav_path (str): 16-bit WAV file holding the render; it is copied, not kept.
+        """
+        disk_path = self._disk_path(key)
+        if disk_path is not None:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                # Copy to a temporary name first so a crash never leaves a truncated entry
+                temporary_path = f"{disk_path}.{os.getpid()}.tmp"
+                shutil.copyfile(wav_path, temporary_path)
+                os.replace(temporary_path, disk_path)
+                _trim_directory(self.disk_dir, "*.wav", self.disk_max_bytes)
+
+                # The render is served by mapping the cached file, so nothing is held in memory
+                return
+            except (ValueError, OSError):
+                # The on-disk tier is only an optimization
+                pass
+
+        # The output file belongs to the caller and may be deleted, so keep a copy
+        info, samples = read_wav(wav_path)
+        self._store(key, (info, np.array(samples)))
+
+    def clear(self) -> None:
+        """
+        Drop every entry from memory (the on-disk tier is kept).
+        """
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit/miss counters and the memory in use.
+        """
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, key: str, entry: Tuple[AudioInfo, np.ndarray]) -> None:
+        size = entry[1].nbytes
+        if size > self.max_bytes or isinstance(entry[1], np.memmap):
+            # Larger than the whole budget, or mapped from a file and so cheap to map again: return it without caching
+            return
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = entry
+                self.total_bytes += size
+
+            # Evict the least recently used entries until the budget is met
+            while self.total_bytes > self.max_bytes:
+                _, (_, samples) = self.entries.popitem(last=False)
+                self.total_bytes -= samples.nbytes
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        return os.path.join(self.disk_dir, key + ".wav")
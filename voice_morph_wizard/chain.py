@@ -0,0 +1,176 @@
+import copy
+import math
+from typing import Iterable, Optional
+import numpy as np
+from .filters import Effect, Resampler
+from .wavfile import Quantizer
+
+# Channel policies for multi-channel input
+PER_CHANNEL = "per_channel"  # Process every channel with its own effect instances
+DOWNMIX = "downmix"          # Mix the channels to mono once, before the first stage
+
+
+class Chain(Effect):
+    """
+    Run a sequence of effects one after the other on the same stream.
+
+    The incoming int16 block is converted to float32 once, into a scratch buffer
+    that the chain allocates up front and reuses for every block. Each stage then
+    works on the output of the previous one (in place whenever the effect keeps the
+    block length, otherwise into a buffer the effect or the chain reuses), and the
+    result is converted back to int16 once, by the caller or into the chain's out
+    array, rounded and saturated (see wavfile.Quantizer).
+
+    Multi-channel streams are deinterleaved into a (frames, channels) view without
+    copying. Depending on the policy, every channel then runs through its own copy
+    of each effect, or the channels are mixed to mono first. Effects that declare
+    mono_only always get a single mono channel, so identical channels are not
+    processed twice. The result is reinterleaved with output_channels channels:
+    a mono result is copied to every channel, more channels than asked for are
+    mixed to mono or cut, and fewer are repeated in order (L R L R for 4).
+
+    Given both a sample_rate and a different internal_rate, the chain resamples
+    every block to internal_rate before the first effect and back to sample_rate
+    after the last, so the effects can run at a cheaper rate. The effects must
+    then be created for internal_rate.
+
+    Example usage:
+        chain = Chain([MaleEffect(), EchoEffect(), FlangerEffect()], channels=2)
+        output_array = chain.process(input_array)
+
+        chain = Chain([FlangerEffect(sample_rate=16000)], sample_rate=48000, internal_rate=16000)
+    """
+    __slots__ = ("effects", "channels", "output_channels", "policy", "latency", "hold_back", "stages", "quantizer")
+
+    def __init__(self, effects: Iterable[Effect], block_size: int = 4096, channels: int = 1,
+                 output_channels: Optional[int] = None, policy: str = PER_CHANNEL,
+                 sample_rate: Optional[int] = None, internal_rate: Optional[int] = None, dither: bool = False) -> None:
+        """
+        Parameters:
+        - effects (Iterable[Effect]): Effects to apply, in order.
+        - block_size (int): Expected frames per block; the scratch buffers are allocated for it
+          up front and grow if a block is larger.
+        - channels (int): Number of interleaved channels in the input.
+        - output_channels (Optional[int]): Number of interleaved channels in the output
+          (default: however many channels the last stage produces).
+        - policy (str): PER_CHANNEL or DOWNMIX, how multi-channel input is processed.
+        - sample_rate (Optional[int]): Sample rate of the input and output blocks.
+        - internal_rate (Optional[int]): Sample rate the effects run at (default: sample_rate).
+        - dither (bool): Whether to add TPDF dither when process converts into an int16 out array.
+        """
+        if policy not in (PER_CHANNEL, DOWNMIX):
+            raise ValueError(f"Unknown channel policy: {policy}")
+
+        self.effects = list(effects)
+        self.channels = channels
+        self.policy = policy
+
+        # Resampling stages around the effects, when they run at a different rate
+        stage_effects = self.effects
+        rate_ratio = 1.0
+        if sample_rate and internal_rate and internal_rate != sample_rate:
+            stage_effects = [Resampler(sample_rate, internal_rate)] + self.effects + [Resampler(internal_rate, sample_rate)]
+            rate_ratio = sample_rate / internal_rate
+
+        # Frames the output lags behind the input, at the input rate
+        self.latency = round(sum(effect.latency for effect in self.effects) * rate_ratio)
+
+        # Frames the resamplers keep back until later input arrives, at the input rate: they are not
+        # delayed, but their output only comes with the next block, or with silence at the end of a stream
+        self.hold_back = 0
+        if len(stage_effects) > len(self.effects):
+            self.hold_back = stage_effects[0].hold_back + math.ceil(stage_effects[-1].hold_back * rate_ratio)
+
+        # Work out the channel count at every stage and give per-channel stages one instance per channel
+        self.stages = []
+        stage_channels = 1 if policy == DOWNMIX else channels
+        for effect in stage_effects:
+            if effect.mono_only:
+                stage_channels = 1
+            instances = [effect] + [copy.deepcopy(effect) for _ in range(stage_channels - 1)]
+            self.stages.append(instances)
+            stage_channels = effect.output_channels or stage_channels
+        self.output_channels = output_channels or stage_channels
+        self.quantizer = Quantizer(dither)
+
+        # Allocate the input buffers now rather than on the first block
+        pool = self.scratch()
+        pool.get("input", block_size, channels)
+        pool.get("mono", block_size)
+
+    def reset(self) -> None:
+        for instances in self.stages:
+            for effect in instances:
+                effect.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Apply every effect of the chain to the next block of the stream.
+
+        Parameters:
+        - input_array (numpy.ndarray): Interleaved input audio block (int16 or float).
+        - out (Optional[numpy.ndarray]): int16 array to write the interleaved result to. It must
+          be at least as long as the result, which for a resampling chain can be a frame longer
+          than the input.
+
+        Returns:
+        - numpy.ndarray: Interleaved processed audio block, a view of the first samples of out
+          if given. Otherwise it is float32 and may share memory with the chain's scratch
+          buffers, so it must be consumed before the next call.
+        """
+        pool = self.scratch()
+        num_frames = len(input_array) // self.channels
+
+        # Deinterleave without copying, then convert to float32 once
+        frames = input_array.reshape(num_frames, self.channels)
+        if self.channels == 1:
+            block = pool.get("mono", num_frames)
+            block[:] = frames[:, 0]
+        elif self.policy == DOWNMIX:
+            block = pool.get("mono", num_frames)
+            np.mean(frames, axis=1, out=block)
+        else:
+            block = pool.get("input", num_frames, self.channels)
+            block[:] = frames
+
+        for index, instances in enumerate(self.stages):
+            # Mono-only stages get the channels mixed down once
+            if len(instances) == 1 and block.ndim > 1:
+                block = np.mean(block, axis=1, out=pool.get(("mono", index), len(block)))
+
+            if block.ndim == 1:
+                block = instances[0].process(block)
+            else:
+                # Process every channel with its own instance, in place where the effect allows
+                columns = [block[:, channel] for channel in range(block.shape[1])]
+                outputs = [effect.process(column) for effect, column in zip(instances, columns)]
+                if any(output is not column for output, column in zip(outputs, columns)):
+                    # Gather the channels into a buffer kept for this stage
+                    shape = (len(outputs[0]), len(outputs)) + outputs[0].shape[1:]
+                    stacked = pool.get(("stage", index), shape[0], math.prod(shape[1:])).reshape(shape)
+                    block = np.stack(outputs, axis=1, out=stacked)
+
+        output = self._reinterleave(block)
+        if out is None:
+            return output
+        return self.quantizer(output, out[:len(output)])
+
+    def _reinterleave(self, block: np.ndarray) -> np.ndarray:
+        # Match the requested number of output channels and return interleaved samples
+        pool = self.scratch()
+        block_channels = block.shape[1] if block.ndim > 1 else 1
+        if block_channels == self.output_channels:
+            return block.reshape(-1)
+
+        output = pool.get("output", len(block), self.output_channels)
+        if block_channels == 1:
+            # Copy the mono signal to every output channel
+            output[:] = block.reshape(-1, 1)
+        elif self.output_channels == 1:
+            np.mean(block, axis=1, out=output[:, 0])
+        else:
+            # Keep the first output_channels channels, repeating them in order when more are asked for
+            for start in range(0, self.output_channels, block_channels):
+                stop = min(start + block_channels, self.output_channels)
+                output[:, start:stop] = block[:, :stop - start]
+        return output.reshape(-1)
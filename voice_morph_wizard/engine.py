@@ -0,0 +1,417 @@
+import math
+import threading
+import wave
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+import numpy as np
+from .telemetry import BlockTelemetry
+from .wavfile import Quantizer
+
+# PyAudio enumerates the audio devices when it is imported, so it is only loaded
+# by the classes that open a stream (the caller has created a PyAudio instance by then)
+if TYPE_CHECKING:
+    import pyaudio
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer / single-consumer ring buffer of int16 samples.
+
+    The producer only ever advances write_index and the consumer only ever advances
+    read_index, and each index is published with a single assignment after the
+    samples are copied, so the two sides never need a lock. The indices count
+    samples since the start and are mapped onto the buffer with a modulo.
+    """
+    __slots__ = ("buffer", "capacity", "write_index", "read_index")
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Parameters:
+        - capacity (int): Number of samples the buffer can hold.
+        """
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.write_index = 0
+        self.read_index = 0
+
+    def available(self) -> int:
+        """
+        Number of samples ready to be read.
+        """
+        return self.write_index - self.read_index
+
+    def space(self) -> int:
+        """
+        Number of samples that can be written without overwriting unread ones.
+        """
+        return self.capacity - (self.write_index - self.read_index)
+
+    def write(self, samples: np.ndarray) -> bool:
+        """
+        Append samples (producer side). Float samples are converted to int16 in the copy.
+
+        Parameters:
+        - samples (numpy.ndarray): Samples to append.
+
+        Returns:
+        - bool: False if there was not enough space; nothing is written in that case.
+        """
+        num_samples = len(samples)
+        if num_samples > self.space():
+            return False
+
+        # Copy in at most two slices, wrapping around the end of the buffer
+        start = self.write_index % self.capacity
+        first = min(num_samples, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:num_samples - first] = samples[first:]
+
+        # Publish the samples only once they are in place
+        self.write_index += num_samples
+        return True
+
+    def read_into(self, out: np.ndarray) -> bool:
+        """
+        Remove len(out) samples into out (consumer side).
+
+        Parameters:
+        - out (numpy.ndarray): Destination array.
+
+        Returns:
+        - bool: False if fewer than len(out) samples were available; out is untouched then.
+        """
+        num_samples = len(out)
+        if num_samples > self.available():
+            return False
+
+        start = self.read_index % self.capacity
+        first = min(num_samples, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:] = self.buffer[:num_samples - first]
+
+        # Release the space only once the samples have been copied out
+        self.read_index += num_samples
+        return True
+
+    def clear(self) -> None:
+        """
+        Drop all unread samples (only call while neither side is running).
+        """
+        self.read_index = self.write_index = 0
+
+
+class CallbackEngine:
+    """
+    Realtime microphone engine built on PyAudio's callback mode.
+
+    PortAudio calls _callback from its own thread for every buffer. The callback
+    only copies the captured samples into the input ring and takes already
+    processed samples from the output ring, so it never waits for an effect.
+    A worker thread moves blocks from the input ring through the processing
+    function into the output ring. When an effect spikes, the rings absorb it
+    and the engine counts overruns (input dropped because the input ring was
+    full) and underruns (silence played because the output ring was empty)
+    instead of blocking the audio device.
+
+    The PortAudio buffer size (frames_per_buffer) and the block size the effects
+    process (block_size) are independent: the rings re-block the audio between them.
+
+    With telemetry enabled, a BlockTelemetry in the telemetry attribute times the
+    "callback" stage against the buffer duration and the "process" stage against
+    the block duration, counts PortAudio's status flags, and logs a summary line
+    periodically from the worker thread.
+
+    Example usage:
+        engine = CallbackEngine(p, process_block, rate=16000, channels=2, frames_per_buffer=128, block_size=256)
+        engine.start()
+        print(engine.measure_latency())
+        ...
+        engine.stop()
+        print(engine.stats())
+    """
+
+    # Number of callbacks to run before the measured latency is reported
+    LATENCY_WARMUP_CALLBACKS = 4
+
+    def __init__(self, pa: "pyaudio.PyAudio", process: Callable[[np.ndarray], np.ndarray], rate: int, channels: int,
+                 frames_per_buffer: int, block_size: Optional[int] = None, ring_buffers: int = 4,
+                 telemetry: bool = False, telemetry_log_interval: Optional[float] = 10.0, dither: bool = False) -> None:
+        """
+        Parameters:
+        - pa (pyaudio.PyAudio): PyAudio instance used to open the stream.
+        - process (Callable): Function processing one int16 block of interleaved samples.
+        - rate (int): Sample rate of the stream.
+        - channels (int): Number of input and output channels.
+        - frames_per_buffer (int): Frames per PortAudio buffer.
+        - block_size (Optional[int]): Frames per block handed to process (default frames_per_buffer).
+        - ring_buffers (int): Capacity of each ring, in multiples of the larger of the two sizes.
+        - telemetry (bool): Whether to time every callback and block (see BlockTelemetry).
+        - telemetry_log_interval (Optional[float]): Seconds between telemetry log lines, or None for none.
+        - dither (bool): Whether to add TPDF dither when converting processed blocks to int16.
+        """
+        import pyaudio
+
+        self.pyaudio = pyaudio
+        self.pa = pa
+        self.process = process
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.block_size = block_size or frames_per_buffer
+
+        ring_samples = max(self.frames_per_buffer, self.block_size) * channels * ring_buffers
+        self.input_ring = RingBuffer(ring_samples)
+        self.output_ring = RingBuffer(ring_samples)
+
+        # Silence queued before the first callback: the smallest amount that lets the worker
+        # always have the next buffer ready when blocks and buffers do not line up
+        self.prime_frames = self.frames_per_buffer + self.block_size - math.gcd(self.frames_per_buffer, self.block_size)
+
+        # Preallocated blocks for the worker and the callback
+        self.work_block = np.zeros(self.block_size * channels, dtype=np.int16)
+        self.output_block = np.zeros(self.block_size * channels, dtype=np.int16)
+        self.callback_block = np.zeros(self.frames_per_buffer * channels, dtype=np.int16)
+
+        # Rounds and saturates processed blocks on their way to the output ring
+        self.quantizer = Quantizer(dither)
+
+        self.stream = None
+        self.worker = None
+        self.running = False
+        self.data_ready = threading.Event()
+
+        # Latency measurement, updated by the callback
+        self.captured_frames = 0     # Frames received from the microphone so far
+        self.played_frames = 0       # Frames taken from the output ring so far (including the priming silence)
+        self.callbacks = 0           # Number of callbacks so far
+        self.latency = None          # Most recent round-trip latency in seconds
+        self.latency_ready = threading.Event()
+
+        # Counters, each written by only one thread
+        self.overruns = 0            # Input blocks dropped because the input ring was full
+        self.output_overruns = 0     # Processed blocks dropped because the output ring was full
+        self.underruns = 0           # Callbacks that played silence because the output ring was empty
+        self.input_overflows = 0     # Callbacks PortAudio flagged with paInputOverflow
+        self.output_underflows = 0   # Callbacks PortAudio flagged with paOutputUnderflow
+
+        # Per-block timing; the callback stage has the duration of a buffer to run, the process stage that of a block
+        self.telemetry = None
+        if telemetry:
+            self.telemetry = BlockTelemetry(["callback", "process"], deadline=self.block_size / rate,
+                                            log_interval=telemetry_log_interval)
+            self.telemetry.stages["callback"].deadline_ns = int(self.frames_per_buffer / rate * 1e9)
+
+    def start(self) -> None:
+        """
+        Open the duplex stream in callback mode and start the worker thread.
+        """
+        self.input_ring.clear()
+        self.output_ring.clear()
+        self.captured_frames = self.played_frames = self.callbacks = 0
+        self.latency = None
+        self.latency_ready.clear()
+        if self.telemetry is not None:
+            self.telemetry.reset()
+        self.running = True
+
+        # Prime the output with silence so the worker has the headroom it needs
+        self.output_ring.write(np.zeros(self.prime_frames * self.channels, dtype=np.int16))
+
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+
+        self.stream = self.pa.open(
+            format=self.pyaudio.paInt16,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            output=True,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=self._callback
+        )
+        self.stream.start_stream()
+
+    def stop(self) -> None:
+        """
+        Stop the stream and the worker thread.
+        """
+        self.running = False
+        self.data_ready.set()
+
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def measure_latency(self, timeout: float = 1.0) -> Optional[float]:
+        """
+        Wait for the first callbacks and return the measured round-trip latency.
+
+        The latency is the time from a sample reaching the ADC to the same sample
+        reaching the DAC: PortAudio's buffer timestamps plus the audio queued in the
+        rings and the worker.
+
+        Parameters:
+        - timeout (float): Maximum time to wait for the stream to run, in seconds.
+
+        Returns:
+        - Optional[float]: Latency in seconds, or None if the stream did not run in time.
+        """
+        self.latency_ready.wait(timeout)
+        return self.latency
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the overrun/underrun counters, the current ring fill levels and,
+        with telemetry enabled, its snapshot under "telemetry".
+        """
+        stats = {
+            "overruns": self.overruns,
+            "output_overruns": self.output_overruns,
+            "underruns": self.underruns,
+            "input_overflows": self.input_overflows,
+            "output_underflows": self.output_underflows,
+            "input_ring_samples": self.input_ring.available(),
+            "output_ring_samples": self.output_ring.available(),
+        }
+        if self.telemetry is not None:
+            stats["telemetry"] = self.telemetry.snapshot()
+        return stats
+
+    def _callback(self, in_data: Optional[bytes], frame_count: int, time_info: dict, status: int):
+        telemetry = self.telemetry
+        if telemetry is not None:
+            start = telemetry.clock()
+            telemetry.record_status(status)
+
+        # Count the conditions PortAudio reports
+        if status & self.pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        if status & self.pyaudio.paOutputUnderflow:
+            self.output_underflows += 1
+
+        # Hand the captured block to the worker
+        if not self.input_ring.write(np.frombuffer(in_data, dtype=np.int16)):
+            self.overruns += 1
+        self.data_ready.set()
+
+        # Measure the latency: the first frame played now was captured
+        # (captured_frames - played_frames + prime_frames) frames before this callback's input
+        adc_time = time_info.get("input_buffer_adc_time", 0) if time_info else 0
+        dac_time = time_info.get("output_buffer_dac_time", 0) if time_info else 0
+        if adc_time and dac_time:
+            device_latency = dac_time - adc_time
+        else:
+            # Some host APIs do not report timestamps; use the stream's nominal latencies
+            device_latency = self.stream.get_input_latency() + self.stream.get_output_latency() if self.stream else 0.0
+        queued_frames = self.captured_frames - self.played_frames + self.prime_frames
+        self.latency = device_latency + queued_frames / self.rate
+        self.captured_frames += frame_count
+
+        # Play whatever the worker has finished, or silence if it is behind
+        out = self.callback_block[:frame_count * self.channels]
+        if self.output_ring.read_into(out):
+            self.played_frames += frame_count
+        else:
+            self.underruns += 1
+            out[:] = 0
+
+        self.callbacks += 1
+        if self.callbacks == self.LATENCY_WARMUP_CALLBACKS:
+            self.latency_ready.set()
+
+        if telemetry is not None:
+            telemetry.record("callback", telemetry.clock() - start)
+
+        # PyAudio copies the returned buffer into PortAudio's before the callback returns,
+        # so the preallocated block is handed over directly instead of as a new bytes object
+        return (out, self.pyaudio.paContinue)
+
+    def _work(self) -> None:
+        block = self.work_block
+        telemetry = self.telemetry
+        while self.running:
+            # Sleep until the callback delivers input
+            if not self.input_ring.read_into(block):
+                self.data_ready.wait(self.block_size / self.rate)
+                self.data_ready.clear()
+                continue
+
+            if telemetry is not None:
+                start = telemetry.clock()
+
+            # Process the block and convert the result to int16 once, on its way to the output ring
+            output_array = self.process(block)
+            if len(output_array) > len(self.output_block):
+                # A resampling chain can return a frame more than it was given
+                self.output_block = np.zeros(len(output_array), dtype=np.int16)
+            output_array = self.quantizer(output_array, self.output_block[:len(output_array)])
+            if not self.output_ring.write(output_array):
+                self.output_overruns += 1
+
+            if telemetry is not None:
+                telemetry.record("process", telemetry.clock() - start)
+                telemetry.maybe_log()
+
+
+class WavePlayer:
+    """
+    Play a WAV file through PyAudio in callback mode, reading it as it plays.
+
+    The callback reads only the frames PortAudio asks for, so memory use does not
+    depend on the length of the file. Like simpleaudio's PlayObject, the player
+    starts on creation and provides is_playing() and stop().
+
+    Example usage:
+        player = WavePlayer(p, "modulated.wav", start_frame=16000)
+        ...
+        player.stop()
+    """
+
+    def __init__(self, pa: "pyaudio.PyAudio", path: str, start_frame: int = 0) -> None:
+        """
+        Parameters:
+        - pa (pyaudio.PyAudio): PyAudio instance used to open the stream.
+        - path (str): Path of the WAV file to play.
+        - start_frame (int): Frame to start playing from.
+        """
+        import pyaudio
+
+        self.pyaudio = pyaudio
+        self.wave_file = wave.open(path, 'rb')
+        self.wave_file.setpos(min(start_frame, self.wave_file.getnframes()))
+        self.frame_size = self.wave_file.getsampwidth() * self.wave_file.getnchannels()
+
+        self.stream = pa.open(
+            format=pa.get_format_from_width(self.wave_file.getsampwidth()),
+            channels=self.wave_file.getnchannels(),
+            rate=self.wave_file.getframerate(),
+            output=True,
+            stream_callback=self._callback
+        )
+
+    def is_playing(self) -> bool:
+        """
+        Whether the file is still playing.
+        """
+        return self.stream is not None and self.stream.is_active()
+
+    def stop(self) -> None:
+        """
+        Stop playback and close the file.
+        """
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+            self.wave_file.close()
+
+    def _callback(self, in_data: Optional[bytes], frame_count: int, time_info: dict, status: int):
+        # Read the next frames; a short read means the end of the file
+        data = self.wave_file.readframes(frame_count)
+        if len(data) < frame_count * self.frame_size:
+            return (data, self.pyaudio.paComplete)
+        return (data, self.pyaudio.paContinue)
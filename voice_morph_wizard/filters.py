@@ -0,0 +1,2038 @@
+import functools
+import math
+import os
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+
+# Sample rate the effects were designed for, used when no sample_rate is given
+RATE = 16000
+
+# Sample type of the processing domain: audio is float32 in the int16 range from the
+# chain's input to its output; phases and read positions are kept in float64
+DTYPE = np.float32
+
+
+def _read_circular(buffer: np.ndarray, start: int, out: np.ndarray) -> np.ndarray:
+    """
+    Copy len(out) consecutive samples of a circular buffer, starting at a slot, into out.
+    """
+    first = min(len(out), len(buffer) - start)
+    out[:first] = buffer[start:start + first]
+    out[first:] = buffer[:len(out) - first]
+    return out
+
+
+def _write_circular(buffer: np.ndarray, start: int, values: np.ndarray) -> None:
+    """
+    Copy values (at most len(buffer) of them) into consecutive slots of a circular buffer, starting at a slot.
+    """
+    first = min(len(values), len(buffer) - start)
+    buffer[start:start + first] = values[:first]
+    buffer[:len(values) - first] = values[first:]
+
+
+def _pitch_shift(input_array: np.ndarray, pitch_shift_steps: float, sr: int = RATE) -> np.ndarray:
+    """
+    Shift the pitch of a whole signal without changing its length.
+
+    Parameters:
+    - input_array (numpy.ndarray): Input audio signal.
+    - pitch_shift_steps (float): Pitch shift in semitones.
+    - sr (int): Sampling rate of the audio signal.
+
+    Returns:
+    - numpy.ndarray: Pitch-shifted signal, as long as the input.
+    """
+    return _process_whole(PitchShifter(pitch_shift_steps, sr), input_array)
+
+
+def _process_whole(effect: "Effect", input_array: np.ndarray) -> np.ndarray:
+    """
+    Run an effect over a whole signal, compensating its latency.
+
+    Parameters:
+    - effect (Effect): Freshly created effect.
+    - input_array (numpy.ndarray): Input audio signal.
+
+    Returns:
+    - numpy.ndarray: Processed signal (float samples), as long as the input.
+    """
+    # Flush the effect's latency with silence and drop it from the start. The input is
+    # converted to DTYPE while it is copied into the padded array, so it is copied once
+    padded = np.zeros((len(input_array) + effect.latency,) + np.shape(input_array)[1:], dtype=DTYPE)
+    padded[:len(input_array)] = input_array
+    return effect.process(padded)[effect.latency:]
+
+
+class Filters:
+    @staticmethod
+    def alien_effect(input_array: np.ndarray, sr: int = RATE) -> np.ndarray:
+        """
+        Apply an alien voice modulation effect to the input signal.
+
+        This function modulates the input audio signal with an alien voice effect.
+        It uses a cosine modulation with a frequency of 700 Hz to create the modulation effect.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - sr (int): Sampling rate of the audio signal.
+
+        Returns:
+        - numpy.ndarray: Alien voice modulated audio signal (float samples).
+        """
+        return _process_whole(AlienEffect(sample_rate=sr), input_array)
+
+    @staticmethod
+    def echo_effect(input_array: np.ndarray, delay_samples: int = 1024, decay_factor: float = 0.7) -> np.ndarray:
+        """
+        Apply an echo effect to the input signal.
+
+        This function applies an echo effect to the input audio signal, creating a delayed repetition.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - delay_samples (int): Number of samples to delay for the echo effect (default is 1024).
+        - decay_factor (float): Factor to attenuate the delayed signal (default is 0.7).
+
+        Returns:
+        - numpy.ndarray: Audio signal with echo effect applied (float samples), as long as the input.
+        """
+        return _process_whole(EchoEffect(delay_samples / RATE, decay_factor, sample_rate=RATE), input_array)
+
+    @staticmethod
+    def robotize_effect(input_array: np.ndarray, sr: int = 16000, mod_freq: int = 100, pitch_shift_steps: int = -2) -> np.ndarray:
+        """
+        Apply a robotic effect to the input signal with amplitude modulation and pitch shift.
+
+        This function modulates the input audio signal with amplitude modulation and applies pitch shift.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - sr (int): Sampling rate of the audio signal (default is 16000).
+        - mod_freq (int): Modulation frequency for amplitude modulation (default is 100).
+        - pitch_shift_steps (int): Number of pitch shift steps (default is -2).
+
+        Returns:
+        - numpy.ndarray: Audio signal with robotic effect applied (float samples).
+        """
+        # Generate amplitude modulation using a cosine function, in DTYPE samples
+        modulation = Oscillator(mod_freq, sr, phase=0.25).generate(np.empty(len(input_array), dtype=DTYPE))
+        modulation += 1
+        modulation /= 2
+
+        # Apply amplitude modulation to the input signal, in place of the modulation
+        modulation *= input_array
+
+        # Apply pitch shift, keeping the length of the signal
+        return _pitch_shift(modulation, pitch_shift_steps, sr)
+
+    @staticmethod
+    def male_effect(input_array: np.ndarray, pitch_shift_steps: int = -3) -> np.ndarray:
+        """
+        Apply a pitch shift to make the input signal sound like a male voice.
+
+        This function shifts the pitch of the input audio signal to simulate a male voice.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - pitch_shift_steps (int): Number of pitch shift steps (default is -3).
+
+        Returns:
+        - numpy.ndarray: Audio signal with male voice pitch shift applied (float samples).
+        """
+        # Apply pitch shift, keeping the length of the signal (converted to DTYPE once, in _process_whole)
+        return _pitch_shift(input_array, pitch_shift_steps)
+    
+    @staticmethod
+    def female_effect(input: np.ndarray, pitch_shift_steps: int = 3) -> np.ndarray:
+        """
+        Apply a pitch shift to make the input signal sound like a female voice.
+
+        This function shifts the pitch of the input signal to create a female voice effect.
+
+        Parameters:
+        - input (numpy.ndarray): Input audio signal.
+        - pitch_shift_steps (int): Number of pitch shift steps (default is 3).
+
+        Returns:
+        - numpy.ndarray: Audio signal with female voice pitch shift applied (float samples).
+        """
+        # Apply pitch shift, keeping the length of the signal (converted to DTYPE once, in _process_whole)
+        return _pitch_shift(input, pitch_shift_steps)
+
+    @staticmethod
+    def baby_effect(input_array: np.ndarray, pitch_shift_steps: int = 10) -> np.ndarray:
+        """
+        Apply a baby pitch effect to the input signal.
+
+        This function shifts the pitch of the input audio signal to simulate a baby voice.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - pitch_shift_steps (int): Number of pitch shift steps (default is 10).
+
+        Returns:
+        - numpy.ndarray: Audio signal with baby pitch effect applied (float samples).
+        """
+        # Apply pitch shift for a baby pitch (converted to DTYPE once, in _process_whole)
+        return _pitch_shift(input_array, pitch_shift_steps)
+
+
+    @staticmethod
+    def ping_pong_effect(input_array: np.ndarray, sr: int = RATE) -> np.ndarray:
+        """
+        Apply a ping-pong effect to the input audio signal.
+
+        This function creates a stereo ping-pong effect by storing and delaying samples alternately.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - sr (int): Sampling rate of the audio signal; the delay is one second.
+
+        Returns:
+        - numpy.ndarray: Audio signal with ping-pong effect applied (stereo output).
+        """
+        return _process_whole(PingPongEffect(sample_rate=sr), input_array)
+
+    @staticmethod
+    def alternate_channels(input_array: np.ndarray, samples_per_alternation: int = 1024) -> np.ndarray:
+        """
+        Apply an alternate channels effect to the input audio signal.
+
+        This function alternates the output between left and right channels at each period.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - samples_per_alternation (int): Number of samples in each alternation period.
+
+        Returns:
+        - numpy.ndarray: Audio signal with alternate channels effect applied (stereo output).
+        """
+        output = np.zeros((len(input_array), 2), dtype=DTYPE)  # Stereo output: 2 channels
+
+        # Determine which half of the alternation period each sample is in
+        left = (np.arange(len(input_array)) // samples_per_alternation) % 2 == 0
+
+        # First half: Output to left channel, second half: Output to right channel
+        output[left, 0] = input_array[left]
+        output[~left, 1] = input_array[~left]
+
+        return output
+
+
+    @staticmethod
+    def mutation_effect(input_array: np.ndarray, rate: int = RATE, f0: float = 7, depth: float = 0.2, buffer_len: int = 1024) -> np.ndarray:
+        """
+        Apply a vibrato effect to the input signal.
+
+        This function applies a vibrato effect to the input audio signal.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - rate (int): Sampling rate of the audio signal.
+        - f0 (float): Frequency of the vibrato modulation (Hz).
+        - depth (float): Depth of the vibrato effect.
+        - buffer_len (int): Length of the delay buffer.
+
+        Returns:
+        - numpy.ndarray: Audio signal with vibrato effect applied (float samples).
+        """
+        return _process_whole(MutationEffect(f0, depth, buffer_len / rate, sample_rate=rate), input_array)
+
+    @staticmethod
+    def drunk(input_array: np.ndarray, rate: int = RATE, delay_sec: float = 0.2) -> np.ndarray:
+        """
+        Apply a drunk effect to the input audio signal.
+
+        This function simulates a drunk effect by combining the current sample with a delayed sample.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - rate (int): Sampling rate of the audio signal.
+        - delay_sec (float): Delay in seconds.
+
+        Returns:
+        - numpy.ndarray: Audio signal with drunk effect applied.
+        """
+        buffer_len = int(delay_sec * rate)
+        num_samples = len(input_array)
+
+        # The buffer starts empty, so the delayed sample is the input buffer_len samples earlier
+        delayed = np.zeros(num_samples, dtype=DTYPE)
+        if num_samples > buffer_len:
+            delayed[buffer_len:] = input_array[:num_samples - buffer_len]
+
+        # cos(i) + sin(i) for sample i, generated as sqrt(2) * sin(i + pi / 4)
+        output = Oscillator(1 / (2 * math.pi), 1, phase=0.125).generate(np.empty(num_samples, dtype=DTYPE))
+        output *= math.sqrt(2)
+
+        # Apply drunk effect by combining the current sample with a delayed sample, in place of the oscillation
+        output *= input_array
+        output += delayed
+
+        return output
+
+    @staticmethod
+    def flanger_effect(input_array: np.ndarray, sr: int = 16000, delay: float = 0.03, depth: float = 0.02, rate: float = 0.55) -> np.ndarray:
+        """
+        Apply a flanger effect to the input audio signal.
+
+        This function modulates the delay to create a flanger effect.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - sr (int): Sampling rate of the audio signal.
+        - delay (float): Base delay in seconds.
+        - depth (float): Modulation depth in seconds, smaller than the delay.
+        - rate (float): Rate of flange modulation in Hz.
+
+        Returns:
+        - numpy.ndarray: Audio signal with flanger effect applied (float samples).
+        """
+        return _process_whole(FlangerEffect(delay, depth, rate, sample_rate=sr), input_array)
+
+    @staticmethod
+    def convolution_reverb(input_array: np.ndarray, ir_path: Optional[str] = None, sr: int = RATE, mix: float = 0.3) -> np.ndarray:
+        """
+        Apply a convolution reverb to the input signal.
+
+        This function convolves the input with an impulse response and mixes the result with the input.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - ir_path (Optional[str]): 16-bit WAV file holding the impulse response, or None for a generated one.
+        - sr (int): Sampling rate of the audio signal.
+        - mix (float): Share of the reverberated signal in the output (default is 0.3).
+
+        Returns:
+        - numpy.ndarray: Audio signal with reverb applied (float samples), as long as the input.
+        """
+        return _process_whole(ConvolutionReverbEffect(ir_path, mix=mix, sample_rate=sr), input_array)
+
+    @staticmethod
+    def denoise(input_array: np.ndarray, sr: int = RATE, strength: float = 3.0, floor_db: float = -20.0) -> np.ndarray:
+        """
+        Reduce steady background noise in the input signal.
+
+        This function estimates the noise floor of every frequency band and subtracts it by spectral subtraction.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio signal.
+        - sr (int): Sampling rate of the audio signal.
+        - strength (float): Multiple of the noise floor subtracted (default is 3.0).
+        - floor_db (float): Lowest gain of a band, in decibels (default is -20.0).
+
+        Returns:
+        - numpy.ndarray: Denoised audio signal (float samples), as long as the input.
+        """
+        return _process_whole(DenoiseEffect(strength, floor_db, sample_rate=sr), input_array)
+
+
+class BufferPool:
+    """
+    Scratch arrays of one stream, allocated on first use and reused for every block.
+
+    Each array is requested by name with the number of rows the current block
+    needs, and the pool returns a view of the first rows. An array is only
+    reallocated when a block is larger than any before it, so once a stream runs
+    at a steady block size, processing a block allocates no array at all. The
+    number of columns and the dtype of a name are fixed by its first request.
+    """
+    __slots__ = ("buffers",)
+
+    def __init__(self) -> None:
+        self.buffers: Dict[Hashable, np.ndarray] = {}
+
+    def get(self, name: Hashable, length: int, columns: int = 0, dtype: type = DTYPE) -> np.ndarray:
+        """
+        Return a scratch array of length rows (and columns columns, if not 0).
+
+        The contents are whatever the previous user of the name left there.
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None or len(buffer) < length:
+            buffer = self.buffers[name] = np.zeros((length, columns) if columns else length, dtype=dtype)
+        return buffer[:length]
+
+    def arange(self, length: int, dtype: type = np.float64) -> np.ndarray:
+        """
+        Return the sample indices 0, 1, ..., length - 1, like numpy.arange but without allocating.
+        """
+        name = ("arange", dtype)
+        buffer = self.buffers.get(name)
+        if buffer is None or len(buffer) < length:
+            buffer = self.buffers[name] = np.arange(length, dtype=dtype)
+        return buffer[:length]
+
+
+class DelayLine:
+    """
+    Circular delay line of one stream: block writes, and reads of a whole block of
+    (fractional, possibly modulated) delays at once.
+
+    A block is first written, then read back any number of times: output sample i
+    of a read is the line's input delays[i] samples before the i-th sample of the
+    last block written, so a delay of 0 is that sample itself and a delay may be
+    shorter than the block. Fractional delays are interpolated:
+
+    - "linear": between the two nearest samples; delays from 0.
+    - "cubic": Catmull-Rom spline through the four nearest samples, flat up to
+      higher frequencies than linear interpolation; delays from 2.
+    - "allpass": first-order allpass filter, whose gain is exactly 1 at every
+      frequency; delays from 2. The filter is recursive, so one fraction, that of the
+      mean delay, is used for the whole block (every sample's delay is rounded to it)
+      and its last output belongs to the line: use it for one read per block of a
+      constant or slowly swept delay.
+
+    The buffer holds max_delay samples plus the largest block written, and grows
+    when a larger block comes, so a steady stream allocates nothing. Positions are
+    computed in float64, samples are DTYPE.
+    """
+    __slots__ = ("max_delay", "interpolation", "buffer", "pointer", "allpass_output", "pool")
+
+    INTERPOLATIONS = ("linear", "cubic", "allpass")
+
+    # Shortest delay each interpolation reads from samples that have been written, in samples
+    MIN_DELAYS = {"linear": 0, "cubic": 2, "allpass": 2}
+
+    # Samples kept beyond max_delay for the interpolation's neighbours
+    MARGIN = 3
+
+    # Polynomial interpolators: offsets of the neighbouring samples from the slot before
+    # the read position, and the weight of each of them as a polynomial in the fraction
+    # past that slot (row i, column k: coefficient of fraction ** k in the weight of neighbour i)
+    KERNELS = {
+        "linear": ((0, 1), np.array([[1, -1],
+                                     [0, 1]], dtype=DTYPE)),
+        "cubic": ((-1, 0, 1, 2), np.array([[0, -0.5, 1, -0.5],
+                                           [1, 0, -2.5, 1.5],
+                                           [0, 0.5, 2, -1.5],
+                                           [0, 0, -0.5, 0.5]], dtype=DTYPE)),
+    }
+
+    def __init__(self, max_delay: float, interpolation: str = "linear", block_size: int = 1024) -> None:
+        """
+        Parameters:
+        - max_delay (float): Longest delay that will be read, in samples.
+        - interpolation (str): "linear", "cubic" or "allpass", see the class docstring.
+        - block_size (int): Expected block size, to size the buffer up front.
+        """
+        if interpolation not in self.INTERPOLATIONS:
+            raise ValueError(f"unknown interpolation {interpolation!r}, expected one of {', '.join(self.INTERPOLATIONS)}")
+        self.max_delay = max(0, math.ceil(max_delay))
+        self.interpolation = interpolation
+        self.buffer = np.zeros(self.max_delay + self.MARGIN + block_size, dtype=DTYPE)
+        self.pool = BufferPool()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Fill the line with silence.
+        """
+        self.buffer[:] = 0
+        self.pointer = 0
+        self.allpass_output = 0.0
+
+    def write(self, values: np.ndarray) -> None:
+        """
+        Append a block to the line.
+
+        Parameters:
+        - values (numpy.ndarray): Samples of the block, oldest first.
+        """
+        num_samples = len(values)
+        capacity = len(self.buffer)
+        if num_samples + self.max_delay + self.MARGIN > capacity:
+            # Unroll the buffer into a larger one, keeping the most recent samples at the end
+            buffer = np.zeros(num_samples + self.max_delay + self.MARGIN, dtype=DTYPE)
+            _read_circular(self.buffer, self.pointer, buffer[len(buffer) - capacity:])
+            self.buffer, self.pointer, capacity = buffer, 0, len(buffer)
+
+        _write_circular(self.buffer, self.pointer, values)
+        self.pointer = (self.pointer + num_samples) % capacity
+
+    def read_fixed(self, delay: int, out: np.ndarray) -> np.ndarray:
+        """
+        Read the last block written (its last len(out) samples) delayed by a whole number of samples.
+
+        Parameters:
+        - delay (int): Delay in samples, from 0 to max_delay.
+        - out (numpy.ndarray): Array receiving the delayed samples.
+
+        Returns:
+        - numpy.ndarray: out.
+        """
+        return _read_circular(self.buffer, (self.pointer - len(out) - delay) % len(self.buffer), out)
+
+    def read(self, delays: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Read the last block written (its last len(out) samples), each sample delayed by its own fractional delay.
+
+        Parameters:
+        - delays (numpy.ndarray): Delay of every output sample, in samples, at most max_delay
+          (and at least MIN_DELAYS of the interpolation: 0 for linear, 2 for cubic and allpass).
+        - out (numpy.ndarray): Array receiving the delayed samples; it may be delays itself.
+
+        Returns:
+        - numpy.ndarray: out.
+
+        Raises:
+        - ValueError: If a delay is out of range, where the neighbouring samples would be
+          ones not written yet or already overwritten.
+        """
+        pool = self.pool
+        num_samples = len(out)
+        buffer = self.buffer
+        if num_samples == 0:
+            return out
+        shortest, longest = float(np.min(delays)), float(np.max(delays))
+        if not self.MIN_DELAYS[self.interpolation] <= shortest <= longest <= self.max_delay:
+            raise ValueError(f"delays from {shortest:g} to {longest:g} samples are outside the range of a "
+                             f"{self.interpolation} delay line, {self.MIN_DELAYS[self.interpolation]} to {self.max_delay}")
+
+        # Read position of every sample, relative to the slot of the block's first sample
+        position = pool.get("position", num_samples, dtype=np.float64)
+        np.subtract(pool.arange(num_samples), delays, out=position)
+
+        if self.interpolation == "allpass":
+            return self._read_allpass(float(np.mean(delays)), position, out)
+
+        # Slot before each position (take's "wrap" mode reduces it modulo the buffer length) and the fraction past it.
+        # The arrays below hold one row per neighbouring sample (or power of the fraction), so every row is contiguous
+        offsets, matrix = self.KERNELS[self.interpolation]
+        order = len(offsets)
+        base = pool.get("base", num_samples, dtype=np.float64)
+        np.floor(position, out=base)
+        powers = pool.get("powers", order * num_samples).reshape(order, num_samples)
+        powers[0] = 1
+        position -= base
+        np.copyto(powers[1], position)
+        base += self.pointer - num_samples
+        index = pool.get("index", num_samples, dtype=np.int64)
+        np.copyto(index, base, casting="unsafe")
+
+        # The neighbouring samples of every position, gathered at once
+        tap_index = pool.get("tap_index", order * num_samples, dtype=np.int64).reshape(order, num_samples)
+        for row, offset in enumerate(offsets):
+            np.add(index, offset, out=tap_index[row])
+        taps = np.take(buffer, tap_index, out=pool.get("taps", order * num_samples).reshape(order, num_samples), mode="wrap")
+
+        # Weight of every neighbour, a polynomial in the fraction, and the weighted sum of the neighbours
+        for power in range(2, order):
+            np.multiply(powers[power - 1], powers[1], out=powers[power])
+        weights = np.matmul(matrix, powers, out=pool.get("weights", order * num_samples).reshape(order, num_samples))
+        return np.einsum("ij,ij->j", taps, weights, out=out)
+
+    def _read_allpass(self, mean_delay: float, position: np.ndarray, out: np.ndarray) -> np.ndarray:
+        # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+        from scipy import signal
+
+        pool = self.pool
+        num_samples = len(out)
+
+        # Fractional delay of the block, between 0.1 and 1.1 samples so the pole stays away from -1
+        fraction = mean_delay - math.floor(mean_delay - 0.1)
+        coefficient = (1 - fraction) / (1 + fraction)
+
+        # Every sample's integer delay is read exactly, the fraction is left to the allpass filter,
+        # and the tap before the first one is read as well to restart the filter in this alignment
+        position += fraction
+        np.rint(position, out=position)
+        position += self.pointer - num_samples
+        index = pool.get("index", num_samples + 1, dtype=np.int64)
+        index[0] = position[0] - 1
+        np.copyto(index[1:], position, casting="unsafe")
+        taps = np.take(self.buffer, index, out=pool.get("x0", num_samples + 1), mode="wrap")
+
+        # y[n] = coefficient * x[n] + x[n - 1] - coefficient * y[n - 1], continuing from the previous output
+        initial = [taps[0] - coefficient * self.allpass_output]
+        out[:] = signal.lfilter([coefficient, 1], [1, coefficient], taps[1:], zi=initial)[0]
+        self.allpass_output = float(out[-1])
+        return out
+
+
+class Oscillator:
+    """
+    Phase-continuous oscillator generating whole blocks of a periodic waveform, for
+    the low-frequency modulation (LFOs) and the carriers of the effects.
+
+    The phase is carried between blocks in cycles, in float64, so a stream of any
+    length and block size gets one continuous waveform without drifting. Every
+    waveform peaks at 1 and starts at 0 rising, like a sine; phase shifts it (0.25
+    gives a cosine). The waveform is evaluated in the dtype of the array it is
+    written to: float64 for modulation that is integrated or turned into delays,
+    DTYPE (where NumPy's vectorized float32 sine is several times faster) for
+    carriers multiplied into the audio.
+    """
+    __slots__ = ("frequency", "sample_rate", "waveform", "initial_phase", "phase", "pool")
+
+    WAVEFORMS = ("sine", "triangle", "square")
+
+    def __init__(self, frequency: float, sample_rate: int = RATE, waveform: str = "sine", phase: float = 0.0) -> None:
+        """
+        Parameters:
+        - frequency (float): Frequency in Hertz.
+        - sample_rate (int): Sample rate of the stream.
+        - waveform (str): "sine", "triangle" or "square".
+        - phase (float): Phase of the first sample, in cycles.
+        """
+        if waveform not in self.WAVEFORMS:
+            raise ValueError(f"unknown waveform {waveform!r}, expected one of {', '.join(self.WAVEFORMS)}")
+        self.frequency = frequency
+        self.sample_rate = sample_rate
+        self.waveform = waveform
+        self.initial_phase = phase % 1.0
+        self.pool = BufferPool()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Restart the waveform at its initial phase.
+        """
+        self.phase = self.initial_phase
+
+    def generate(self, out: np.ndarray) -> np.ndarray:
+        """
+        Write the next len(out) samples of the waveform to out.
+
+        Parameters:
+        - out (numpy.ndarray): Float array receiving the samples.
+
+        Returns:
+        - numpy.ndarray: out.
+        """
+        num_samples = len(out)
+        if num_samples == 0:
+            return out
+        pool = self.pool
+        increment = self.frequency / self.sample_rate
+
+        # Phase of every sample in cycles, continuing from the carried phase. The triangle
+        # is computed a quarter cycle ahead, where it is symmetric around half a cycle
+        start = self.phase + 0.25 if self.waveform == "triangle" else self.phase
+        cycles = pool.get("cycles", num_samples, dtype=np.float64)
+        np.multiply(pool.arange(num_samples), increment, out=cycles)
+        cycles += start
+        self.phase = (self.phase + increment * num_samples) % 1.0
+
+        # Keep the phases within one cycle, where they are exact enough for float32
+        end = start + increment * num_samples
+        if self.waveform != "sine" or not 0.0 <= end <= 1.0:
+            whole = pool.get("whole", num_samples, dtype=np.float64)
+            np.floor(cycles, out=whole)
+            cycles -= whole
+
+        if self.waveform == "sine":
+            cycles *= 2 * math.pi
+            np.copyto(out, cycles)
+            np.sin(out, out=out)
+        elif self.waveform == "triangle":
+            # 1 - 4 * |cycles - 0.5|
+            cycles -= 0.5
+            np.abs(cycles, out=cycles)
+            cycles *= -4
+            cycles += 1
+            np.copyto(out, cycles)
+        else:
+            # 1 during the first half of every cycle, -1 during the second
+            np.copyto(out, np.less(cycles, 0.5, out=pool.get("first_half", num_samples, dtype=bool)))
+            out *= 2
+            out -= 1
+        return out
+
+
+class Effect:
+    """
+    Base class for an audio effect that keeps its own state between blocks.
+
+    Every stream (the microphone loop, a file conversion, ...) creates its own
+    effect instances, so the same effect can run on several streams at once
+    without sharing buffers or pointers.
+
+    Effects work on float32 samples (DTYPE) in the int16 range and never
+    quantize: converting to int16 is left to whoever writes the audio out (see
+    wavfile.Quantizer), so effects can be stacked in a Chain without a round-trip
+    per stage, and a stage may overshoot the int16 range without wrapping around.
+    Delay lines and scratch arrays hold float32 too, which halves the memory
+    traffic of float64; phases, read positions and spectra stay float64, where
+    float32 would lose precision over a long stream.
+
+    Blocks hold a single channel. A Chain runs multi-channel streams through one
+    instance per channel, unless the effect sets mono_only, in which case the
+    channels are mixed to mono once. Effects that produce several channels set
+    output_channels and return a (frames, output_channels) array. Effects whose
+    output lags behind their input (such as the pitch shifter) set latency, so
+    file conversion can line the output up with the input.
+
+    Every effect takes the rate of the stream it processes as its sample_rate
+    keyword, and expresses delays in seconds and modulation in Hertz, so it
+    sounds the same whatever the sample rate of the input.
+
+    Effects write their result to the out array they are given, which may be
+    the input block itself, and keep their temporaries in a BufferPool of
+    their own (see scratch), so the realtime loop allocates no arrays once it
+    runs at a steady block size. The known exceptions are the library calls that
+    have no output argument: NumPy's FFTs (STFTEffect, ConvolutionReverbEffect)
+    and scipy.signal.sosfilt (EqualizerEffect) and lfilter (EchoEffect with short
+    delays) return a new array per block.
+    """
+    __slots__ = ("pool",)
+
+    # Whether multi-channel input should be mixed to mono instead of processed per channel
+    mono_only = False
+
+    # Number of channels the effect produces, or None for the same as its input
+    output_channels = None
+
+    # Number of samples the output lags behind the input
+    latency = 0
+
+    # Revision of what the effect computes; bump it when a change alters the output,
+    # so audio rendered by the previous revision is not served from a RenderCache
+    # (2: float32 processing and saturating, rounded int16 output)
+    version = 2
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Apply the effect to the next block of the stream.
+
+        The block is owned by the caller and may be overwritten.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio block (float32, or float64).
+        - out (Optional[numpy.ndarray]): Array to write the result to, shaped like the result;
+          it may be input_array itself. Without it, effects that keep the block length and
+          shape work in place and return input_array, and the others return an array of
+          their own that is reused by the next call.
+
+        Returns:
+        - numpy.ndarray: Processed audio block (float32, or the dtype of the input when
+          processed in place), out if it was given.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """
+        Clear the carried state so the next block starts a new stream.
+        """
+
+    def scratch(self) -> BufferPool:
+        """
+        Return the effect's pool of scratch arrays, creating it on first use.
+        """
+        try:
+            return self.pool
+        except AttributeError:
+            self.pool = BufferPool()
+            return self.pool
+
+    def __call__(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.process(input_array, out)
+
+
+@functools.lru_cache(maxsize=16)
+def _stft_windows(window: str, frame_size: int, hop_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Analysis and synthesis windows of a streaming STFT, computed once per window, frame size and hop.
+
+    The synthesis window is the analysis window divided by the sum of the squared
+    analysis windows of all the frames that overlap each sample, so analysis,
+    synthesis and overlap-add give back the input exactly, for any window and any
+    hop up to the frame size at which the overlapping windows cover every sample.
+
+    Parameters:
+    - window (str): "hann" (periodic), or any window name scipy.signal.get_window accepts.
+    - frame_size (int): Samples per frame.
+    - hop_size (int): Samples between consecutive frames.
+
+    Returns:
+    - Tuple[numpy.ndarray, numpy.ndarray]: Read-only float64 analysis and synthesis windows.
+    """
+    if window == "hann":
+        analysis = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_size) / frame_size)
+    else:
+        # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+        from scipy import signal
+        analysis = signal.get_window(window, frame_size)
+
+    # Squared windows overlap-added, which repeats every hop
+    squared = np.zeros(-(-frame_size // hop_size) * hop_size)
+    squared[:frame_size] = analysis ** 2
+    overlap = squared.reshape(-1, hop_size).sum(axis=0)
+
+    # The synthesis window divides by the overlap, so where it is (nearly) 0 the rounding errors of the FFTs blow up
+    if not np.all(overlap > 1e-6 * np.max(overlap)):
+        raise ValueError(f"the {window} window of {frame_size} samples does not cover a hop of {hop_size} samples")
+    synthesis = analysis / np.resize(overlap, frame_size)
+
+    analysis.setflags(write=False)
+    synthesis.setflags(write=False)
+    return analysis, synthesis
+
+
+class STFTEffect(Effect):
+    """
+    Base class of the spectral effects: a streaming short-time Fourier transform
+    with overlap-add resynthesis.
+
+    The stream is cut into frames of frame_size samples, hop_size apart. Each
+    frame is weighted by the analysis window and transformed by an rfft of
+    fft_size points (zero-padded past frame_size). Subclasses change the spectra
+    in transform. The results are transformed back, weighted by the synthesis
+    window and overlap-added. All frames that complete within a block go through
+    rfft, transform and irfft together, as rows of 2-D arrays. The windows are
+    computed once per configuration (see _stft_windows), and NumPy's FFT keeps its
+    own tables per transform size.
+
+    Input that does not fill a frame yet and the overlap-add tail are carried
+    between blocks, so the output is the same for any block size and lags the
+    input by frame_size samples (the latency). Without a transform the output is
+    the input, delayed. Frames are processed in float64, the precision of the FFT;
+    only the block's input and output are converted.
+    """
+    __slots__ = ("sample_rate", "frame_size", "hop_size", "fft_size", "latency", "analysis_window", "synthesis_window",
+                 "pending", "num_pending", "overlap", "ready", "ready_start", "num_ready")
+
+    def __init__(self, frame_size: int = 1024, hop_size: Optional[int] = None, fft_size: Optional[int] = None,
+                 window: str = "hann", sample_rate: int = RATE) -> None:
+        """
+        Parameters:
+        - frame_size (int): Samples per frame.
+        - hop_size (Optional[int]): Samples between consecutive frames, at most frame_size (default: a quarter frame).
+        - fft_size (Optional[int]): Points of the FFT, at least frame_size (default: frame_size).
+        - window (str): Analysis window, see _stft_windows.
+        - sample_rate (int): Sample rate of the stream.
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop_size = hop_size or max(1, frame_size // 4)
+        self.fft_size = fft_size or frame_size
+        if not 0 < self.hop_size <= frame_size <= self.fft_size:
+            raise ValueError(f"need 0 < hop_size <= frame_size <= fft_size, got {self.hop_size}, {frame_size}, {self.fft_size}")
+        self.latency = frame_size
+        self.analysis_window, self.synthesis_window = _stft_windows(window, frame_size, self.hop_size)
+
+        self.pending = np.zeros(frame_size)
+        self.overlap = np.zeros(frame_size - self.hop_size)
+        self.ready = np.zeros(2 * frame_size, dtype=DTYPE)
+        STFTEffect.reset(self)
+
+    def reset(self) -> None:
+        # Start with frame_size - hop_size samples of silence so the first frame completes
+        # after hop_size input samples, and keep hop_size samples of silence ready to play
+        self.pending[:] = 0
+        self.num_pending = self.frame_size - self.hop_size
+        self.overlap[:] = 0
+        self.ready[:] = 0
+        self.ready_start = 0
+        self.num_ready = self.hop_size
+
+    def transform(self, spectra: np.ndarray) -> np.ndarray:
+        """
+        Change the spectra of the frames that completed in a block.
+
+        Parameters:
+        - spectra (numpy.ndarray): (frames, fft_size // 2 + 1) complex128 array, one frame per
+          row in stream order; it may be modified in place.
+
+        Returns:
+        - numpy.ndarray: The spectra to resynthesize, shaped like spectra.
+        """
+        return spectra
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        frame_size, hop_size = self.frame_size, self.hop_size
+        pool = self.scratch()
+        num_samples = len(input_array)
+
+        # Input that has not been framed yet, followed by the block
+        num_pending = self.num_pending
+        total = num_pending + num_samples
+        samples = pool.get("samples", total, dtype=np.float64)
+        samples[:num_pending] = self.pending[:num_pending]
+        samples[num_pending:] = input_array
+        num_frames = (total - frame_size) // hop_size + 1 if total >= frame_size else 0
+
+        # The ready queue holds at most frame_size samples plus the block
+        if len(self.ready) < frame_size + num_samples:
+            ready = np.zeros(frame_size + num_samples, dtype=DTYPE)
+            _read_circular(self.ready, self.ready_start, ready[:self.num_ready])
+            self.ready, self.ready_start = ready, 0
+
+        if num_frames > 0:
+            # Analysis: spectra of all frames that complete in this block
+            frames = np.lib.stride_tricks.sliding_window_view(samples, frame_size)[::hop_size][:num_frames]
+            windowed = pool.get("windowed", num_frames, frame_size, dtype=np.float64)
+            np.multiply(frames, self.analysis_window, out=windowed)
+            spectra = self.transform(np.fft.rfft(windowed, n=self.fft_size, axis=1))
+
+            # Synthesis
+            output_frames = np.fft.irfft(spectra, n=self.fft_size, axis=1)[:, :frame_size]
+            output_frames *= self.synthesis_window
+
+            # Overlap-add the frames onto the tail carried from the previous block. Every
+            # stride-th frame starts after the previous one ends, so each group is added at once
+            output = pool.get("output", (num_frames - 1) * hop_size + frame_size, dtype=np.float64)
+            output[:len(self.overlap)] = self.overlap
+            output[len(self.overlap):] = 0
+            stride = -(-frame_size // hop_size)
+            slots = np.lib.stride_tricks.sliding_window_view(output, frame_size, writeable=True)
+            for index in range(min(stride, num_frames)):
+                group = output_frames[index::stride]
+                slots[index * hop_size::stride * hop_size][:len(group)] += group
+
+            # Queue the finished samples and keep the input the next frames still need
+            completed = num_frames * hop_size
+            self.overlap[:] = output[completed:]
+            _write_circular(self.ready, (self.ready_start + self.num_ready) % len(self.ready), output[:completed])
+            self.num_ready += completed
+            num_pending = total - completed
+            self.pending[:num_pending] = samples[completed:]
+        else:
+            self.pending[:total] = samples
+            num_pending = total
+        self.num_pending = num_pending
+
+        # Play as many samples as came in
+        _read_circular(self.ready, self.ready_start, out[:num_samples])
+        self.ready_start = (self.ready_start + num_samples) % len(self.ready)
+        self.num_ready -= num_samples
+
+        return out
+
+
+class PitchShifter(STFTEffect):
+    """
+    Streaming phase-vocoder pitch shifter that keeps the length of every block.
+
+    Frames are Hann-windowed, a quarter frame apart (see STFTEffect). For every
+    frame the true frequency of each FFT bin is estimated from its phase advance
+    since the previous frame, then magnitude and frequency are moved to the bin
+    pitch_shift_steps semitones away, and the frames are resynthesized with their
+    phases accumulated at the new frequencies.
+
+    The last analysis phases and the synthesis phases are carried between blocks,
+    along with the STFT's state, so the output is the same for any block size and
+    is delayed by frame_size samples (the latency).
+    """
+    __slots__ = ("pitch_shift_steps", "shift_factor", "bins", "expected", "num_valid", "group_starts", "target_bins",
+                 "last_sources", "last_phase", "sum_phase")
+
+    # Number of frames overlapping each sample
+    OVERSAMPLING = 4
+
+    def __init__(self, pitch_shift_steps: float = 0, sample_rate: int = RATE, frame_sec: float = 0.05) -> None:
+        """
+        Parameters:
+        - pitch_shift_steps (float): Pitch shift in semitones (negative shifts down).
+        - sample_rate (int): Sample rate of the stream.
+        - frame_sec (float): Approximate frame length in seconds, rounded to a power of two samples.
+        """
+        frame_size = 2 ** max(4, round(math.log2(frame_sec * sample_rate)))
+        super().__init__(frame_size, frame_size // self.OVERSAMPLING, sample_rate=sample_rate)
+        self.pitch_shift_steps = pitch_shift_steps
+
+        # Bin numbers, and the phase advance of each bin over one hop at its center frequency
+        num_bins = self.frame_size // 2 + 1
+        self.bins = np.arange(num_bins, dtype=float)
+        self.expected = 2 * np.pi * self.hop_size / self.frame_size * np.arange(num_bins)
+
+        # Bin each analysis bin moves to; bins shifted past Nyquist are dropped, and since the
+        # mapping only ever increases, the bins that are kept are the first num_valid ones
+        self.shift_factor = 2 ** (pitch_shift_steps / 12.0)
+        bin_map = (np.arange(num_bins) * self.shift_factor).astype(np.int64)
+        self.num_valid = int(np.count_nonzero(bin_map < num_bins))
+
+        # Consecutive bins moving to the same target bin: their magnitudes are summed, and
+        # the frequency of the last one is kept
+        self.target_bins, self.group_starts = np.unique(bin_map[:self.num_valid], return_index=True)
+        self.last_sources = np.append(self.group_starts[1:], self.num_valid) - 1
+
+        self.last_phase = np.zeros(num_bins)
+        self.sum_phase = np.zeros(num_bins)
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.last_phase[:] = 0
+        self.sum_phase[:] = 0
+
+    def transform(self, spectra: np.ndarray) -> np.ndarray:
+        frame_size, hop_size = self.frame_size, self.hop_size
+        pool = self.scratch()
+        num_frames, num_bins = spectra.shape
+
+        magnitude = pool.get("magnitude", num_frames, num_bins, dtype=np.float64)
+        np.abs(spectra, out=magnitude)
+        phase = pool.get("phase", num_frames, num_bins, dtype=np.float64)
+        np.arctan2(spectra.imag, spectra.real, out=phase)
+
+        # True frequency of every bin (in bins) from the phase advance over one hop
+        frequency = pool.get("frequency", num_frames, num_bins, dtype=np.float64)
+        np.subtract(phase[0], self.last_phase, out=frequency[0])
+        np.subtract(phase[1:], phase[:-1], out=frequency[1:])
+        frequency -= self.expected
+        frequency += np.pi
+        np.remainder(frequency, 2 * np.pi, out=frequency)
+        frequency -= np.pi
+        frequency *= frame_size
+        frequency /= 2 * np.pi * hop_size
+        frequency += self.bins
+        self.last_phase[:] = phase[-1]
+
+        # Move every bin's magnitude and frequency to its shifted bin
+        grouped = pool.get("grouped", num_frames, len(self.target_bins), dtype=np.float64)
+        shifted_magnitude = pool.get("shifted_magnitude", num_frames, num_bins, dtype=np.float64)
+        shifted_magnitude[:] = 0
+        np.add.reduceat(magnitude[:, :self.num_valid], self.group_starts, axis=1, out=grouped)
+        shifted_magnitude[:, self.target_bins] = grouped
+        phase_step = pool.get("phase_step", num_frames, num_bins, dtype=np.float64)
+        phase_step[:] = 0
+        # The indices are always in range; mode="clip" lets take write straight into out
+        # instead of through a temporary copy
+        np.take(frequency, self.last_sources, axis=1, out=grouped, mode="clip")
+        grouped *= self.shift_factor
+        phase_step[:, self.target_bins] = grouped
+
+        # Synthesis: accumulate the phases at the shifted frequencies, continuing from the last frame
+        phase_step *= 2 * np.pi * hop_size / frame_size
+        np.cumsum(phase_step, axis=0, out=phase_step)
+        phase_step += self.sum_phase
+        np.remainder(phase_step[-1], 2 * np.pi, out=self.sum_phase)
+        np.multiply(phase_step, 1j, out=spectra)
+        np.exp(spectra, out=spectra)
+        spectra *= shifted_magnitude
+        return spectra
+
+
+class DenoiseEffect(STFTEffect):
+    """
+    Noise reduction by spectral subtraction.
+
+    The power of every FFT bin is smoothed over a few frames, and the noise floor
+    of the bin is tracked as the minimum of the smoothed power, which may rise by
+    rise_db per second: it follows a noise that slowly gets louder, while speech,
+    which keeps coming and going, stays above it. Every bin is then scaled by
+    sqrt(1 - strength * noise / power), but never below floor_db, which leaves a
+    little of the noise instead of musical artifacts.
+
+    Both recursions run over all frames of a block at once: the smoothing through
+    scipy.signal.lfilter along the frames, with its state carried, and the rising
+    minimum as floor[f] = f * r + running minimum of (log power[k] - k * r), with r
+    the allowed rise per frame.
+    """
+    __slots__ = ("strength", "floor", "smoothing", "rise", "smoothing_state", "noise_floor")
+
+    # The minimum of the smoothed power of noise lies about 3 dB below its mean
+    MINIMUM_BIAS = 2.0
+
+    def __init__(self, strength: float = 3.0, floor_db: float = -20.0, rise_db: float = 5.0,
+                 smoothing_sec: float = 0.04, frame_sec: float = 0.032, sample_rate: int = RATE) -> None:
+        """
+        Parameters:
+        - strength (float): Multiple of the noise floor subtracted from the power of every bin.
+        - floor_db (float): Lowest gain of a bin, in decibels.
+        - rise_db (float): How fast the noise floor may rise, in decibels per second.
+        - smoothing_sec (float): Time constant of the power smoothing, in seconds.
+        - frame_sec (float): Approximate frame length in seconds, rounded to a power of two samples.
+        - sample_rate (int): Sample rate of the stream.
+        """
+        frame_size = 2 ** max(4, round(math.log2(frame_sec * sample_rate)))
+        super().__init__(frame_size, sample_rate=sample_rate)
+        self.strength = strength * self.MINIMUM_BIAS
+        self.floor = 10 ** (floor_db / 10)
+
+        # Smoothing coefficient and rise of the log power, per frame
+        frame_sec = self.hop_size / sample_rate
+        self.smoothing = math.exp(-frame_sec / smoothing_sec)
+        self.rise = rise_db / 10 * math.log(10) * frame_sec
+        num_bins = self.fft_size // 2 + 1
+        self.smoothing_state = np.zeros((1, num_bins))
+        self.noise_floor = np.zeros(num_bins)
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.smoothing_state[:] = 0
+        self.noise_floor[:] = np.inf
+
+    def transform(self, spectra: np.ndarray) -> np.ndarray:
+        # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+        from scipy import signal
+
+        pool = self.scratch()
+        num_frames, num_bins = spectra.shape
+
+        # Power of every bin, smoothed over the frames
+        power = pool.get("power", num_frames, num_bins, dtype=np.float64)
+        np.abs(spectra, out=power)
+        power *= power
+        power += 1e-9
+        power, self.smoothing_state = signal.lfilter([1 - self.smoothing], [1, -self.smoothing], power, axis=0,
+                                                     zi=self.smoothing_state)
+
+        # Running minimum of the log power, rising by self.rise per frame and continuing from the last frame's floor
+        noise = pool.get("noise", num_frames, num_bins, dtype=np.float64)
+        rises = pool.get("rises", num_frames, 1, dtype=np.float64)
+        np.multiply(pool.arange(num_frames)[:, np.newaxis], self.rise, out=rises)
+        np.log(power, out=noise)
+        noise -= rises
+        self.noise_floor += self.rise
+        np.minimum(noise[0], self.noise_floor, out=noise[0])
+        np.minimum.accumulate(noise, axis=0, out=noise)
+        noise += rises
+        self.noise_floor[:] = noise[-1]
+
+        # Gain of every bin from the ratio of the noise floor to the power
+        np.exp(noise, out=noise)
+        noise /= power
+        noise *= -self.strength
+        noise += 1
+        np.maximum(noise, self.floor, out=noise)
+        np.sqrt(noise, out=noise)
+        spectra *= noise
+        return spectra
+
+
+class AlienEffect(Effect):
+    """
+    Alien voice: ring modulation with a 700 Hz cosine carrier.
+    """
+    __slots__ = ("modulation_frequency", "carrier")
+
+    def __init__(self, modulation_frequency: float = 700, sample_rate: int = RATE) -> None:
+        self.modulation_frequency = modulation_frequency
+
+        # The carrier runs at half of modulation_frequency, and its first sample is one step into the cosine
+        frequency = modulation_frequency / 2
+        self.carrier = Oscillator(frequency, sample_rate, phase=0.25 + frequency / sample_rate)
+        self.reset()
+
+    def reset(self) -> None:
+        self.carrier.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+
+        # Apply modulation to the input signal
+        carrier = self.carrier.generate(self.scratch().get("carrier", len(input_array)))
+        np.multiply(input_array, carrier, out=out)
+
+        return out
+
+
+class EchoEffect(Effect):
+    """
+    Echo: the input and its decayed echo come back delay_sec later, again and again.
+
+    This is a feedback comb filter: what goes into the delay line is the input plus
+    the decayed output of every tap, and the output is the sum of the taps. With
+    several taps, each (delay_sec, decay_factor) pair is heard once per pass and fed
+    back with its own decay; the echoes die away as long as the decay factors add
+    up to less than 1 in magnitude.
+
+    The recursion is evaluated a run of samples at a time: no tap reaches back less
+    than the shortest delay, so a run of that many samples only needs feedback that
+    is already in the line, and every run costs a few vector operations per tap. The
+    result does not depend on the block size. (scipy.signal.lfilter evaluates the
+    same filter, but its direct form costs one multiply-add per sample of delay for
+    every sample, hundreds of times more for echo-length delays.)
+
+    Runs shorter than SHORT_DELAY samples would bring back a Python iteration every
+    few samples, so echoes whose taps all lie within SHORT_DELAY samples (comb
+    filters rather than audible echoes) are evaluated by lfilter instead, where
+    such a short delay line is cheap, with its state carried between blocks. Taps
+    shorter than SHORT_DELAY mixed with longer ones suit neither form and are
+    rejected.
+    """
+    __slots__ = ("delays", "decays", "line", "b", "a", "zi", "lfilter")
+
+    # Delay in samples up to which lfilter is faster than runs of the shortest delay
+    SHORT_DELAY = 64
+
+    def __init__(self, delay_sec: float = 1024 / RATE, decay_factor: float = 0.7, sample_rate: int = RATE,
+                 taps: Optional[Sequence[Tuple[float, float]]] = None) -> None:
+        """
+        Parameters:
+        - delay_sec (float): Delay of the echo in seconds.
+        - decay_factor (float): Gain of every pass of the echo through the delay line.
+        - sample_rate (int): Sample rate of the stream.
+        - taps (Optional[Sequence[Tuple[float, float]]]): (delay_sec, decay_factor) of every
+          tap, for a multi-tap echo; replaces delay_sec and decay_factor.
+        """
+        if taps is None:
+            taps = [(delay_sec, decay_factor)]
+        if not taps:
+            raise ValueError("an echo needs at least one tap")
+        self.delays = tuple(max(1, round(tap_delay * sample_rate)) for tap_delay, _ in taps)
+        self.decays = tuple(float(tap_decay) for _, tap_decay in taps)
+        shortest, longest = min(self.delays), max(self.delays)
+        self.line = self.b = self.a = self.zi = self.lfilter = None
+
+        if longest <= self.SHORT_DELAY:
+            # H = sum(z^-D) / (1 - sum(decay * z^-D)), in direct form with longest samples of state
+            self.b = np.zeros(longest + 1)
+            self.a = np.zeros(longest + 1)
+            self.a[0] = 1
+            for delay, decay in zip(self.delays, self.decays):
+                self.b[delay] += 1
+                self.a[delay] -= decay
+            self.zi = np.zeros(longest)
+
+            # Loaded once here rather than for every block, like EqualizerEffect does
+            from scipy import signal
+            self.lfilter = signal.lfilter
+        elif shortest < self.SHORT_DELAY:
+            raise ValueError(f"an echo tap of {shortest} samples is shorter than {self.SHORT_DELAY} samples, "
+                             f"which only works when every tap is")
+        else:
+            self.line = DelayLine(longest)
+        self.reset()
+
+    def reset(self) -> None:
+        if self.line is None:
+            self.zi[:] = 0
+        else:
+            self.line.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        if self.line is None:
+            # Short delays: lfilter in float64, continuing from the carried state
+            if len(input_array):
+                filtered, zf = self.lfilter(self.b, self.a, input_array, zi=self.zi)
+                np.copyto(self.zi, zf)
+                np.copyto(out, filtered)
+            return out
+
+        line = self.line
+        num_samples = len(input_array)
+        pool = self.scratch()
+        run_length = min(num_samples, min(self.delays))
+        echo = pool.get("echo", run_length)
+        feedback = pool.get("feedback", run_length)
+        tap = pool.get("tap", run_length) if len(self.delays) > 1 else None
+
+        start = 0
+        while start < num_samples:
+            stop = min(start + run_length, num_samples)
+            length = stop - start
+            run_echo = echo[:length]
+            run_feedback = feedback[:length]
+
+            # Every tap of the run is its delay after the feedback, which is the delay minus
+            # the run length before the last run written. The first tap goes straight into
+            # the echo and the feedback, the others are added to them
+            line.read_fixed(self.delays[0] - length, run_echo)
+            np.multiply(run_echo, self.decays[0], out=run_feedback)
+            for delay, decay in zip(self.delays[1:], self.decays[1:]):
+                run_tap = line.read_fixed(delay - length, tap[:length])
+                run_echo += run_tap
+                run_tap *= decay
+                run_feedback += run_tap
+
+            # Feed the input plus the decayed echo back, then output the echo
+            run_feedback += input_array[start:stop]
+            line.write(run_feedback)
+            out[start:stop] = run_echo
+            start = stop
+
+        return out
+
+
+class RobotizeEffect(Effect):
+    """
+    Robotic voice: amplitude modulation followed by a pitch shift, see Filters.robotize_effect.
+
+    The modulation phase and the pitch shifter's state are carried between blocks.
+    """
+    __slots__ = ("mod_freq", "carrier", "shifter", "latency")
+
+    def __init__(self, mod_freq: int = 100, pitch_shift_steps: int = -2, sample_rate: int = RATE,
+                 frame_sec: float = 0.05) -> None:
+        self.mod_freq = mod_freq
+        self.carrier = Oscillator(mod_freq, sample_rate, phase=0.25)
+        self.shifter = PitchShifter(pitch_shift_steps, sample_rate, frame_sec)
+        self.latency = self.shifter.latency
+        self.reset()
+
+    def reset(self) -> None:
+        self.carrier.reset()
+        self.shifter.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+
+        # Apply amplitude modulation by a raised cosine, continuing from the carried phase
+        modulation = self.carrier.generate(self.scratch().get("modulation", len(input_array)))
+        modulation += 1
+        modulation *= 0.5
+        np.multiply(input_array, modulation, out=out)
+
+        # Apply pitch shift, keeping the block length
+        return self.shifter.process(out, out=out)
+
+
+class MaleEffect(PitchShifter):
+    """
+    Male voice: pitch shift 3 semitones down.
+    """
+    __slots__ = ()
+
+    def __init__(self, pitch_shift_steps: int = -3, sample_rate: int = RATE, frame_sec: float = 0.05) -> None:
+        super().__init__(pitch_shift_steps, sample_rate, frame_sec)
+
+
+class FemaleEffect(PitchShifter):
+    """
+    Female voice: pitch shift 3 semitones up.
+    """
+    __slots__ = ()
+
+    def __init__(self, pitch_shift_steps: int = 3, sample_rate: int = RATE, frame_sec: float = 0.05) -> None:
+        super().__init__(pitch_shift_steps, sample_rate, frame_sec)
+
+
+class BabyEffect(PitchShifter):
+    """
+    Baby voice: pitch shift 10 semitones up.
+    """
+    __slots__ = ()
+
+    def __init__(self, pitch_shift_steps: int = 10, sample_rate: int = RATE, frame_sec: float = 0.05) -> None:
+        super().__init__(pitch_shift_steps, sample_rate, frame_sec)
+
+
+class PingPongEffect(Effect):
+    """
+    Ping-pong: direct and delayed audio swap between the stereo channels.
+    """
+    __slots__ = ("delay_samples", "line", "position")
+    mono_only = True
+    output_channels = 2
+
+    def __init__(self, delay_sec: float = 1.0, sample_rate: int = RATE) -> None:
+        self.delay_samples = max(2, round(delay_sec * sample_rate))
+        self.line = DelayLine(self.delay_samples)
+        self.reset()
+
+    def reset(self) -> None:
+        self.line.reset()
+        self.position = 0
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Length of the ping-pong period
+        N = self.delay_samples
+        num_samples = len(input_array)
+        pool = self.scratch()
+        if out is None:
+            out = pool.get("output", num_samples, 2)
+
+        # Samples delayed by the period
+        self.line.write(input_array)
+        delayed = self.line.read_fixed(N, pool.get("delayed", num_samples))
+
+        # Assign direct and delayed audio to alternate channels, one run of samples at a time:
+        # direct audio goes left during the first half of the period, right during the second.
+        # The position within the period is carried, so the swap continues across blocks
+        position = self.position
+        start = 0
+        while start < num_samples:
+            direct_left = position < N // 2
+            stop = min(start + (N // 2 if direct_left else N) - position, num_samples)
+            out[start:stop, 0 if direct_left else 1] = input_array[start:stop]
+            out[start:stop, 1 if direct_left else 0] = delayed[start:stop]
+            position = (position + stop - start) % N
+            start = stop
+        self.position = position
+
+        return out
+
+
+class AlternateChannelsEffect(Effect):
+    """
+    Alternate channels, see Filters.alternate_channels.
+
+    The position within the alternation period is carried between blocks.
+    """
+    __slots__ = ("samples_per_alternation", "position")
+    mono_only = True
+    output_channels = 2
+
+    def __init__(self, alternation_sec: float = 1024 / RATE, sample_rate: int = RATE) -> None:
+        self.samples_per_alternation = max(1, round(alternation_sec * sample_rate))
+        self.reset()
+
+    def reset(self) -> None:
+        self.position = 0
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        num_samples = len(input_array)
+        if out is None:
+            out = self.scratch().get("output", num_samples, 2)  # Stereo output: 2 channels
+        period = self.samples_per_alternation
+
+        # First half of the alternation period: Output to left channel, second half: Output to right channel
+        position = self.position
+        start = 0
+        while start < num_samples:
+            left = position < period
+            stop = min(start + (period if left else 2 * period) - position, num_samples)
+            out[start:stop, 0 if left else 1] = input_array[start:stop]
+            out[start:stop, 1 if left else 0] = 0
+            position = (position + stop - start) % (2 * period)
+            start = stop
+        self.position = position
+
+        return out
+
+
+class MutationEffect(Effect):
+    """
+    Mutation: vibrato through a fractional, modulated read from a delay line.
+
+    The delay starts at half of buffer_sec and is shortened by the modulation of
+    every sample, so the read pointer runs 1 + modulation samples per sample.
+    """
+    __slots__ = ("f0", "depth", "lfo", "line", "initial_delay", "delay")
+
+    def __init__(self, f0: float = 7, depth: float = 0.2, buffer_sec: float = 1024 / RATE, sample_rate: int = RATE,
+                 interpolation: str = "linear") -> None:
+        self.f0 = f0
+        self.depth = depth
+        self.lfo = Oscillator(f0, sample_rate)
+        buffer_len = max(2, round(buffer_sec * sample_rate))
+        self.initial_delay = buffer_len // 2
+
+        # Over half a cycle the modulation moves the delay by depth * sample_rate / (pi * f0),
+        # which must stay within the buffer
+        swing = abs(depth) * sample_rate / (math.pi * abs(f0)) if f0 else 0
+        if swing > self.initial_delay:
+            raise ValueError(f"a mutation depth of {depth} at {f0} Hz swings the delay by {swing:.0f} samples, "
+                             f"more than half of the {buffer_len} sample buffer")
+        self.line = DelayLine(buffer_len, interpolation)
+        self.reset()
+
+    def reset(self) -> None:
+        self.line.reset()
+        self.lfo.reset()
+        self.delay = float(self.initial_delay)
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        pool = self.scratch()
+        num_samples = len(input_array)
+        if num_samples == 0:
+            return out
+
+        # Vibrato modulation, continuing from the carried phase (in float64, as it is integrated)
+        mod_index = self.lfo.generate(pool.get("mod_index", num_samples, dtype=np.float64))
+        mod_index *= self.depth
+
+        # Delay of each sample: the modulation of the samples before it is taken off the carried delay
+        delays = pool.get("delays", num_samples, dtype=np.float64)
+        delays[0] = 0
+        np.cumsum(mod_index[:-1], out=delays[1:])
+        np.subtract(self.delay, delays, out=delays)
+        self.delay = float(delays[-1] - mod_index[-1])
+
+        # The sample is written before it is read, so a delay of 0 is the sample itself
+        self.line.write(input_array)
+        return self.line.read(delays, out)
+
+
+class DrunkEffect(Effect):
+    """
+    Drunk voice, see Filters.drunk.
+
+    The delay line and the oscillator phase are carried between blocks.
+    """
+    __slots__ = ("delay_samples", "line", "oscillator")
+
+    def __init__(self, delay_sec: float = 0.2, sample_rate: int = RATE) -> None:
+        self.delay_samples = max(1, int(delay_sec * sample_rate))
+        self.line = DelayLine(self.delay_samples)
+
+        # The oscillator was designed to advance one radian per sample at RATE. cos(i) + sin(i)
+        # is sqrt(2) * sin(i + pi / 4), a single sine an eighth of a cycle ahead
+        self.oscillator = Oscillator(RATE / (2 * math.pi), sample_rate, phase=0.125)
+        self.reset()
+
+    def reset(self) -> None:
+        self.line.reset()
+        self.oscillator.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        pool = self.scratch()
+        num_samples = len(input_array)
+
+        # Samples delayed by delay_sec
+        self.line.write(input_array)
+        delayed = self.line.read_fixed(self.delay_samples, pool.get("delayed", num_samples))
+
+        # Apply drunk effect by combining the current sample with a delayed sample
+        oscillation = self.oscillator.generate(pool.get("oscillation", num_samples))
+        oscillation *= math.sqrt(2)
+        np.multiply(input_array, oscillation, out=out)
+        out += delayed
+
+        return out
+
+
+class FlangerEffect(Effect):
+    """
+    Flanger: adds a copy of the input delayed by a sinusoidally swept delay.
+
+    The swept delay is fractional and read from a delay line with cubic
+    interpolation, so the sweep is smooth instead of stepping a whole sample at
+    a time (which is heard as zipper noise).
+    """
+    __slots__ = ("sample_rate", "delay", "depth", "rate", "lfo", "line")
+
+    # 3: fractional delay, and delays longer than delay are no longer wrapped around the buffer
+    version = 3
+
+    def __init__(self, delay: float = 0.03, depth: float = 0.02, rate: float = 0.55, sample_rate: int = RATE,
+                 interpolation: str = "cubic") -> None:
+        # The swept delay must stay long enough for the interpolation, so the depth must be smaller than the delay
+        shortest = (delay - abs(depth)) * sample_rate
+        if shortest < DelayLine.MIN_DELAYS.get(interpolation, 0):
+            raise ValueError(f"the flanger's depth ({depth} s) must be smaller than its delay ({delay} s) by at least "
+                             f"{DelayLine.MIN_DELAYS.get(interpolation, 0)} samples")
+
+        self.sample_rate = sample_rate
+        self.delay = delay
+        self.depth = depth
+        self.rate = rate
+        self.lfo = Oscillator(rate, sample_rate)
+        self.line = DelayLine((delay + abs(depth)) * sample_rate, interpolation)
+        self.reset()
+
+    def reset(self) -> None:
+        self.line.reset()
+        self.lfo.reset()
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        pool = self.scratch()
+        sr = self.sample_rate
+        num_samples = len(input_array)
+
+        # Modulated delay of every sample in samples, continuing from the carried phase
+        modulation = self.lfo.generate(pool.get("modulation", num_samples, dtype=np.float64))
+        modulation *= self.depth * sr
+        modulation += self.delay * sr
+
+        # Read the delayed copy of the block, then mix it into the block
+        self.line.write(input_array)
+        delayed = self.line.read(modulation, pool.get("delayed", num_samples))
+        np.add(input_array, delayed, out=out)
+
+        return out
+
+
+def _load_impulse_response(source: Tuple, sample_rate: int) -> np.ndarray:
+    """
+    Load or generate an impulse response, mono at sample_rate and scaled to unit energy.
+
+    Parameters:
+    - source (Tuple): ("file", path, mtime_ns, size) for a 16-bit WAV file, or
+      ("synthetic", decay_sec) for exponentially decaying noise with that RT60.
+    - sample_rate (int): Sample rate the impulse response is needed at.
+
+    Returns:
+    - numpy.ndarray: The impulse response (float64).
+    """
+    if source[0] == "file":
+        # wavfile imports this module, so it is only loaded when a file is used
+        from .wavfile import read_wav
+
+        info, samples = read_wav(source[1])
+        impulse_response = samples.reshape(-1, info.channels).mean(axis=1) / 32768
+        if info.rate != sample_rate:
+            # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+            from scipy import signal
+
+            divisor = math.gcd(info.rate, sample_rate)
+            impulse_response = signal.resample_poly(impulse_response, sample_rate // divisor, info.rate // divisor)
+    else:
+        # Noise decaying by 60 dB over decay_sec, the same for every run
+        decay_sec = source[1]
+        t = np.arange(max(1, round(decay_sec * sample_rate))) / sample_rate
+        impulse_response = np.random.default_rng(0).standard_normal(len(t)) * np.exp(-6.91 * t / decay_sec)
+
+    energy = np.sqrt(np.sum(impulse_response ** 2))
+    return impulse_response / energy if energy > 0 else impulse_response
+
+
+@functools.lru_cache(maxsize=8)
+def _impulse_response_partitions(source: Tuple, sample_rate: int, partition_size: int) -> np.ndarray:
+    """
+    Spectra of the partitions of an impulse response, computed once per source, sample rate and partition size.
+
+    Returns:
+    - numpy.ndarray: Read-only (partitions, partition_size + 1) complex64 array; row k is
+      the FFT (of size 2 * partition_size) of samples k * partition_size to (k + 1) * partition_size.
+    """
+    impulse_response = _load_impulse_response(source, sample_rate)
+    num_partitions = max(1, -(-len(impulse_response) // partition_size))
+    padded = np.zeros(num_partitions * partition_size)
+    padded[:len(impulse_response)] = impulse_response
+
+    partitions = np.fft.rfft(padded.reshape(num_partitions, partition_size), n=2 * partition_size, axis=1).astype(np.complex64)
+    partitions.setflags(write=False)
+    return partitions
+
+
+class ConvolutionReverbEffect(Effect):
+    """
+    Convolution reverb: mixes the input with its convolution by an impulse response.
+
+    Uses uniformly partitioned overlap-save convolution: the impulse response is
+    cut into partitions of partition_size samples, and their spectra are computed
+    once and cached per impulse response, sample rate and partition size. Every
+    partition_size input samples, one FFT of the last 2 * partition_size samples is
+    added to a frequency-domain delay line, multiplied with all partition spectra and
+    transformed back, so the cost per sample does not depend on the block size and
+    grows only linearly with the length of the impulse response. Multi-second
+    impulse responses run in realtime.
+
+    The output lags the input by partition_size - 1 samples (the latency), the
+    time the input takes to fill a partition.
+    """
+    __slots__ = ("sample_rate", "partition_size", "latency", "partitions", "dry_gain", "wet_gain",
+                 "pending", "num_pending", "frame", "spectra", "slot", "ready", "ready_start", "num_ready")
+
+    def __init__(self, ir_path: Optional[str] = None, mix: float = 0.3, decay_sec: float = 1.5,
+                 partition_size: int = 512, sample_rate: int = RATE) -> None:
+        """
+        Parameters:
+        - ir_path (Optional[str]): 16-bit WAV file holding the impulse response (mixed to mono and
+          resampled to sample_rate), or None for exponentially decaying noise.
+        - mix (float): Share of the reverberated signal in the output, from 0 (dry) to 1 (wet).
+        - decay_sec (float): Time the generated impulse response takes to decay by 60 dB (unused with ir_path).
+        - partition_size (int): Samples per partition; smaller partitions lower the latency and raise the cost.
+        - sample_rate (int): Sample rate of the stream.
+        """
+        if ir_path is None:
+            source = ("synthetic", float(decay_sec))
+        else:
+            # Identify the file by its contents' metadata, so an edited file is loaded again
+            stat = os.stat(ir_path)
+            source = ("file", os.path.abspath(ir_path), stat.st_mtime_ns, stat.st_size)
+
+        self.sample_rate = sample_rate
+        self.partition_size = partition_size
+        self.latency = partition_size - 1
+        self.dry_gain = 1 - mix
+        self.wet_gain = mix
+
+        # Partition spectra in reverse order, so the first partition lines up with the newest
+        # spectrum at the end of the delay line's window
+        self.partitions = _impulse_response_partitions(source, sample_rate, partition_size)[::-1]
+        num_partitions, num_bins = self.partitions.shape
+
+        # Frequency-domain delay line, stored twice so the last num_partitions spectra are always contiguous
+        self.spectra = np.zeros((2 * num_partitions, num_bins), dtype=np.complex64)
+        self.pending = np.zeros(partition_size, dtype=DTYPE)
+        self.frame = np.zeros(2 * partition_size)
+        self.ready = np.zeros(2 * partition_size, dtype=DTYPE)
+        self.reset()
+
+    def reset(self) -> None:
+        # Keep latency samples of silence ready to play, so every block can be answered in full
+        self.spectra[:] = 0
+        self.slot = 0
+        self.pending[:] = 0
+        self.num_pending = 0
+        self.frame[:] = 0
+        self.ready[:] = 0
+        self.ready_start = 0
+        self.num_ready = self.latency
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        partition_size = self.partition_size
+        num_samples = len(input_array)
+
+        # The ready queue holds at most a partition plus the block
+        if len(self.ready) < partition_size + num_samples:
+            ready = np.zeros(partition_size + num_samples, dtype=DTYPE)
+            _read_circular(self.ready, self.ready_start, ready[:self.num_ready])
+            self.ready, self.ready_start = ready, 0
+
+        # Fill partitions with the block, convolving each one as soon as it is complete
+        position = 0
+        while position < num_samples:
+            count = min(partition_size - self.num_pending, num_samples - position)
+            self.pending[self.num_pending:self.num_pending + count] = input_array[position:position + count]
+            self.num_pending += count
+            position += count
+            if self.num_pending == partition_size:
+                self._convolve_partition()
+                self.num_pending = 0
+
+        # Play as many samples as came in
+        _read_circular(self.ready, self.ready_start, out[:num_samples])
+        self.ready_start = (self.ready_start + num_samples) % len(self.ready)
+        self.num_ready -= num_samples
+
+        return out
+
+    def _convolve_partition(self) -> None:
+        pool = self.scratch()
+        partition_size = self.partition_size
+        num_partitions = len(self.partitions)
+
+        # Spectrum of the previous and the new partition (overlap-save), added to the delay line
+        frame = self.frame
+        frame[:partition_size] = frame[partition_size:]
+        frame[partition_size:] = self.pending
+        spectrum = np.fft.rfft(frame)
+        self.spectra[self.slot] = spectrum
+        self.spectra[self.slot + num_partitions] = spectrum
+
+        # Each impulse response partition times the input spectrum as many partitions ago
+        self.slot = (self.slot + 1) % num_partitions
+        accumulated = pool.get("accumulated", self.partitions.shape[1], dtype=np.complex64)
+        np.einsum("kf,kf->f", self.partitions, self.spectra[self.slot:self.slot + num_partitions], out=accumulated)
+
+        # The second half of the inverse transform is free of circular wraparound
+        wet = np.fft.irfft(accumulated, n=2 * partition_size)[partition_size:]
+        output = pool.get("output", partition_size)
+        np.multiply(self.pending, self.dry_gain, out=output)
+        wet *= self.wet_gain
+        output += wet
+
+        _write_circular(self.ready, (self.ready_start + self.num_ready) % len(self.ready), output)
+        self.num_ready += partition_size
+
+
+def _biquad(kind: str, frequency: float, gain_db: float, q: float, sample_rate: int) -> np.ndarray:
+    """
+    One second-order section of a peaking or shelving equalizer (Audio EQ Cookbook formulas).
+
+    Parameters:
+    - kind (str): "peaking", "lowshelf" or "highshelf".
+    - frequency (float): Center (peaking) or corner (shelves) frequency in Hertz.
+    - gain_db (float): Gain at the center frequency, or of the shelf, in decibels.
+    - q (float): Quality factor; 0.707 gives shelves without overshoot.
+    - sample_rate (int): Sample rate of the stream.
+
+    Returns:
+    - numpy.ndarray: [b0, b1, b2, 1, a1, a2], normalized like the rows of an SOS array.
+    """
+    amplitude = 10 ** (gain_db / 40)
+    omega = 2 * math.pi * frequency / sample_rate
+    cos_omega = math.cos(omega)
+    alpha = math.sin(omega) / (2 * q)
+
+    if kind == "peaking":
+        b = [1 + alpha * amplitude, -2 * cos_omega, 1 - alpha * amplitude]
+        a = [1 + alpha / amplitude, -2 * cos_omega, 1 - alpha / amplitude]
+    elif kind in ("lowshelf", "highshelf"):
+        # The high shelf is the low shelf with the sign of the cosine terms flipped
+        sign = 1 if kind == "lowshelf" else -1
+        root = 2 * math.sqrt(amplitude) * alpha
+        b = [amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_omega + root),
+             2 * sign * amplitude * ((amplitude - 1) - sign * (amplitude + 1) * cos_omega),
+             amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_omega - root)]
+        a = [(amplitude + 1) + sign * (amplitude - 1) * cos_omega + root,
+             -2 * sign * ((amplitude - 1) + sign * (amplitude + 1) * cos_omega),
+             (amplitude + 1) + sign * (amplitude - 1) * cos_omega - root]
+    else:
+        raise ValueError(f"unknown equalizer section {kind!r}")
+
+    return np.array(b + a) / a[0]
+
+
+@functools.lru_cache(maxsize=32)
+def _sos_sections(sections: Tuple[Tuple, ...], sample_rate: int) -> np.ndarray:
+    """
+    Second-order sections of a filter cascade, designed once per cascade and sample rate.
+
+    Parameters:
+    - sections (Tuple[Tuple, ...]): The filters of the cascade, in order, each one of
+      ("highpass", frequency, order), ("lowpass", frequency, order) and
+      ("bandpass", low_frequency, high_frequency, order) for Butterworth filters, and
+      ("peaking", frequency, gain_db, q), ("lowshelf", ...) and ("highshelf", ...) for
+      equalizer sections (see _biquad). Frequencies above 45% of the sample rate are
+      lowered to it, so a preset designed for wideband audio also works at 8 kHz.
+    - sample_rate (int): Sample rate of the stream.
+
+    Returns:
+    - numpy.ndarray: Read-only (sections, 6) float64 array for scipy.signal.sosfilt; a
+      single pass-through section if sections is empty.
+    """
+    # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+    from scipy import signal
+
+    highest = 0.45 * sample_rate
+    rows = [np.array([[1.0, 0, 0, 1, 0, 0]])]
+    for kind, *arguments in sections:
+        if kind in ("highpass", "lowpass"):
+            frequency, order = arguments
+            rows.append(signal.butter(order, min(frequency, highest), btype=kind, fs=sample_rate, output="sos"))
+        elif kind == "bandpass":
+            low, high, order = arguments
+            band = [min(low, highest), min(high, highest)]
+            rows.append(signal.butter(order, band, btype=kind, fs=sample_rate, output="sos"))
+        else:
+            frequency, gain_db, q = arguments
+            rows.append(_biquad(kind, min(frequency, highest), gain_db, q, sample_rate)[np.newaxis])
+
+    # Drop the pass-through section once there are real ones
+    sos = np.concatenate(rows[1:] if len(rows) > 1 else rows)
+    sos.setflags(write=False)
+    return sos
+
+
+class EqualizerEffect(Effect):
+    """
+    Equalizer: a cascade of second-order IIR sections (biquads), optionally followed
+    by a gain and a soft clipper.
+
+    The sections are evaluated in C by scipy.signal.sosfilt, a few multiply-adds per
+    section and sample whatever the block size, and their state is carried between
+    blocks, so the result does not depend on the block size. The coefficients are
+    designed once per cascade and sample rate and shared by every instance, so
+    creating an effect (for example when the user switches presets) costs nothing
+    but its state.
+
+    The soft clipper is ceiling * tanh(x / ceiling): transparent for quiet samples,
+    it rounds off peaks smoothly instead of clipping them at the int16 limits.
+
+    sosfilt has no output argument, so every block allocates one block-sized float64
+    array (and the final state, copied into the carried one): the exception to the
+    steady-state allocation rule of Effect. The filters stay in float64, where the
+    poles of low-frequency sections near 1 keep their precision.
+    """
+    __slots__ = ("sections", "sos", "gain", "ceiling", "zi", "sosfilt")
+
+    def __init__(self, sections: Sequence[Tuple] = (), gain: float = 1.0, ceiling: Optional[float] = None,
+                 sample_rate: int = RATE) -> None:
+        """
+        Parameters:
+        - sections (Sequence[Tuple]): The filters of the cascade, see _sos_sections.
+        - gain (float): Gain applied after the filters.
+        - ceiling (Optional[float]): Level the soft clipper approaches, in int16 units, or None for no clipping.
+        - sample_rate (int): Sample rate of the stream.
+        """
+        self.sections = tuple(tuple(section) for section in sections)
+        # sosfilt needs writable coefficients, so the instance gets its own copy of the shared ones
+        self.sos = _sos_sections(self.sections, sample_rate).copy()
+        self.gain = gain
+        self.ceiling = ceiling
+        self.zi = np.zeros((len(self.sos), 2))
+
+        # scipy.signal takes longer to import than the rest of the package, so it is only loaded
+        # by the effects that need it, once when they are created rather than for every block
+        from scipy import signal
+        self.sosfilt = signal.sosfilt
+        self.reset()
+
+    def reset(self) -> None:
+        self.zi[:] = 0
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = input_array
+        if len(input_array) == 0:
+            return out
+
+        # Filter in float64, continuing from the carried state, which is kept in its own array
+        filtered, zf = self.sosfilt(self.sos, input_array, zi=self.zi)
+        np.copyto(self.zi, zf)
+
+        if self.ceiling is None:
+            np.multiply(filtered, self.gain, out=filtered)
+            np.copyto(out, filtered)
+        else:
+            np.multiply(filtered, self.gain / self.ceiling, out=filtered)
+            np.copyto(out, filtered)
+            np.tanh(out, out=out)
+            out *= self.ceiling
+
+        return out
+
+
+class TelephoneEffect(EqualizerEffect):
+    """
+    Telephone: the voice band of a phone line, 300 to 3400 Hz.
+    """
+    __slots__ = ()
+
+    def __init__(self, sample_rate: int = RATE) -> None:
+        super().__init__((("bandpass", 300, 3400, 4),), gain=1.4, sample_rate=sample_rate)
+
+
+class RadioEffect(EqualizerEffect):
+    """
+    AM radio: 150 Hz to 4.5 kHz with a presence peak, lightly saturated.
+    """
+    __slots__ = ()
+
+    def __init__(self, sample_rate: int = RATE) -> None:
+        super().__init__((("highpass", 150, 2), ("lowpass", 4500, 4), ("peaking", 1500, 4.0, 0.8)),
+                         gain=1.2, ceiling=20000, sample_rate=sample_rate)
+
+
+class MegaphoneEffect(EqualizerEffect):
+    """
+    Megaphone: a narrow, honky band around 1.8 kHz, overdriven into a soft clipper.
+    """
+    __slots__ = ()
+
+    def __init__(self, sample_rate: int = RATE) -> None:
+        super().__init__((("bandpass", 500, 3500, 2), ("peaking", 1800, 8.0, 1.2)),
+                         gain=4.0, ceiling=12000, sample_rate=sample_rate)
+
+
+class LowShelfEffect(EqualizerEffect):
+    """
+    Low shelf: boosts (or cuts) everything below frequency by gain_db.
+    """
+    __slots__ = ()
+
+    def __init__(self, frequency: float = 250, gain_db: float = 6.0, q: float = 0.707, sample_rate: int = RATE) -> None:
+        super().__init__((("lowshelf", frequency, gain_db, q),), sample_rate=sample_rate)
+
+
+class HighShelfEffect(EqualizerEffect):
+    """
+    High shelf: boosts (or cuts) everything above frequency by gain_db.
+    """
+    __slots__ = ()
+
+    def __init__(self, frequency: float = 3000, gain_db: float = 6.0, q: float = 0.707, sample_rate: int = RATE) -> None:
+        super().__init__((("highshelf", frequency, gain_db, q),), sample_rate=sample_rate)
+
+
+class Resampler(Effect):
+    """
+    Streaming polyphase resampler from input_rate to output_rate.
+
+    Uses the same Kaiser-windowed low-pass filter as scipy.signal.resample_poly,
+    split into one short filter per output phase so only the output samples
+    are ever computed. The filter's group delay is compensated, so the output
+    lines up with the input; the last few input samples of a block (hold_back of
+    them) are held back until the next block supplies the samples their filter
+    needs, so at the end of a stream that many samples of silence must follow
+    to get the output of the last ones.
+
+    The number of output samples per block varies by at most one, but over the
+    stream it tracks the rate ratio exactly.
+    """
+    __slots__ = ("up", "down", "half_len", "hold_back", "filters", "history", "input_count", "output_count")
+
+    def __init__(self, input_rate: int, output_rate: int) -> None:
+        """
+        Parameters:
+        - input_rate (int): Sample rate of the blocks passed to process.
+        - output_rate (int): Sample rate of the blocks it returns.
+        """
+        # scipy.signal takes longer to import than the rest of the package, so only load it when needed
+        from scipy import signal
+
+        # Reduce the ratio to the smallest upsampling and downsampling factors
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+
+        # Anti-aliasing filter, designed like resample_poly's default (Kaiser window, beta 5)
+        self.half_len = 10 * max(self.up, self.down)
+        h = signal.firwin(2 * self.half_len + 1, 1 / max(self.up, self.down), window=("kaiser", 5.0)) * self.up
+
+        # Output n is only computed once the input reaches half_len / up samples past it
+        self.hold_back = -(-self.half_len // self.up)
+
+        # Polyphase decomposition: row p holds the taps h[p], h[p + up], ... in time-reversed
+        # order, so a row lines up with a window of consecutive input samples
+        taps_per_phase = -(-len(h) // self.up)
+        h = np.concatenate((h, np.zeros(taps_per_phase * self.up - len(h))))
+        self.filters = h.reshape(taps_per_phase, self.up).T[:, ::-1].astype(DTYPE)
+
+        self.history = np.zeros(taps_per_phase - 1, dtype=DTYPE)
+        self.reset()
+
+    def reset(self) -> None:
+        self.history[:] = 0
+        self.input_count = 0
+        self.output_count = 0
+
+    def max_output_length(self, num_samples: int) -> int:
+        """
+        Return the most samples process can return for a block of num_samples samples.
+        """
+        return -(-num_samples * self.up // self.down) + 1
+
+    def process(self, input_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Resample the next block of the stream.
+
+        Parameters:
+        - input_array (numpy.ndarray): Input audio block at input_rate.
+        - out (Optional[numpy.ndarray]): Array to write the result to, at least
+          max_output_length(len(input_array)) samples long; it must not overlap input_array.
+
+        Returns:
+        - numpy.ndarray: The output samples at output_rate (a view of the first samples of out, if given).
+        """
+        pool = self.scratch()
+        up, down = self.up, self.down
+        num_taps = self.filters.shape[1]
+        num_history = len(self.history)
+        num_samples = len(input_array)
+        history_start = self.input_count - num_history
+        self.input_count += num_samples
+
+        # Output n sits at position n * down + half_len of the upsampled stream, so it can be
+        # computed once the input sample at that position (divided by up) has arrived
+        output_end = max(self.output_count, -(-(self.input_count * up - self.half_len) // down))
+        num_outputs = output_end - self.output_count
+        out = pool.get("output", num_outputs) if out is None else out[:num_outputs]
+        if num_samples == 0:
+            # Nothing arrived (a preceding resampler may return empty blocks), so nothing can be computed
+            return out
+        position = pool.get("position", num_outputs, dtype=np.int64)
+        np.multiply(pool.arange(num_outputs, np.int64), down, out=position)
+        position += self.output_count * down + self.half_len
+        self.output_count = output_end
+
+        # Each output is the dot product of the window of input samples ending at
+        # position // up with the filter phase position % up
+        samples = pool.get("samples", num_history + num_samples)
+        samples[:num_history] = self.history
+        samples[num_history:] = input_array
+        index = pool.get("index", num_outputs, dtype=np.int64)
+        np.floor_divide(position, up, out=index)
+        index -= num_taps - 1 + history_start
+
+        # Gather the windows through a sample index per tap (taking rows of a sliding
+        # window view would first copy the whole view). The index is built from two
+        # full-size arrays, as a broadcasting ufunc goes through temporary buffers;
+        # the indices are always in range, so mode="clip" lets take write straight into out
+        tap_offsets = pool.get("tap_offsets", num_outputs, num_taps, dtype=np.int64)
+        np.copyto(tap_offsets, pool.arange(num_taps, np.int64))
+        window_index = pool.get("window_index", num_outputs, num_taps, dtype=np.int64)
+        np.copyto(window_index, index.reshape(-1, 1))
+        window_index += tap_offsets
+        window_rows = np.take(samples, window_index, out=pool.get("windows", num_outputs, num_taps), mode="clip")
+        np.remainder(position, up, out=index)
+        filter_rows = np.take(self.filters, index, axis=0, out=pool.get("filters", num_outputs, num_taps), mode="clip")
+        np.einsum("ij,ij->i", window_rows, filter_rows, out=out)
+
+        # Keep the samples the next windows still need
+        self.history[:] = samples[len(samples) - num_history:]
+
+        return out
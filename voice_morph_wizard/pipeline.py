@@ -0,0 +1,229 @@
+import subprocess
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+from .cache import DecodedAudioCache
+from .chain import Chain
+from .wavfile import AudioInfo, WavWriter, read_wav
+
+# Frames read, processed and written at a time when converting a file
+CHUNK_FRAMES = 16384
+
+
+def probe(path: str) -> AudioInfo:
+    """
+    Read the format and length of a WAV or MP3 file without decoding it.
+
+    Parameters:
+        path (str): Path of the audio file.
+
+    Returns:
+        AudioInfo: The format of the file. For MP3 files the number of frames is
+        estimated from the duration ffprobe reports.
+
+    Example usage:
+        info = probe("voice.mp3")
+        seconds = info.frames / info.rate
+    """
+    if not path.lower().endswith(".mp3"):
+        try:
+            return read_wav(path)[0]
+        except ValueError:
+            # Not a 16-bit PCM WAV file; ffmpeg decodes it like an MP3
+            pass
+    return _probe_decoder(path)
+
+
+def read_chunks(path: str, chunk_frames: int = CHUNK_FRAMES,
+                cache: Optional[DecodedAudioCache] = None) -> Tuple[AudioInfo, Iterator[np.ndarray]]:
+    """
+    Open a WAV or MP3 file for reading in chunks.
+
+    Parameters:
+        path (str): Path of the audio file.
+        chunk_frames (int): Number of frames per chunk.
+        cache (Optional[DecodedAudioCache]): Cache to take the audio from, if it already holds it decoded.
+
+    Returns:
+        Tuple[AudioInfo, Iterator[numpy.ndarray]]: The format of the file and a generator of
+        interleaved int16 chunks. The file stays open until the generator is exhausted or closed.
+
+    Only one chunk is held in memory at a time, whatever the length of the file. WAV
+    chunks are views of the memory-mapped data chunk, so they are not even copied.
+    MP3 files (and WAV files that are not 16-bit PCM) are streamed from ffmpeg. When
+    the cache already holds the decoded audio, the chunks are views of the cached
+    samples instead; the cache is never filled from here, as that would decode the
+    whole file into memory.
+
+    Example usage:
+        info, chunks = read_chunks("voice.wav")
+        for chunk in chunks:
+            ...
+    """
+    entry = cache.peek(path) if cache is not None else None
+    if entry is not None:
+        info, samples = entry
+    elif path.lower().endswith(".mp3"):
+        return _read_decoder_chunks(path, chunk_frames)
+    else:
+        try:
+            info, samples = read_wav(path)
+        except ValueError:
+            return _read_decoder_chunks(path, chunk_frames)
+
+    chunk_samples = chunk_frames * info.channels
+
+    def chunks() -> Iterator[np.ndarray]:
+        for start in range(0, len(samples), chunk_samples):
+            yield samples[start:start + chunk_samples]
+
+    return info, chunks()
+
+
+def _probe_decoder(path: str) -> AudioInfo:
+    # pydub's mediainfo runs ffprobe, which reads the format without decoding
+    from pydub.utils import mediainfo
+
+    media_info = mediainfo(path)
+    channels = int(media_info["channels"])
+    rate = int(media_info["sample_rate"])
+    return AudioInfo(channels, rate, 2, int(float(media_info.get("duration", 0)) * rate))
+
+
+def _read_decoder_chunks(path: str, chunk_frames: int) -> Tuple[AudioInfo, Iterator[np.ndarray]]:
+    # pydub decodes the whole file at once, so only use it to find ffmpeg and
+    # read the format, and stream the decoded samples from ffmpeg's output
+    from pydub import AudioSegment
+
+    info = _probe_decoder(path)
+    channels = info.channels
+
+    def chunks() -> Iterator[np.ndarray]:
+        # ffmpeg is started with the first chunk, so a generator that is never run leaves no process behind
+        decoder = subprocess.Popen(
+            [AudioSegment.converter, "-v", "quiet", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le", "-"],
+            stdout=subprocess.PIPE,
+            stdin=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                data = decoder.stdout.read(chunk_frames * channels * 2)
+                if not data:
+                    break
+                yield np.frombuffer(data, dtype=np.int16)
+        finally:
+            decoder.stdout.close()
+            decoder.kill()
+            decoder.wait()
+
+    return info, chunks()
+
+
+def process_chunks(chain: Chain, chunks: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    """
+    Run a stream of chunks through an effect chain, carrying the effect state between them.
+
+    Parameters:
+        chain (Chain): Effect chain, created for the format of the chunks.
+        chunks (Iterator[numpy.ndarray]): Interleaved int16 input chunks.
+
+    Returns:
+        Iterator[numpy.ndarray]: Interleaved output chunks (float32 in the int16 range). A chunk
+        may share memory with the chain, so it must be consumed before the next one is requested.
+
+    The chain's latency is removed: the first chain.latency output frames are dropped
+    and the chain is flushed with silence after the last chunk, as many frames as its
+    latency and what its resamplers hold back, so the output lines up with the input
+    and is exactly as long.
+
+    Example usage:
+        for output in process_chunks(chain, chunks):
+            writer.write(output)
+    """
+    skip = chain.latency * chain.output_channels
+    flush = np.zeros((chain.latency + chain.hold_back) * chain.channels, dtype=np.int16)
+
+    # Output samples owed for the input so far, which caps the output of the flush
+    owed = 0
+    for chunk in _append(chunks, flush):
+        if chunk is not flush:
+            owed += len(chunk) // chain.channels * chain.output_channels
+        output = chain.process(chunk)
+
+        # Drop the output that only carries the latency
+        if skip:
+            dropped = min(skip, len(output))
+            output = output[dropped:]
+            skip -= dropped
+
+        output = output[:owed]
+        owed -= len(output)
+        if len(output):
+            yield output
+
+
+def _append(chunks: Iterator[np.ndarray], last: np.ndarray) -> Iterator[np.ndarray]:
+    yield from chunks
+    if len(last):
+        yield last
+
+
+def write_wav(path: str, chunks: Iterator[np.ndarray], channels: int, rate: int, frames_hint: int = 0,
+              dither: bool = False) -> int:
+    """
+    Write a stream of chunks to a WAV file.
+
+    Parameters:
+        path (str): Path of the WAV file to create.
+        chunks (Iterator[numpy.ndarray]): Interleaved chunks (int16, or float in the int16 range).
+        channels (int): Number of interleaved channels.
+        rate (int): Sampling rate in frames per second.
+        frames_hint (int): Expected number of frames, preallocated in the file.
+        dither (bool): Whether to add TPDF dither when converting float chunks to int16.
+
+    Returns:
+        int: Number of frames written.
+
+    Every chunk is converted to int16 while it is copied into the memory-mapped file,
+    rounded and saturated (see Quantizer), the only int16 conversion of the output.
+
+    Example usage:
+        frames = write_wav("output.wav", process_chunks(chain, chunks), chain.output_channels, info.rate, info.frames)
+    """
+    with WavWriter(path, channels, rate, frames_hint, dither) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    return writer.frames
+
+
+def convert_file(input_path: str, output_path: str, create_chain: Callable[[AudioInfo], Chain],
+                 chunk_frames: int = CHUNK_FRAMES, cache: Optional[DecodedAudioCache] = None,
+                 dither: bool = False) -> Tuple[AudioInfo, AudioInfo]:
+    """
+    Apply an effect chain to an audio file and write the result to a WAV file, chunk by chunk.
+
+    Parameters:
+        input_path (str): Path of the WAV or MP3 file to convert.
+        output_path (str): Path of the WAV file to write.
+        create_chain (Callable[[AudioInfo], Chain]): Creates the chain for the format of the input.
+        chunk_frames (int): Number of frames read, processed and written at a time.
+        cache (Optional[DecodedAudioCache]): Cache to take the input from, if it already holds it decoded.
+        dither (bool): Whether to add TPDF dither when converting the output to int16.
+
+    Returns:
+        Tuple[AudioInfo, AudioInfo]: The format of the input and of the output file.
+
+    Reading, filtering and writing are chained generators, so memory use stays the
+    same whatever the length of the file. WAV input is read through a memory map, and
+    the output file is preallocated for as many frames as the input and written through one.
+
+    Example usage:
+        input_info, output_info = convert_file("voice.mp3", "robot.wav",
+                                               lambda info: create_chain("Robotic Voice", sample_rate=info.rate, channels=info.channels))
+    """
+    input_info, chunks = read_chunks(input_path, chunk_frames, cache)
+    chain = create_chain(input_info)
+
+    frames = write_wav(output_path, process_chunks(chain, chunks), chain.output_channels, input_info.rate, input_info.frames,
+                       dither)
+    return input_info, AudioInfo(chain.output_channels, input_info.rate, 2, frames)
@@ -0,0 +1,192 @@
+from importlib import metadata
+from typing import Callable, Dict, Iterable, List, Optional
+from .chain import Chain, PER_CHANNEL
+from .filters import (RATE, Effect, AlienEffect, RobotizeEffect, MaleEffect, FemaleEffect, BabyEffect, EchoEffect,
+                     PingPongEffect, AlternateChannelsEffect, MutationEffect, FlangerEffect, ConvolutionReverbEffect,
+                     TelephoneEffect, RadioEffect, MegaphoneEffect, LowShelfEffect, HighShelfEffect, DenoiseEffect)
+
+# Entry point group third-party packages use to register their effects
+ENTRY_POINT_GROUP = "voice_morph_wizard.effects"
+
+# Effect name -> factory creating a new effect instance for a sample rate
+_factories: Dict[str, Callable[..., Effect]] = {}
+
+# Effect name -> entry point that has been discovered but not imported yet
+_entry_points: Dict[str, metadata.EntryPoint] = {}
+
+# Whether the installed distributions have been scanned for entry points
+_entry_points_discovered = False
+
+
+def register(name: str, factory: Callable[..., Effect]) -> None:
+    """
+    Register an effect factory under a display name.
+
+    Parameters:
+        name (str): Name shown in the filter combobox.
+        factory (Callable[..., Effect]): Callable (usually the effect class) returning a new effect.
+            It is called with the stream's rate as the sample_rate keyword.
+
+    Registering an existing name replaces its factory.
+
+    Example usage:
+        register("Alien Voice", AlienEffect)
+    """
+    _factories[name] = factory
+    _entry_points.pop(name, None)
+
+
+def discover_entry_points() -> None:
+    """
+    Find effects published by installed packages, without importing them.
+
+    A package registers an effect by declaring an entry point in the
+    "voice_morph_wizard.effects" group, for example in its pyproject.toml:
+
+        [project.entry-points."voice_morph_wizard.effects"]
+        "Chipmunk Voice" = "my_effects:ChipmunkEffect"
+
+    The entry point must accept a sample_rate keyword, like the built-in effects.
+    The scan runs once, the first time the registry is queried; the module behind
+    an entry point is only imported when that effect is first created.
+    """
+    global _entry_points_discovered
+
+    if _entry_points_discovered:
+        return
+    _entry_points_discovered = True
+
+    all_entry_points = metadata.entry_points()
+    if hasattr(all_entry_points, "select"):
+        group = all_entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        # Python < 3.10 returns a dict of groups
+        group = all_entry_points.get(ENTRY_POINT_GROUP, [])
+
+    # Built-in and explicitly registered effects take precedence over plugins
+    for entry_point in group:
+        if entry_point.name not in _factories:
+            _entry_points.setdefault(entry_point.name, entry_point)
+
+
+def get_factory(name: str) -> Optional[Callable[..., Effect]]:
+    """
+    Look up the factory registered under a name.
+
+    Parameters:
+        name (str): Effect name.
+
+    Returns:
+        Optional[Callable[..., Effect]]: The factory, or None if no effect has this name.
+    """
+    factory = _factories.get(name)
+    if factory is not None:
+        return factory
+
+    discover_entry_points()
+    entry_point = _entry_points.pop(name, None)
+    if entry_point is None:
+        return None
+
+    # Import the plugin on first use and cache its factory
+    factory = entry_point.load()
+    _factories[name] = factory
+    return factory
+
+
+def create(name: str, sample_rate: int = RATE, frame_sec: Optional[float] = None) -> Optional[Effect]:
+    """
+    Create a new effect instance by name.
+
+    Parameters:
+        name (str): Effect name.
+        sample_rate (int): Sample rate of the stream the effect will process.
+        frame_sec (Optional[float]): Frame length in seconds for effects that work on frames of the
+            stream (those taking a frame_sec keyword, such as the pitch shifters), or None for their
+            default. Shorter frames lower their latency.
+
+    Returns:
+        Optional[Effect]: A new effect with its own state, or None for unknown names.
+
+    Example usage:
+        effect = registry.create("Echoed Voice", sample_rate=44100)
+    """
+    factory = get_factory(name)
+    if factory is None:
+        return None
+    if frame_sec is not None and _takes_frame_sec(factory):
+        return factory(sample_rate=sample_rate, frame_sec=frame_sec)
+    return factory(sample_rate=sample_rate)
+
+
+def _takes_frame_sec(factory: Callable[..., Effect]) -> bool:
+    # Only needed when a frame length is asked for, so inspect is imported here
+    import inspect
+
+    try:
+        return "frame_sec" in inspect.signature(factory).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def create_chain(filter_names: Iterable[str], sample_rate: int = RATE, channels: int = 1,
+                 output_channels: Optional[int] = None, policy: str = PER_CHANNEL,
+                 internal_rate: Optional[int] = None, block_size: int = 4096,
+                 frame_sec: Optional[float] = None) -> Chain:
+    """
+    Create a chain with a new instance of every named effect, in order.
+
+    Parameters:
+        filter_names (Iterable[str]): Effect names; names without an effect (such as "Normal") add no stage.
+        sample_rate (int): Sample rate of the audio the chain processes.
+        channels (int): Number of interleaved channels in the input.
+        output_channels (Optional[int]): Number of interleaved channels in the output.
+        policy (str): PER_CHANNEL or DOWNMIX, how multi-channel input is processed.
+        internal_rate (Optional[int]): Sample rate the effects run at (default: sample_rate).
+        block_size (int): Expected frames per block.
+        frame_sec (Optional[float]): Frame length of the effects that work on frames, see create.
+
+    Returns:
+        Chain: The new chain.
+
+    Example usage:
+        chain = registry.create_chain(["Male Voice", "Echoed Voice"], sample_rate=44100, channels=2)
+    """
+    # The effects are set up for the rate they run at
+    effect_rate = internal_rate or sample_rate
+
+    effects = [create(name, sample_rate=effect_rate, frame_sec=frame_sec) for name in filter_names]
+    return Chain([effect for effect in effects if effect is not None], block_size=block_size,
+                 channels=channels, output_channels=output_channels, policy=policy,
+                 sample_rate=sample_rate, internal_rate=effect_rate)
+
+
+def names() -> List[str]:
+    """
+    List the names of all built-in and plugin effects.
+
+    Returns:
+        List[str]: Effect names, built-in effects first in registration order.
+    """
+    discover_entry_points()
+    return list(_factories) + [name for name in _entry_points if name not in _factories]
+
+
+# Built-in effects, in the order they appear in the filter combobox
+register("Alien Voice", AlienEffect)
+register("Robotic Voice", RobotizeEffect)
+register("Male Voice", MaleEffect)
+register("Female Voice", FemaleEffect)
+register("Baby Voice", BabyEffect)
+register("Echoed Voice", EchoEffect)
+register("Ping Pong Voice", PingPongEffect)
+register("Alternate Channel Effect", AlternateChannelsEffect)
+register("Mutation Effect", MutationEffect)
+register("Flanger Effect", FlangerEffect)
+register("Reverb Effect", ConvolutionReverbEffect)
+register("Telephone Voice", TelephoneEffect)
+register("Radio Voice", RadioEffect)
+register("Megaphone Voice", MegaphoneEffect)
+register("Bass Boost", LowShelfEffect)
+register("Treble Boost", HighShelfEffect)
+register("Noise Reduction", DenoiseEffect)
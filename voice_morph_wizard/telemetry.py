@@ -0,0 +1,243 @@
+import logging
+import time
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# PortAudio status flags passed to stream callbacks (paInputUnderflow, ...), by name
+PORTAUDIO_FLAGS = {
+    "input_underflow": 0x01,
+    "input_overflow": 0x02,
+    "output_underflow": 0x04,
+    "output_overflow": 0x08,
+    "priming_output": 0x10,
+}
+
+
+class StageHistogram:
+    """
+    Fixed-size histogram of the time one stage of the realtime loop takes per block.
+
+    Durations are counted in logarithmic bins, four per octave, from nanoseconds to
+    minutes, so recording a block is a few integer operations on a preallocated list
+    and never allocates memory. Percentiles are accurate to about 12%; the maximum
+    and the mean are exact. Blocks that took longer than the deadline are counted
+    as misses; a stage without a deadline (such as a blocking read, which waits for
+    the input by design) is timed for information only.
+    """
+    __slots__ = ("name", "deadline_ns", "counts", "count", "total_ns", "max_ns", "misses", "last_ns")
+
+    # Bins per octave of duration, and number of bins (up to 2**40 ns, about 18 minutes)
+    BINS_PER_OCTAVE = 4
+    NUM_BINS = 4 * 39
+
+    def __init__(self, name: str, deadline_ns: Optional[int]) -> None:
+        """
+        Parameters:
+        - name (str): Name of the stage.
+        - deadline_ns (Optional[int]): Time a block may take, in nanoseconds, or None for no deadline.
+        """
+        self.name = name
+        self.deadline_ns = deadline_ns
+        self.counts = [0] * self.NUM_BINS
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget every recorded block.
+        """
+        for index in range(self.NUM_BINS):
+            self.counts[index] = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.misses = 0
+        self.last_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        """
+        Count one block.
+
+        Parameters:
+        - duration_ns (int): Time the stage took, in nanoseconds.
+        """
+        # The top two bits below the leading one select the bin within the octave
+        bits = duration_ns.bit_length()
+        index = duration_ns if bits <= 3 else 4 * (bits - 2) + ((duration_ns >> (bits - 3)) & 3)
+        self.counts[index if index < self.NUM_BINS else self.NUM_BINS - 1] += 1
+
+        self.count += 1
+        self.total_ns += duration_ns
+        self.last_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        if self.deadline_ns is not None and duration_ns > self.deadline_ns:
+            self.misses += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile of the recorded durations.
+
+        Parameters:
+        - q (float): Percentile, between 0 and 100.
+
+        Returns:
+        - float: Duration in seconds (the middle of the bin holding the percentile), or 0.0 without data.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                break
+
+        if index < 8:
+            low, high = index, index + 1
+        else:
+            shift = index // 4 - 1
+            low, high = (4 + index % 4) << shift, (5 + index % 4) << shift
+        return min((low + high) / 2, self.max_ns) / 1e9
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return the statistics of the stage, durations in seconds (the deadline is None without one).
+        """
+        return {
+            "blocks": self.count,
+            "mean": self.total_ns / self.count / 1e9 if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max_ns / 1e9,
+            "last": self.last_ns / 1e9,
+            "deadline": self.deadline_ns / 1e9 if self.deadline_ns is not None else None,
+            "deadline_misses": self.misses,
+        }
+
+
+class BlockTelemetry:
+    """
+    Per-block timing of the stages of a realtime audio loop, with deadline-miss counts.
+
+    Every stage (for example "read", "process" and "write") has a StageHistogram,
+    fed with durations measured from time.perf_counter_ns, a monotonic clock.
+    A stage misses its deadline when a block takes longer than the audio it holds.
+    Stages that wait for the audio device, such as a blocking read that returns once
+    a whole block has arrived, take about a block by design: leave them out of
+    deadline_stages to time them without counting misses.
+    PortAudio's status flags (input overflow, output underflow, ...) are counted
+    alongside. Nothing is allocated per block, and recording costs well under a
+    microsecond, so the instrumentation can stay on while the stream runs.
+
+    Each histogram must only be recorded by one thread. snapshot() can be called
+    from any thread, and maybe_log() writes a summary line to the
+    "voice_morph_wizard.telemetry" logger every log_interval seconds.
+
+    Example usage:
+        telemetry = BlockTelemetry(["read", "process"], deadline=2048 / 16000, deadline_stages=["process"])
+        start = telemetry.clock()
+        ...
+        telemetry.record("process", telemetry.clock() - start)
+        telemetry.maybe_log()
+        print(telemetry.snapshot()["stages"]["process"]["p99"])
+    """
+
+    # Monotonic clock the durations are measured with, in nanoseconds
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self, stages: Sequence[str], deadline: float, log_interval: Optional[float] = 10.0,
+                 deadline_stages: Optional[Sequence[str]] = None) -> None:
+        """
+        Parameters:
+        - stages (Sequence[str]): Names of the stages timed per block.
+        - deadline (float): Time a stage may take per block (the block duration), in seconds.
+        - log_interval (Optional[float]): Seconds between summary lines in maybe_log(), or None for none.
+        - deadline_stages (Optional[Sequence[str]]): Stages held to the deadline (default: all); the
+          others are timed for information only.
+        """
+        if deadline_stages is None:
+            deadline_stages = stages
+        self.stages = {name: StageHistogram(name, int(deadline * 1e9) if name in deadline_stages else None)
+                       for name in stages}
+        self.flags = {name: 0 for name in PORTAUDIO_FLAGS}
+        self.log_interval_ns = int(log_interval * 1e9) if log_interval else None
+        self.last_log_ns = self.clock()
+
+    def record(self, stage: str, duration_ns: int) -> None:
+        """
+        Count one block of a stage.
+
+        Parameters:
+        - stage (str): Name of the stage.
+        - duration_ns (int): Time the stage took, in nanoseconds.
+        """
+        self.stages[stage].record(duration_ns)
+
+    def record_status(self, status: int) -> None:
+        """
+        Count the PortAudio status flags passed to a stream callback.
+
+        Parameters:
+        - status (int): The callback's status_flags argument.
+        """
+        if status:
+            for name, flag in PORTAUDIO_FLAGS.items():
+                if status & flag:
+                    self.flags[name] += 1
+
+    def count_flag(self, name: str) -> None:
+        """
+        Count a PortAudio condition reported some other way (such as a blocking read raising paInputOverflowed).
+
+        Parameters:
+        - name (str): Name of the flag, a key of PORTAUDIO_FLAGS.
+        """
+        self.flags[name] += 1
+
+    def reset(self) -> None:
+        """
+        Forget every recorded block and flag.
+        """
+        for histogram in self.stages.values():
+            histogram.reset()
+        for name in self.flags:
+            self.flags[name] = 0
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Return the statistics of every stage and the flag counts.
+
+        Returns:
+        - Dict[str, dict]: {"stages": {stage: statistics (see StageHistogram.snapshot)}, "flags": {flag: count}}.
+        """
+        return {
+            "stages": {name: histogram.snapshot() for name, histogram in self.stages.items()},
+            "flags": dict(self.flags),
+        }
+
+    def summary(self) -> str:
+        """
+        One line describing every stage and the flags that occurred.
+        """
+        parts = []
+        for name, histogram in self.stages.items():
+            part = (f"{name} p50 {histogram.percentile(50) * 1000:.2f} ms p99 {histogram.percentile(99) * 1000:.2f} ms "
+                    f"max {histogram.max_ns / 1e6:.2f} ms")
+            if histogram.deadline_ns is not None:
+                part += f" late {histogram.misses}/{histogram.count}"
+            parts.append(part)
+        flags = ", ".join(f"{name} {count}" for name, count in self.flags.items() if count)
+        return " | ".join(parts + [flags or "no PortAudio flags"])
+
+    def maybe_log(self) -> None:
+        """
+        Log the summary line if log_interval has passed since the last one (call once per block).
+        """
+        if self.log_interval_ns is None:
+            return
+        now = self.clock()
+        if now - self.last_log_ns >= self.log_interval_ns:
+            self.last_log_ns = now
+            logger.info(self.summary())
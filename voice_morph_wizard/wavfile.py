@@ -0,0 +1,259 @@
+import struct
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+from .filters import BufferPool
+
+# WAVE format tags for integer PCM
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Size of the header written by WavWriter: RIFF header, 16-byte fmt chunk and data chunk header
+HEADER_SIZE = 44
+
+# Range of int16 samples
+INT16_MIN = -32768
+INT16_MAX = 32767
+
+
+class AudioInfo(NamedTuple):
+    """
+    Format of an audio stream.
+    """
+    channels: int  # Number of interleaved channels
+    rate: int      # Sampling rate in frames per second
+    width: int     # Number of bytes per sample
+    frames: int    # Number of frames in the stream
+
+
+class Quantizer:
+    """
+    Convert float samples in the int16 range to int16, the one conversion at the output of a stream.
+
+    Samples are rounded to the nearest integer and saturate at -32768 and 32767,
+    where astype would truncate and wrap a loud peak around to the opposite sign.
+    With dither, triangular (TPDF) noise spanning +-1 LSB is added before rounding,
+    so the quantization error of quiet passages becomes a steady noise floor instead
+    of distortion that follows the signal. int16 samples are copied unchanged.
+
+    The noise comes from a seeded generator, so a file renders to the same bytes
+    every time. Scratch arrays are reused, so converting a block allocates nothing
+    once the stream runs at a steady block size.
+
+    Example usage:
+        quantizer = Quantizer(dither=True)
+        output_int16 = quantizer(output_array, output_block[:len(output_array)])
+    """
+    __slots__ = ("rng", "pool")
+
+    def __init__(self, dither: bool = False, seed: Optional[int] = 0) -> None:
+        """
+        Parameters:
+        - dither (bool): Whether to add TPDF dither before rounding.
+        - seed (Optional[int]): Seed of the dither noise, or None for a different noise every run.
+        """
+        self.rng = np.random.default_rng(seed) if dither else None
+        self.pool = BufferPool()
+
+    def __call__(self, samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Convert samples into out.
+
+        Parameters:
+        - samples (numpy.ndarray): Samples to convert (float in the int16 range, or int16).
+        - out (numpy.ndarray): int16 array as long as samples.
+
+        Returns:
+        - numpy.ndarray: out.
+        """
+        if samples.dtype.kind in "iu":
+            out[...] = samples
+            return out
+
+        num_samples = len(samples)
+        work = self.pool.get("work", num_samples, dtype=np.float32)
+        if self.rng is None:
+            np.rint(samples, out=work)
+        else:
+            # The difference of two uniform variables on [0, 1) is triangular on (-1, 1)
+            noise = self.pool.get("noise", num_samples, dtype=np.float32)
+            self.rng.random(dtype=np.float32, out=work)
+            self.rng.random(dtype=np.float32, out=noise)
+            work -= noise
+            work += samples
+            np.rint(work, out=work)
+
+        np.clip(work, INT16_MIN, INT16_MAX, out=work)
+        np.copyto(out, work, casting="unsafe")
+        return out
+
+
+def read_wav(path: str) -> Tuple[AudioInfo, np.memmap]:
+    """
+    Memory-map the samples of a 16-bit PCM WAV file.
+
+    Parameters:
+        path (str): Path of the WAV file.
+
+    Returns:
+        Tuple[AudioInfo, numpy.memmap]: The format of the file and its interleaved int16
+        samples, mapped read-only straight from the data chunk.
+
+    Nothing is read until the samples are accessed, and slices of the array are views
+    of the file, so even very long files never need a copy in memory.
+
+    Example usage:
+        info, samples = read_wav("voice.wav")
+        first_second = samples[:info.rate * info.channels]
+    """
+    with open(path, 'rb') as wav_file:
+        riff, _, wave_id = struct.unpack("<4sI4s", wav_file.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+
+        # Walk the chunks until the data chunk; fmt always comes before it
+        fmt = None
+        while True:
+            header = wav_file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", wav_file.read(16))
+                wav_file.seek(chunk_size - 16 + (chunk_size & 1), 1)
+            elif chunk_id == b"data":
+                data_offset = wav_file.tell()
+                break
+            else:
+                # Chunks are padded to an even size
+                wav_file.seek(chunk_size + (chunk_size & 1), 1)
+
+        file_size = wav_file.seek(0, 2)
+
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk before its data")
+    format_tag, channels, rate, _, _, bits = fmt
+    if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE) or bits != 16:
+        raise ValueError(f"Only 16-bit PCM WAV files are supported, {path} has format {format_tag:#x} with {bits}-bit samples")
+
+    # Streaming writers may leave the data size at 0 or 0xFFFFFFFF; trust the file size then
+    if chunk_size == 0 or data_offset + chunk_size > file_size:
+        chunk_size = file_size - data_offset
+    frames = chunk_size // (2 * channels)
+
+    if frames == 0:
+        return AudioInfo(channels, rate, 2, 0), np.zeros(0, dtype=np.int16)
+    samples = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames * channels,))
+    return AudioInfo(channels, rate, 2, frames), samples
+
+
+class WavWriter:
+    """
+    Write a 16-bit PCM WAV file through a memory map.
+
+    The file is created with room for frames_hint frames and samples are copied
+    straight into the mapped data chunk; float samples are converted to int16
+    in that same copy, by a Quantizer (saturating, optionally dithered). If more
+    frames arrive, the file is grown (doubling), and close() trims it to the
+    frames actually written and fixes up the header.
+
+    Example usage:
+        with WavWriter("output.wav", channels=2, rate=44100, frames_hint=info.frames) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path: str, channels: int, rate: int, frames_hint: int = 0, dither: bool = False) -> None:
+        """
+        Parameters:
+        - path (str): Path of the WAV file to create.
+        - channels (int): Number of interleaved channels.
+        - rate (int): Sampling rate in frames per second.
+        - frames_hint (int): Expected number of frames, preallocated up front.
+        - dither (bool): Whether to add TPDF dither when converting float samples to int16.
+        """
+        self.path = path
+        self.channels = channels
+        self.rate = rate
+        self.num_samples = 0
+        self.samples = None
+        self.quantizer = Quantizer(dither)
+
+        with open(path, 'wb') as wav_file:
+            wav_file.write(self._header(0))
+        self._allocate(max(frames_hint, 1) * channels)
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append interleaved samples (int16, or float in the int16 range).
+
+        Parameters:
+        - samples (numpy.ndarray): Samples to append.
+        """
+        end = self.num_samples + len(samples)
+        if end > len(self.samples):
+            self._allocate(max(end, 2 * len(self.samples)))
+
+        self.quantizer(samples, self.samples[self.num_samples:end])
+        self.num_samples = end
+
+    @property
+    def frames(self) -> int:
+        """
+        Number of frames written so far.
+        """
+        return self.num_samples // self.channels
+
+    def close(self) -> None:
+        """
+        Trim the file to the samples written and write the final header.
+        """
+        if self.samples is None:
+            return
+        self.samples.flush()
+        self.samples = None
+
+        data_size = self.num_samples * 2
+        with open(self.path, 'r+b') as wav_file:
+            wav_file.write(self._header(data_size))
+            wav_file.truncate(HEADER_SIZE + data_size)
+
+    def __enter__(self) -> "WavWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _allocate(self, num_samples: int) -> None:
+        # Grow the file and map its data chunk again; the old map is released
+        # first, since some platforms cannot resize a mapped file
+        if self.samples is not None:
+            self.samples.flush()
+            self.samples = None
+        with open(self.path, 'r+b') as wav_file:
+            wav_file.truncate(HEADER_SIZE + 2 * num_samples)
+        self.samples = np.memmap(self.path, dtype="<i2", mode="r+", offset=HEADER_SIZE, shape=(num_samples,))
+
+    def _header(self, data_size: int) -> bytes:
+        block_align = 2 * self.channels
+        return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_size, b"WAVE",
+                           b"fmt ", 16, WAVE_FORMAT_PCM, self.channels, self.rate, self.rate * block_align, block_align, 16,
+                           b"data", data_size)
+
+
+def write_wav(path: str, samples: np.ndarray, channels: int, rate: int, dither: bool = False) -> None:
+    """
+    Write interleaved samples to a 16-bit WAV file in one go.
+
+    Parameters:
+        path (str): Path of the WAV file to create.
+        samples (numpy.ndarray): Interleaved samples (int16, or float in the int16 range).
+        channels (int): Number of interleaved channels.
+        rate (int): Sampling rate in frames per second.
+        dither (bool): Whether to add TPDF dither when converting float samples to int16.
+
+    Example usage:
+        write_wav("output.wav", samples, channels=1, rate=16000)
+    """
+    with WavWriter(path, channels, rate, len(samples) // channels, dither) as writer:
+        writer.write(samples)